@@ -0,0 +1,86 @@
+"""
+Load test: /predict under a benign flood with a trickle of attack-like flows.
+
+Floods the API with benign-looking requests (low Flow Pkts/s, no SYN/RST)
+from many concurrent clients and, in parallel, sends attack-like flows
+(high Flow Pkts/s, SYN set). Reports status codes and latency percentiles
+per traffic kind, then the API's /admission counters. With admission
+control, attack flows should stay at 200 with bounded latency while
+benign flows absorb the 429s.
+
+Needs a running API and httpx (pip install httpx):
+    python benchmarks/bench_admission.py --url http://localhost:8000 --duration 10
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.app.type_definitions import FEATURE_NAMES
+
+
+def make_payload(attack: bool) -> dict:
+    payload = {name: random.uniform(0, 1000) for name in FEATURE_NAMES}
+    payload["Protocol"] = 6
+    payload["Flow Pkts/s"] = random.uniform(50000, 200000) if attack else random.uniform(0, 500)
+    payload["SYN Flag Cnt"] = 1.0 if attack else 0.0
+    payload["RST Flag Cnt"] = 0.0
+    return payload
+
+
+async def worker(client, url, attack, deadline, results, pause):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            r = await client.post(url, json=make_payload(attack))
+            status = r.status_code
+        except httpx.HTTPError:
+            status = "error"
+        results.append((status, time.perf_counter() - t0))
+        if pause:
+            await asyncio.sleep(pause)
+
+
+def report(kind, results):
+    codes = Counter(status for status, _ in results)
+    ok = np.array([lat for status, lat in results if status == 200]) * 1000
+    line = f"{kind:<8} sent={len(results):<6} codes={dict(codes)}"
+    if len(ok):
+        line += f"  200 latency ms: p50={np.percentile(ok, 50):.1f} p99={np.percentile(ok, 99):.1f} max={ok.max():.1f}"
+    print(line)
+
+
+async def run(url, duration, flood_clients, attack_clients):
+    limits = httpx.Limits(max_connections=flood_clients + attack_clients + 4)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        benign, attack = [], []
+        tasks = [worker(client, f"{url}/predict", False, deadline, benign, 0) for _ in range(flood_clients)]
+        tasks += [worker(client, f"{url}/predict", True, deadline, attack, 0.05) for _ in range(attack_clients)]
+        await asyncio.gather(*tasks)
+
+        report("benign", benign)
+        report("attack", attack)
+        print("admission:", (await client.get(f"{url}/admission")).json())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--flood-clients", type=int, default=400)
+    parser.add_argument("--attack-clients", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.url.rstrip("/"), args.duration, args.flood_clients, args.attack_clients))
+
+
+if __name__ == "__main__":
+    main()
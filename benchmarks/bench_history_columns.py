@@ -0,0 +1,101 @@
+"""
+Memory/speed of the columnar in-memory history vs. one dict per prediction.
+
+Appends --rows synthetic predictions (shaped like ModelLoader results) to
+MemoryPredictionStore with a ring of the same size, and keeps the same
+results in a plain list of dicts (the previous layout). Reports bytes per
+prediction (tracemalloc), append throughput, and the latency of /history
+(newest 100 rows as dicts), aggregate() over the whole ring and over the
+last 10 seconds.
+
+    python benchmarks/bench_history_columns.py --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.app.model_loader import ModelLoader
+from src.app.prediction_store import MemoryPredictionStore, ClassReservoirs
+
+CLASSES = ["Benign", "Brute Force", "DDoS", "Other"]
+
+
+def make_result(i, threat_info, rng):
+    cls = CLASSES[i % 4] if i % 10 == 0 else "Benign"
+    proba = rng.dirichlet(np.ones(4))
+    info = threat_info[cls]
+    result = {"prediction_class": cls, "prediction_id": CLASSES.index(cls), "confidence": float(proba.max()),
+              "threat_type": info["Tipe Ancaman"], "response_mode": info["Mode Respon"],
+              "mitigation_actions": list(info["Aksi Mitigasi"]),
+              "input_summary": f"Proto: 6, Flow: {i * 7 % 100000:.0f}",
+              "probabilities": [round(float(p), 6) for p in proba], "model": "xgboost@legacy"}
+    if cls != "Benign":
+        result["incident_id"] = i // 100
+    return result
+
+
+def timed(fn, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar prediction history")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    threat_info = _threat_info()
+    rng = np.random.default_rng(0)
+    features = np.zeros(69, dtype=np.float32)
+    features[0] = 6
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    dicts = []
+    for i in range(args.rows // 10):  # 10% sample, scaled up: a million dicts takes a while
+        result = make_result(i, threat_info, rng)
+        result["seq"], result["timestamp"] = i + 1, "2026-01-01T00:00:00.000000"
+        dicts.append(result)
+    dict_bytes = (tracemalloc.get_traced_memory()[0] - base) / len(dicts)
+    del dicts
+
+    base = tracemalloc.get_traced_memory()[0]
+    store = MemoryPredictionStore(100, ClassReservoirs(), capacity=args.rows, threat_info=threat_info)
+    t0 = time.perf_counter()
+    for i in range(args.rows):
+        features[1] = i * 7 % 100000
+        store.append(make_result(i, threat_info, rng), features)
+    append_s = time.perf_counter() - t0
+    ring_bytes = (tracemalloc.get_traced_memory()[0] - base) / args.rows
+    tracemalloc.stop()
+
+    print(f"rows: {args.rows:,}")
+    print(f"dict per prediction:  {dict_bytes:>8.0f} bytes/row  (~{dict_bytes * args.rows / 2**20:,.0f} MB)")
+    print(f"columnar ring:        {ring_bytes:>8.0f} bytes/row  (~{ring_bytes * args.rows / 2**20:,.0f} MB, "
+          f"{store.stats()['bytes_per_row']} in columns, rest = reservoirs)")
+    print(f"append:               {args.rows / append_s:>8.0f} rows/s (incl. building the synthetic result)")
+    print(f"history (100 rows):   {timed(store.history):>8.2f} ms")
+    print(f"aggregate (all rows): {timed(store.aggregate):>8.2f} ms")
+    print(f"aggregate (10 s):     {timed(lambda: store.aggregate(10)):>8.2f} ms")
+
+
+def _threat_info():
+    """ModelLoader.threat_info without loading any artifacts."""
+    loader = ModelLoader.__new__(ModelLoader)
+    try:
+        ModelLoader.__init__(loader, "/nonexistent", "/nonexistent")
+    except FileNotFoundError:
+        pass
+    return loader.threat_info
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: /history/export encoding straight from the SQLite prediction store.
+
+Fills a scratch SQLite store with synthetic predictions (once), then streams
+the whole range through stream_export() as Arrow IPC and as zstd Parquet.
+Reports time, output size and peak RSS, and checks the row count after
+reading the result back with pyarrow.
+
+    python benchmarks/bench_history_export.py --rows 1000000
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import resource
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.app.prediction_store import SQLitePredictionStore
+from src.app.history_export import stream_export
+
+CLASSES = ["Benign", "Brute Force", "DDoS", "Other"]
+
+
+def fill(store, rows):
+    store._conn.execute("BEGIN")
+    for i in range(rows):
+        store.append({"prediction_class": CLASSES[i % 4], "prediction_id": i % 4, "confidence": 0.9,
+                      "incident_id": i // 1000 if i % 4 else None, "mitigation_actions": []})
+    store._conn.execute("COMMIT")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Arrow / Parquet history export")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default="/tmp/ids_export_bench.db")
+    args = parser.parse_args()
+
+    store = SQLitePredictionStore(args.db, maxlen=args.rows)
+    stored, = store._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()
+    if stored < args.rows:
+        t0 = time.perf_counter()
+        fill(store, args.rows - stored)
+        print(f"[INFO] Filled {args.rows - stored:,} rows in {time.perf_counter() - t0:.1f}s")
+
+    for fmt in ("arrow", "parquet"):
+        out = io.BytesIO()
+        t0 = time.perf_counter()
+        for chunk in stream_export(store, fmt):
+            out.write(chunk)
+        elapsed = time.perf_counter() - t0
+        data = pa.py_buffer(out.getvalue())
+        table = pa.ipc.open_stream(data).read_all() if fmt == "arrow" else pq.read_table(pa.BufferReader(data))
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{fmt:<8} {table.num_rows:>10,} rows  {elapsed:6.2f}s  {data.size / 2**20:7.1f} MB  "
+              f"peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Microbenchmark: request decode + response encode for /predict and /history.
+
+Compares the old path (pydantic model -> to_array, FastAPI jsonable_encoder +
+json.dumps) with the fast path (decode_features, orjson).
+
+Run from the project root:
+    python benchmarks/bench_json_path.py
+"""
+import os
+import sys
+import json
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from src.app.type_definitions import FEATURE_NAMES, NetworkTrafficData, decode_features, FastJSONResponse
+
+N_DECODE = 20000
+N_ENCODE = 500
+
+
+def make_body() -> bytes:
+    payload = {name: random.uniform(0, 1e6) for name in FEATURE_NAMES}
+    payload["Protocol"] = 6
+    return json.dumps(payload).encode()
+
+
+def make_history(n: int = 100) -> list:
+    return [{
+        "prediction_class": "DDoS",
+        "prediction_id": 2,
+        "confidence": random.random(),
+        "threat_type": "Denial of Service",
+        "response_mode": "Rate Limiting",
+        "mitigation_actions": ["Activate Rate Limiting on API Gateway", "Route traffic through scrubbing center"],
+        "input_summary": "Proto: 6, Flow: 12345",
+        "timestamp": "2025-01-01T00:00:00.000000",
+    } for _ in range(n)]
+
+
+def bench(label: str, fn, number: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<42} {best * 1e6:9.2f} us/op")
+    return best
+
+
+def main():
+    body = make_body()
+    history = make_history()
+    fast_response = FastJSONResponse(content=None)
+
+    print("Decode (1 flow, 69 features):")
+    old = bench("json.loads + pydantic validate + to_array", lambda: NetworkTrafficData.model_validate(json.loads(body)).to_array(), N_DECODE)
+    new = bench("decode_features (strict)", lambda: decode_features(body), N_DECODE)
+    print(f"  speedup: {old / new:.1f}x")
+
+    print("Encode (/history, 100 entries):")
+    old = bench("jsonable_encoder + json.dumps", lambda: json.dumps(jsonable_encoder(history)).encode(), N_ENCODE)
+    new = bench("FastJSONResponse.render (orjson)", lambda: fast_response.render(history), N_ENCODE)
+    print(f"  speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
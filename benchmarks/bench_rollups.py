@@ -0,0 +1,78 @@
+"""
+Long-horizon trend queries from the on-disk rollup store.
+
+Backfills --days of synthetic traffic (--per-minute predictions per
+minute) through TimeSeriesRollups into a scratch RollupStore, flushing
+and compacting every simulated hour like the background thread does. Then it times
+range queries (1 h, 24 h, 7 d, 30 d), checks that the 30-day totals match
+what was added, and reports rows per level and the file size.
+
+    python benchmarks/bench_rollups.py --days 30 --per-minute 50
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.app.rollup_store import RollupStore, DAY
+from src.app.timeseries import TimeSeriesRollups
+
+CLASSES = ["Benign", "Brute Force", "DDoS", "Other"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-resolution rollup store")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--per-minute", type=int, default=50)
+    parser.add_argument("--db", default="/tmp/ids_rollup_bench.db")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    rng = np.random.default_rng(0)
+    end = time.time() // 60 * 60
+    start = end - args.days * DAY
+    rollups = TimeSeriesRollups(CLASSES)
+    store = RollupStore(args.db, rollups, now=start)
+
+    t0 = time.perf_counter()
+    added = np.zeros(len(CLASSES), dtype=np.int64)
+    for minute in np.arange(start, end, 60):
+        classes = rng.choice(len(CLASSES), size=args.per_minute, p=[0.85, 0.05, 0.07, 0.03])
+        confidences = rng.beta(8, 2, size=args.per_minute)
+        offsets = rng.uniform(0, 60, size=args.per_minute)
+        for c, conf, off in zip(classes.tolist(), confidences.tolist(), offsets.tolist()):
+            rollups.add(conf, CLASSES[c], minute + off)
+        added += np.bincount(classes, minlength=len(CLASSES))
+        if minute % 3600 == 3540:
+            store.flush(upto=minute + 60)
+            store.compact(now=minute + 60)
+    store.flush(upto=end)
+    store.compact(now=end)
+    print(f"backfill: {added.sum():,} predictions in {time.perf_counter() - t0:.1f} s")
+
+    for label, window in (("1 h", 3600), ("24 h", DAY), ("7 d", 7 * DAY), (f"{args.days} d", args.days * DAY)):
+        store.query(end - window, end)  # Warm the page cache
+        t0 = time.perf_counter()
+        for _ in range(10):
+            result = store.query(end - window, end)
+        ms = (time.perf_counter() - t0) / 10 * 1000
+        print(f"query {label:<5} {ms:>7.2f} ms  {result['resolution']:<6} {len(result['t']):>5} points  "
+              f"threat_rate {result['totals']['threat_rate']}")
+
+    totals = store.query(start, end)["totals"]
+    expected = {name: int(n) for name, n in zip(CLASSES, added)}
+    print("30-day totals match:", totals["classes"] == expected, totals["classes"])
+    status = store.status()
+    print(f"disk: {status['disk_bytes'] / 2**20:.2f} MB | " +
+          " | ".join(f"{name} {level['rows']:,}/{level['max_rows']:,} rows" for name, level in status["levels"].items()))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
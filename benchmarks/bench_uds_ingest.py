@@ -0,0 +1,73 @@
+"""
+Throughput/latency: per-flow HTTP /predict vs. the Unix domain socket ingest.
+
+Sends the same random flows through POST /predict (one JSON request per
+flow, keep-alive session) and through the UDS binary protocol at several
+batch sizes, and reports flows/s and per-frame latency percentiles.
+
+Needs a running API started with IDS_UDS_PATH set:
+    IDS_UDS_PATH=/tmp/ids-ingest.sock python src/app/api.py
+    python benchmarks/bench_uds_ingest.py --socket /tmp/ids-ingest.sock --url http://localhost:8000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.app.type_definitions import FEATURE_NAMES
+from src.app.uds_ingest import UdsClient
+
+
+def make_flows(n: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    flows = rng.uniform(0, 1000, size=(n, len(FEATURE_NAMES))).astype(np.float32)
+    flows[:, FEATURE_NAMES.index("Protocol")] = 6
+    return flows
+
+
+def report(label, n_flows, latencies):
+    lat = np.array(latencies) * 1000
+    total = sum(latencies)
+    print(f"{label:<18} {n_flows / total:>10.0f} flows/s   per call ms: "
+          f"p50={np.percentile(lat, 50):.2f} p99={np.percentile(lat, 99):.2f}")
+
+
+def bench_http(url, flows):
+    session = requests.Session()
+    latencies = []
+    for row in flows:
+        payload = dict(zip(FEATURE_NAMES, row.tolist()))
+        t0 = time.perf_counter()
+        session.post(f"{url}/predict", json=payload).raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+    report("http (1/request)", len(flows), latencies)
+
+
+def bench_uds(path, flows, batch):
+    latencies = []
+    with UdsClient(path) as client:
+        for i in range(0, len(flows), batch):
+            t0 = time.perf_counter()
+            client.predict(flows[i:i + batch])
+            latencies.append(time.perf_counter() - t0)
+    report(f"uds (batch {batch})", len(flows), latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", default=os.getenv("IDS_UDS_PATH", "/tmp/ids-ingest.sock"))
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--flows", type=int, default=2000)
+    parser.add_argument("--batches", default="1,64,1024")
+    args = parser.parse_args()
+
+    flows = make_flows(args.flows)
+    bench_http(args.url, flows[: min(len(flows), 1000)])
+    for batch in (int(b) for b in args.batches.split(",")):
+        bench_uds(args.socket, flows, batch)
+    print(requests.get(f"{args.url}/ingest").json())
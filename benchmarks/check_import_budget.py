@@ -0,0 +1,53 @@
+"""
+Import-time budget for the serving process.
+
+Imports the API module in fresh interpreters under `python -X importtime`
+and fails (exit code 1) if the best-of-N import time exceeds the budget or
+if the import pulls in any of the heavy modules that must stay off the
+import path (pandas, pyarrow, sklearn, xgboost, ... see startup_report.py).
+Meant to run in CI after every change to src/app:
+
+    python benchmarks/check_import_budget.py --budget-ms 800
+"""
+import os
+import sys
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.app.startup_report import profile_imports
+
+DEFAULT_BUDGET_MS = float(os.getenv("IDS_IMPORT_BUDGET_MS", "800"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the API module exceeds the budget")
+    parser.add_argument("--module", default="src.app.api")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="Best of N (the first run also warms the disk cache)")
+    args = parser.parse_args()
+
+    profiles = [profile_imports(args.module, cwd=ROOT) for _ in range(args.runs)]
+    best = min(profiles, key=lambda p: p["import_ms"])
+
+    print(f"[INFO] import {args.module}: best {best['import_ms']:.0f}ms of {args.runs} runs "
+          f"(interpreter wall {best['interpreter_wall_ms']:.0f}ms), budget {args.budget_ms:.0f}ms")
+    print("[INFO] Self time per package (ms):")
+    for package, ms in best["top_packages_ms"].items():
+        print(f"    {package:<24} {ms:8.1f}")
+
+    failures = []
+    if best["import_ms"] > args.budget_ms:
+        failures.append(f"import time {best['import_ms']:.0f}ms > budget {args.budget_ms:.0f}ms")
+    if best["heavy_modules"]:
+        failures.append(f"heavy modules imported at module level: {best['heavy_modules']}")
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    if not failures:
+        print("[OK] Within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
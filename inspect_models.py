@@ -1,11 +1,14 @@
+import os
 import joblib
 import numpy as np
 import sys
 import pandas as pd
 
-# Paths
-SCALER_PATH = r"d:\Dev_Drive\Coding Project Files\Uni_Assignment\UAS\36230035_KeamananData_UAS\src\models_dev\models\scaler.joblib"
-MODEL_PATH = r"d:\Dev_Drive\Coding Project Files\Uni_Assignment\UAS\36230035_KeamananData_UAS\src\models_dev\models\xgboost.joblib"
+# Paths (relative to this file, i.e. the project root)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCALER_PATH = os.path.join(BASE_DIR, "src", "models_dev", "models", "scaler.joblib")
+MODEL_PATH = os.path.join(BASE_DIR, "src", "models_dev", "models", "xgboost.joblib")
+FEATURE_LIST_PATH = os.path.join(BASE_DIR, "feature_list.txt")
 
 def inspect_artifacts():
     print(f"Loading Scaler from: {SCALER_PATH}")
@@ -17,7 +20,7 @@ def inspect_artifacts():
         
         if hasattr(scaler, 'feature_names_in_'):
             features = list(scaler.feature_names_in_)
-            with open("feature_list.txt", "w") as f:
+            with open(FEATURE_LIST_PATH, "w") as f:
                 f.write("\n".join(features))
             print("Feature names saved to feature_list.txt")
         else:
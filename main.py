@@ -1,91 +1,266 @@
+import argparse
 import subprocess
 import sys
 import os
+import json
 import signal
 import time
 import shutil
 import platform
+import threading
 import webbrowser
+import urllib.request
 
 # Configuration
 API_PORT = 8000
 STREAMLIT_PORT = 8501
 NEXTJS_PORT = 3000
-SIMULATOR_DELAY = 5 # Seconds to wait before starting simulator
+REPLICA_BASE_PORT = 8100    # Scale-out mode: replica i listens on REPLICA_BASE_PORT + i
+# Scale-out mode: the dashboards' API. Incidents, time series and traces are per
+# replica, so the load balancer sends this port to replica 0 (others on failover only).
+DASHBOARD_API_PORT = 8099
+
+# Readiness & supervision
+READY_POLL_INITIAL = 0.05   # First readiness probe delay (seconds)
+READY_POLL_MAX = 1.0        # Probe backoff cap
+READY_TIMEOUT = 120         # Give up waiting for readiness after this many seconds
+RESTART_BACKOFF_INITIAL = 1.0
+RESTART_BACKOFF_MAX = 30.0
+RESTART_RESET_AFTER = 60    # A service that stays up this long gets its backoff reset
+MAX_RESTARTS = 5            # Critical services exceeding this (without a reset) stop the launcher
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 NEXTJS_DIR = os.path.join(BASE_DIR, "src", "app", "web", "ddos-protection-full")
 STREAMLIT_EXPECTED_PATH = os.path.join(BASE_DIR, "src", "app", "web", "streamlit.py")
 SIMULATOR_PATH = os.path.join(BASE_DIR, "src", "app", "dummy_data_stream.py")
+LOAD_BALANCER_PATH = os.path.join(BASE_DIR, "src", "app", "load_balancer.py")
 
-processes = []
+processes = {}  # Service name -> its current process (replaced on restart)
+LAUNCH_T0 = time.monotonic()
 
 def log(message, level="INFO"):
     print(f"[{level}] {message}")
 
+def elapsed():
+    return time.monotonic() - LAUNCH_T0
+
 def check_npm():
     return shutil.which("npm") is not None
 
-def run_api():
-    """Runs the FastAPI backend."""
-    log("Starting FastAPI Backend...")
-    # Using 'src.app.api:app' assuming main.py is in root
-    cmd = [sys.executable, "-m", "uvicorn", "src.app.api:app", "--host", "0.0.0.0", "--port", str(API_PORT)]
-    p = subprocess.Popen(cmd, cwd=BASE_DIR)
-    processes.append(p)
-    return p
-
-def run_simulator():
-    """Runs the Traffic Simulator."""
-    log("Starting Real-time Traffic Simulator...")
-    cmd = [sys.executable, SIMULATOR_PATH]
-    p = subprocess.Popen(cmd, cwd=BASE_DIR)
-    processes.append(p)
-    return p
-
-def run_streamlit():
-    """Runs the Streamlit Dashboard."""
-    log("Starting Streamlit Dashboard...")
-    cmd = [sys.executable, "-m", "streamlit", "run", STREAMLIT_EXPECTED_PATH, "--server.port", str(STREAMLIT_PORT)]
-    p = subprocess.Popen(cmd, cwd=BASE_DIR)
-    processes.append(p)
-    return p
-
-def run_nextjs():
-    """Runs the Next.js Frontend."""
-    if not os.path.exists(NEXTJS_DIR):
+def api_ready(body):
+    """API is ready once /health reports the model as loaded."""
+    try:
+        return json.loads(body).get("model_loaded") is True
+    except ValueError:
+        return False
+
+
+class Service:
+    """A supervised child process with dependencies and an optional HTTP readiness probe."""
+
+    def __init__(self, name, cmd, cwd=BASE_DIR, shell=False, depends_on=(), ready_url=None,
+                 ready_check=None, critical=False, env=None):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.shell = shell
+        self.env = env
+        self.depends_on = list(depends_on)
+        self.ready_url = ready_url
+        self.ready_check = ready_check
+        self.critical = critical
+
+        self.proc = None
+        self.spawned_at = None   # Seconds since launcher start (first spawn)
+        self.ready_at = None
+        self.ready = threading.Event()
+        self.gave_up = False     # Readiness probe timed out
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF_INITIAL
+        self.next_restart_at = None
+        self.last_start = None
+
+    def start(self):
+        log(f"Starting {self.name}...")
+        # Own process group on POSIX so cleanup also reaches shell children (npm)
+        env = {**os.environ, **self.env} if self.env else None
+        self.proc = subprocess.Popen(self.cmd, cwd=self.cwd, shell=self.shell, env=env,
+                                     start_new_session=platform.system() != "Windows")
+        processes[self.name] = self.proc
+        self.last_start = time.monotonic()
+        if self.spawned_at is None:
+            self.spawned_at = elapsed()
+        self.ready.clear()
+        threading.Thread(target=self._wait_ready, name=f"ready-{self.name}", daemon=True).start()
+
+    def _wait_ready(self):
+        """Polls the readiness URL with short exponential backoff."""
+        proc = self.proc
+        if self.ready_url is None:
+            self._mark_ready()
+            return
+
+        delay = READY_POLL_INITIAL
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline and proc.poll() is None and proc is self.proc:
+            try:
+                with urllib.request.urlopen(self.ready_url, timeout=1) as r:
+                    body = r.read()
+                    if r.status == 200 and (self.ready_check is None or self.ready_check(body)):
+                        self._mark_ready()
+                        return
+            except Exception:
+                pass
+            time.sleep(delay)
+            delay = min(delay * 2, READY_POLL_MAX)
+
+        if proc.poll() is None and proc is self.proc:
+            self.gave_up = True
+            log(f"{self.name} not ready after {READY_TIMEOUT}s.", "WARNING")
+
+    def _mark_ready(self):
+        if self.ready_at is None:
+            ready_at = elapsed()
+            log(f"{self.name} ready (+{ready_at:.2f}s).", "SUCCESS")
+            self.ready_at = ready_at
+        else:
+            log(f"{self.name} ready again after restart #{self.restarts}.", "SUCCESS")
+        self.ready.set()
+
+    def settled(self):
+        """Ready, or failed to come up (probe timed out / crashed before ready)."""
+        return self.ready_at is not None or self.gave_up or self.restarts > 0
+
+    def poll_crash(self):
+        """Returns the exit code if the process died, else None."""
+        if self.proc is None or self.next_restart_at is not None:
+            return None
+        return self.proc.poll()
+
+    def schedule_restart(self):
+        self.ready.clear()
+        # Reset backoff if the previous run was healthy for a while
+        if self.last_start and time.monotonic() - self.last_start > RESTART_RESET_AFTER:
+            self.backoff = RESTART_BACKOFF_INITIAL
+            self.restarts = 0
+        self.next_restart_at = time.monotonic() + self.backoff
+        log(f"{self.name} exited (code {self.proc.returncode}). Restarting in {self.backoff:.0f}s...", "ERROR")
+        self.backoff = min(self.backoff * 2, RESTART_BACKOFF_MAX)
+        self.restarts += 1
+
+    def maybe_restart(self):
+        if self.next_restart_at is not None and time.monotonic() >= self.next_restart_at:
+            self.next_restart_at = None
+            self.start()
+
+
+def build_api_services(replicas):
+    """
+    One uvicorn process on API_PORT, or (scale-out mode) N replicas behind the
+    local least-connections balancer on API_PORT. Replicas share the prediction
+    store and action log through SQLite, so /history stays globally consistent;
+    dashboards go through DASHBOARD_API_PORT (always the same replica).
+    """
+    uvicorn_cmd = [sys.executable, "-m", "uvicorn", "src.app.api:app"]
+    if replicas <= 1:
+        return [Service(
+            "FastAPI Backend", uvicorn_cmd + ["--host", "0.0.0.0", "--port", str(API_PORT)],
+            ready_url=f"http://localhost:{API_PORT}/health", ready_check=api_ready, critical=True,
+        )]
+
+    services = []
+    for i in range(replicas):
+        port = REPLICA_BASE_PORT + i
+        env = {"IDS_PREDICTION_STORE": "sqlite", "IDS_REPLICA_ID": str(i)}
+        if os.getenv("IDS_UDS_PATH"):
+            env["IDS_UDS_PATH"] = f"{os.environ['IDS_UDS_PATH']}.{i}"  # One socket per replica
+        services.append(Service(
+            f"API Replica {i}", uvicorn_cmd + ["--host", "127.0.0.1", "--port", str(port)],
+            ready_url=f"http://127.0.0.1:{port}/health", ready_check=api_ready, critical=True,
+            env=env,
+        ))
+    backends = ",".join(str(REPLICA_BASE_PORT + i) for i in range(replicas))
+    services.append(Service(
+        "FastAPI Backend", [sys.executable, LOAD_BALANCER_PATH, "--port", str(API_PORT), "--backends", backends,
+                            "--primary-port", str(DASHBOARD_API_PORT)],
+        depends_on=[s.name for s in services],
+        ready_url=f"http://localhost:{API_PORT}/health", ready_check=api_ready, critical=True,
+    ))
+    return services
+
+
+def build_services(replicas=1):
+    """Declares every service and its dependencies. Independent services start in parallel."""
+    dashboard_api = f"http://localhost:{DASHBOARD_API_PORT if replicas > 1 else API_PORT}"
+    services = build_api_services(replicas) + [
+        # Streamlit polls the API itself, so it does not have to wait for it
+        Service(
+            "Streamlit Dashboard",
+            [sys.executable, "-m", "streamlit", "run", STREAMLIT_EXPECTED_PATH,
+             "--server.port", str(STREAMLIT_PORT), "--server.headless", "true"],
+            ready_url=f"http://localhost:{STREAMLIT_PORT}/_stcore/health",
+            env={"IDS_API_URL": dashboard_api},
+        ),
+        Service(
+            "Traffic Simulator",
+            [sys.executable, SIMULATOR_PATH],
+            depends_on=["FastAPI Backend"],
+        ),
+    ]
+
+    if not check_npm():
+        log("npm not found. Skipping Next.js.", "WARNING")
+        log("FALLBACK MODE ACTIVE: Using Streamlit Only.", "IMPORTANT")
+    elif not os.path.exists(NEXTJS_DIR):
         log(f"Next.js directory not found at {NEXTJS_DIR}", "WARNING")
-        return None
-
-    log("Starting Next.js Dashboard...")
-    
-    # Check if node_modules exists
-    if not os.path.exists(os.path.join(NEXTJS_DIR, "node_modules")):
-         log("node_modules not found. Installing dependencies (this may take a while)...", "WARNING")
-         subprocess.call(["npm", "install"], cwd=NEXTJS_DIR, shell=True)
-
-    cmd = ["npm", "run", "dev"]
-    # Update for Windows shell if needed
-    shell = True if platform.system() == "Windows" else False
-    
-    p = subprocess.Popen(cmd, cwd=NEXTJS_DIR, shell=shell)
-    processes.append(p)
-    return p
+    else:
+        log("Node.js/NPM detected. Launching Advanced UI...")
+        cmd = "npm run dev"
+        if not os.path.exists(os.path.join(NEXTJS_DIR, "node_modules")):
+            log("node_modules not found. Installing dependencies (this may take a while)...", "WARNING")
+            cmd = "npm install && npm run dev"
+        services.append(Service(
+            "Next.js Dashboard", cmd, cwd=NEXTJS_DIR, shell=True,
+            ready_url=f"http://localhost:{NEXTJS_PORT}", env={"NEXT_PUBLIC_API_URL": dashboard_api},
+        ))
+    return services
+
+
+def print_timeline(services):
+    print("\n[TIMELINE] Startup per service (seconds since launch):")
+    print(f"   {'SERVICE':<22} {'SPAWNED':>8} {'READY':>8} {'STARTUP':>8}")
+    for s in services:
+        spawned = f"{s.spawned_at:.2f}" if s.spawned_at is not None else "-"
+        ready = f"{s.ready_at:.2f}" if s.ready_at is not None else "FAILED"
+        startup = f"{s.ready_at - s.spawned_at:.2f}" if s.ready_at is not None and s.spawned_at is not None else "-"
+        print(f"   {s.name:<22} {spawned:>8} {ready:>8} {startup:>8}")
+
 
 def cleanup(signum, frame):
     log("\nShutting down all services...", "INFO")
-    for p in processes:
+    for p in processes.values():
+        if p.poll() is not None:
+            continue  # Already exited; its pid may belong to someone else by now
         try:
             if platform.system() == "Windows":
                  subprocess.call(['taskkill', '/F', '/T', '/PID', str(p.pid)])
             else:
-                p.terminate()
+                os.killpg(p.pid, signal.SIGTERM)
         except:
             pass
     sys.exit(0)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="ShieldGuard SOC integrated launcher")
+    parser.add_argument("--replicas", default="1",
+                        help="Number of API replicas behind a local load balancer ('auto' = one per CPU core)")
+    args = parser.parse_args()
+    args.replicas = (os.cpu_count() or 1) if args.replicas == "auto" else max(1, int(args.replicas))
+    return args
+
 def main():
+    args = parse_args()
     signal.signal(signal.SIGINT, cleanup)
     signal.signal(signal.SIGTERM, cleanup)
 
@@ -93,58 +268,56 @@ def main():
     print("   SHIELDGUARD SOC - INTEGRATED LAUNCHER")
     print("==================================================")
 
-    # 1. Start API (Critical)
-    api_proc = run_api()
-    time.sleep(3) # Give API time to startup
-
-    # 2. Start Streamlit (Always Fallback)
-    st_proc = run_streamlit()
-    
-    # 3. Try Next.js
-    npm_available = check_npm()
-    primary_url = f"http://localhost:{STREAMLIT_PORT}"
-    
-    if npm_available:
-        log("Node.js/NPM detected. Launching Advanced UI...")
-        next_proc = run_nextjs()
-        if next_proc:
-            primary_url = f"http://localhost:{NEXTJS_PORT}"
-            print(f"\n[SUCCESS] Services Running:")
-            print(f" > API: http://localhost:{API_PORT}")
-            print(f" > Streamlit (Fallback): http://localhost:{STREAMLIT_PORT}")
-            print(f" > Next.js (Primary): http://localhost:{NEXTJS_PORT}")
-        else:
-            print(f"\n[PARTIAL] API and Streamlit running. Next.js failed to start.")
-    else:
-        log("npm not found. Skipping Next.js.", "WARNING")
-        log("FALLBACK MODE ACTIVE: Using Streamlit Only.", "IMPORTANT")
-        print(f"\n[SUCCESS] Services Running (Fallback Mode):")
-        print(f" > API: http://localhost:{API_PORT}")
-        print(f" > Streamlit: http://localhost:{STREAMLIT_PORT}")
+    services = build_services(args.replicas)
+    by_name = {s.name: s for s in services}
+    nextjs = by_name.get("Next.js Dashboard")
+    primary = nextjs or by_name["Streamlit Dashboard"]
+    primary_url = f"http://localhost:{NEXTJS_PORT if nextjs else STREAMLIT_PORT}"
 
-    # 4. Start Simulator (Delayed to ensure API is ready)
-    log(f"Waiting {SIMULATOR_DELAY}s before starting traffic simulation...")
-    time.sleep(SIMULATOR_DELAY)
-    sim_proc = run_simulator()
+    browser_opened = False
+    timeline_printed = False
 
-    # 5. Auto Open Browser
-    print(f"\n[LAUNCH] Opening Default Dashboard: {primary_url}")
-    try:
-        webbrowser.open(primary_url)
-        # Also open fallback if primary is Next.js, just in case user wants both
-        if primary_url != f"http://localhost:{STREAMLIT_PORT}":
-             webbrowser.open(f"http://localhost:{STREAMLIT_PORT}")
-    except:
-        pass
-
-    # Keep alive
+    # Supervision loop: start dependents as soon as their dependencies are ready,
+    # restart crashed services with exponential backoff.
     try:
         while True:
-            time.sleep(1)
-            # Check if API died
-            if api_proc.poll() is not None:
-                log("API Process died! Exiting...", "ERROR")
-                cleanup(None, None)
+            for s in services:
+                if s.proc is None and all(by_name[d].ready.is_set() for d in s.depends_on):
+                    s.start()
+
+                code = s.poll_crash()
+                if code is not None:
+                    if s.critical and s.restarts >= MAX_RESTARTS:
+                        log(f"{s.name} crashed {s.restarts} times. Exiting...", "ERROR")
+                        cleanup(None, None)
+                    s.schedule_restart()
+                s.maybe_restart()
+
+            if not timeline_printed and all(s.settled() for s in services):
+                timeline_printed = True
+                print_timeline(services)
+                print(f"\n[SUCCESS] Services Running:")
+                print(f" > API: http://localhost:{API_PORT}"
+                      + (f" (load balancer, {args.replicas} replicas)" if args.replicas > 1 else ""))
+                if args.replicas > 1:
+                    print(f" > Dashboard API: http://localhost:{DASHBOARD_API_PORT} (replica 0)")
+                print(f" > Streamlit{' (Fallback)' if nextjs else ''}: http://localhost:{STREAMLIT_PORT}")
+                if nextjs:
+                    print(f" > Next.js (Primary): http://localhost:{NEXTJS_PORT}")
+
+            # Auto Open Browser as soon as the primary dashboard answers
+            if not browser_opened and primary.ready.is_set():
+                browser_opened = True
+                print(f"\n[LAUNCH] Opening Default Dashboard: {primary_url}")
+                try:
+                    webbrowser.open(primary_url)
+                    # Also open fallback if primary is Next.js, just in case user wants both
+                    if nextjs:
+                         webbrowser.open(f"http://localhost:{STREAMLIT_PORT}")
+                except:
+                    pass
+
+            time.sleep(0.05)
     except KeyboardInterrupt:
         cleanup(None, None)
 
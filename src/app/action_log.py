@@ -0,0 +1,174 @@
+import os
+import random
+import sqlite3
+import threading
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "actions.db")
+
+MAX_PAGE_SIZE = 200
+
+# Mock targets & templates for SOC mitigation simulation (moved from the dashboards)
+MOCK_IPS = ["192.168.1.105", "10.0.5.22", "203.114.12.5", "172.16.0.44", "45.33.22.11", "88.99.100.50", "12.34.56.78", "77.88.99.10"]
+MOCK_HASHES = ["e5d3...8a2f", "99a1...b2c3", "malware_win32.exe", "trojan_dropper.bat", "ransomware.dll", "keylogger_v2.exe", "backdoor.sh"]
+MOCK_USERS = ["admin_sys", "root", "user_service", "database_admin", "guest_wifi", "backup_operator", "web_service", "ftp_admin"]
+
+ACTIONS_TEMPLATE = {
+    "NETWORK": [
+        {"type": "BLOCK", "template": "Blocking source IP {target} via firewall rule #442"},
+        {"type": "THROTTLE", "template": "Applying QoS limit (10kbps) on flow from {target}"},
+        {"type": "BLOCK", "template": "Adding {target} to IP blacklist (24h TTL)"},
+        {"type": "THROTTLE", "template": "Rate limiting connections from {target} to 5/min"},
+        {"type": "BLOCK", "template": "Dropping all packets from {target} on port 443"},
+        {"type": "TRACE", "template": "Capturing packet dump for traffic from {target}"},
+    ],
+    "ENDPOINT": [
+        {"type": "QUARANTINE", "template": "Isolating file hash {target} to Sandbox"},
+        {"type": "TRACE", "template": "Tracing process origin for {target}"},
+        {"type": "QUARANTINE", "template": "Moving {target} to quarantine zone"},
+        {"type": "BLOCK", "template": "Killing process associated with {target}"},
+        {"type": "TRACE", "template": "Analyzing memory dump for {target}"},
+        {"type": "QUARANTINE", "template": "Preventing execution of {target} system-wide"},
+    ],
+    "IDENTITY": [
+        {"type": "LOCK", "template": "Locking account {target} due to repeated failures"},
+        {"type": "ISOLATE", "template": "Terminating active sessions for {target}"},
+    ]
+}
+CATEGORY_TARGETS = {"NETWORK": MOCK_IPS, "ENDPOINT": MOCK_HASHES, "IDENTITY": MOCK_USERS}
+
+
+def generate_actions(threat_type: str, now: Optional[datetime.datetime] = None,
+                     rng: random.Random = random) -> List[Dict[str, Any]]:
+    """Simulate SOC mitigation actions based on threat type (2-4 actions, oldest first)."""
+    now = now or datetime.datetime.now()
+    num_actions = rng.randint(2, 4)
+    actions = []
+
+    for i in range(num_actions):
+        # Rule: First action matches threat type strongly, the rest are random
+        if i == 0:
+            if threat_type == "DDoS":
+                category = "NETWORK"
+            elif threat_type == "Brute Force":
+                category = "IDENTITY"
+            else:
+                category = "ENDPOINT"
+        else:
+            category = rng.choice(list(ACTIONS_TEMPLATE))
+
+        target = rng.choice(CATEGORY_TARGETS[category])
+        template_obj = rng.choice(ACTIONS_TEMPLATE[category])
+        actions.append({
+            "time": now + datetime.timedelta(milliseconds=i * 100),
+            "category": category,
+            "type": template_obj["type"],
+            "threat_source": threat_type,
+            "target": target,
+            "details": template_obj["template"].replace("{target}", target),
+            "status": "EXECUTED",
+        })
+    return actions
+
+
+class ActionLog:
+    """
+    Append-only mitigation action log backed by SQLite.
+    Rows are never updated or deleted; pages are read newest first with a
+    keyset cursor (id < cursor), so a page costs the same however large
+    the log grows and older pages never change.
+    """
+
+    COLUMNS = ("id", "time", "category", "type", "threat_source", "target", "details", "status", "prediction_seq")
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                time TEXT NOT NULL,
+                category TEXT NOT NULL,
+                type TEXT NOT NULL,
+                threat_source TEXT,
+                target TEXT,
+                details TEXT,
+                status TEXT,
+                prediction_seq INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_actions_category ON actions (category, id);
+            CREATE INDEX IF NOT EXISTS idx_actions_type ON actions (type, id);
+            CREATE INDEX IF NOT EXISTS idx_actions_ts ON actions (ts);
+        """)
+
+    def append(self, actions: List[Dict[str, Any]], prediction_seq: Optional[int] = None):
+        rows = [(
+            a["time"].timestamp(), a["time"].isoformat(), a["category"], a["type"],
+            a.get("threat_source"), a.get("target"), a.get("details"), a.get("status", "EXECUTED"),
+            prediction_seq,
+        ) for a in actions]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO actions (ts, time, category, type, threat_source, target, details, status, prediction_seq) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def record_threat(self, threat_type: str, prediction_seq: Optional[int] = None):
+        """Generates and appends the simulated mitigation actions for one threat prediction."""
+        self.append(generate_actions(threat_type), prediction_seq)
+
+    def query(self, category: Optional[str] = None, action_type: Optional[str] = None,
+              start: Optional[float] = None, end: Optional[float] = None,
+              cursor: Optional[int] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Returns (items newest first, next_cursor). `start`/`end` are epoch seconds."""
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if action_type:
+            clauses.append("type = ?")
+            params.append(action_type)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {', '.join(self.COLUMNS)} FROM actions {where} ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        items = [dict(zip(self.COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return items, next_cursor
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Singleton Pattern (same as get_model_loader)
+_action_log = None
+
+
+def get_action_log() -> ActionLog:
+    global _action_log
+    if _action_log is None:
+        _action_log = ActionLog(os.getenv("IDS_ACTION_LOG_PATH", DEFAULT_DB_PATH))
+    return _action_log
@@ -0,0 +1,156 @@
+import os
+import heapq
+import asyncio
+import itertools
+from typing import Dict, Any
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# Concurrent inferences (threadpool slots) and bounded wait queue per API process
+# (IDS_MAX_QUEUE=0: no queue, requests above the concurrency limit get 429 right away)
+MAX_CONCURRENCY = int(os.getenv("IDS_MAX_CONCURRENCY", str(os.cpu_count() or 4)))
+MAX_QUEUE = int(os.getenv("IDS_MAX_QUEUE", "256"))
+# A queued request waiting longer than this is shed, so latency stays bounded
+MAX_QUEUE_WAIT = float(os.getenv("IDS_MAX_QUEUE_WAIT", "0.5"))
+RETRY_AFTER_SECONDS = 1
+
+# Cheap suspicion score: packets/s plus a bonus per SYN/RST flag.
+# Flows scoring above SUSPICIOUS_SCORE are counted as "suspicious" in the stats.
+SYN_WEIGHT = 5000.0
+SUSPICIOUS_SCORE = float(os.getenv("IDS_SUSPICIOUS_SCORE", "10000"))
+
+
+class Shed(Exception):
+    """Raised when a request is dropped by admission control (maps to 429)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class PriorityScorer:
+    """Scores a decoded feature vector without touching the model."""
+
+    def __init__(self, feature_names):
+        names = list(feature_names)
+        self.pps_idx = names.index("Flow Pkts/s") if "Flow Pkts/s" in names else None
+        self.flag_idx = [names.index(n) for n in ("SYN Flag Cnt", "RST Flag Cnt") if n in names]
+
+    def score(self, features: np.ndarray) -> float:
+        score = float(features[self.pps_idx]) if self.pps_idx is not None else 0.0
+        for i in self.flag_idx:
+            score += SYN_WEIGHT * float(features[i])
+        return score
+
+    def score_batch(self, matrix: np.ndarray) -> np.ndarray:
+        """score() of every row of a (n, features) matrix."""
+        scores = matrix[:, self.pps_idx].copy() if self.pps_idx is not None else np.zeros(len(matrix))
+        if self.flag_idx:
+            scores += SYN_WEIGHT * matrix[:, self.flag_idx].sum(axis=1)
+        return scores
+
+
+class AdmissionController:
+    """
+    Bounded priority admission for /predict (runs on the event loop, no locks).
+
+    At most `max_concurrency` requests run inference at once. The rest wait
+    in a heap ordered by suspicion score, so likely attacks jump ahead of
+    benign-looking flows. When the queue is full the lowest-scored request
+    (queued or incoming) is shed; a request waiting longer than `max_wait`
+    is shed as well.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE,
+                 max_wait: float = MAX_QUEUE_WAIT):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._heap = []  # (-score, order, future)
+        self._order = itertools.count()
+
+        self.admitted = 0
+        self.admitted_suspicious = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "evicted": 0, "timeout": 0}
+        self.peak_queue = 0
+
+    async def acquire(self, score: float):
+        suspicious = score >= SUSPICIOUS_SCORE
+        if self.in_flight < self.max_concurrency and not self._heap:
+            self._admit(suspicious)
+            return
+
+        if len(self._heap) >= self.max_queue:
+            if not self._heap:  # max_queue <= 0: nothing waits, everything above max_concurrency is shed
+                self.shed["queue_full"] += 1
+                raise Shed("queue_full")
+            lowest = max(self._heap)  # Largest -score = least suspicious waiter
+            if -lowest[0] >= score:
+                self.shed["queue_full"] += 1
+                raise Shed("queue_full")
+            self._heap.remove(lowest)
+            heapq.heapify(self._heap)
+            lowest[2].set_exception(Shed("evicted"))
+            self.shed["evicted"] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (-score, next(self._order), future)
+        heapq.heappush(self._heap, entry)
+        self.peak_queue = max(self.peak_queue, len(self._heap))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._drop(entry)
+                self.shed["timeout"] += 1
+                raise Shed("timeout")
+            future.result()  # Decided right at the deadline: granted, or raises Shed
+        except asyncio.CancelledError:
+            # Client went away while queued: never leak a granted slot
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            elif not future.done():
+                self._drop(entry)
+            raise
+        if suspicious:
+            self.admitted_suspicious += 1
+
+    def _drop(self, entry):
+        self._heap.remove(entry)
+        heapq.heapify(self._heap)
+        entry[2].cancel()
+
+    def _admit(self, suspicious: bool):
+        self.in_flight += 1
+        self.admitted += 1
+        if suspicious:
+            self.admitted_suspicious += 1
+
+    def release(self):
+        """Frees a slot and hands it to the most suspicious waiter."""
+        self.in_flight -= 1
+        while self._heap and self.in_flight < self.max_concurrency:
+            _, _, future = heapq.heappop(self._heap)
+            if future.done():
+                continue
+            self.in_flight += 1
+            self.admitted += 1
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queued": len(self._heap),
+            "max_queue": self.max_queue,
+            "queue_occupancy": round(len(self._heap) / self.max_queue, 3) if self.max_queue else 0.0,
+            "peak_queue": self.peak_queue,
+            "admitted": self.admitted,
+            "admitted_suspicious": self.admitted_suspicious,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+        }
@@ -1,22 +1,79 @@
-from fastapi import FastAPI, HTTPException
+import time
+IMPORT_STARTED = time.perf_counter()  # Start of the import phase of the startup report
+
+from fastapi import FastAPI, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from collections import deque
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional
 import uvicorn
 import datetime
+import threading
 import sys
 import os
 
 # Import modules
 try:
-    from app.model_loader import get_model_loader
-    from app.type_definitions import NetworkTrafficData
+    from app.model_registry import get_model_registry
+    from app.type_definitions import (
+        NetworkTrafficData, DisplayReports, FeedbackReport, FEATURE_NAMES, FeatureDecodeError, FastJSONResponse, decode_flow
+    )
+    from app.action_log import get_action_log
+    from app.prediction_store import get_prediction_store, REPLICA_ID
+    from app.admission import AdmissionController, PriorityScorer, Shed, RETRY_AFTER_SECONDS
+    from app.drift_monitor import init_drift_monitor, REFERENCE_FILE
+    from app.explainer import init_explainer
+    from app.incidents import get_incident_aggregator
+    from app.timeseries import init_timeseries, METHODS as TIMESERIES_METHODS, DEFAULT_POINTS, MAX_POINTS
+    from app.rollup_store import init_rollup_store
+    from app.history_export import stream_export, FORMATS as EXPORT_FORMATS
+    from app.startup_report import StartupReport, IMPORT_PROFILE, profile_imports
+    from app.uds_ingest import UdsIngestServer, UDS_PATH
+    from app.tracing import get_tracer, parse_emitted, TRACE_HEADER, EMITTED_HEADER
+    from app.feedback import get_feedback_store, get_feature_cache
+    from app.retrain_job import RetrainJob, RETRAIN_EVERY
+    from app import profiling
 except ImportError:
     try:
-        from src.app.model_loader import get_model_loader
-        from src.app.type_definitions import NetworkTrafficData
+        from src.app.model_registry import get_model_registry
+        from src.app.type_definitions import (
+            NetworkTrafficData, DisplayReports, FeedbackReport, FEATURE_NAMES, FeatureDecodeError, FastJSONResponse, decode_flow
+        )
+        from src.app.action_log import get_action_log
+        from src.app.prediction_store import get_prediction_store, REPLICA_ID
+        from src.app.admission import AdmissionController, PriorityScorer, Shed, RETRY_AFTER_SECONDS
+        from src.app.drift_monitor import init_drift_monitor, REFERENCE_FILE
+        from src.app.explainer import init_explainer
+        from src.app.incidents import get_incident_aggregator
+        from src.app.timeseries import init_timeseries, METHODS as TIMESERIES_METHODS, DEFAULT_POINTS, MAX_POINTS
+        from src.app.rollup_store import init_rollup_store
+        from src.app.history_export import stream_export, FORMATS as EXPORT_FORMATS
+        from src.app.startup_report import StartupReport, IMPORT_PROFILE, profile_imports
+        from src.app.uds_ingest import UdsIngestServer, UDS_PATH
+        from src.app.tracing import get_tracer, parse_emitted, TRACE_HEADER, EMITTED_HEADER
+        from src.app.feedback import get_feedback_store, get_feature_cache
+        from src.app.retrain_job import RetrainJob, RETRAIN_EVERY
+        from src.app import profiling
     except ImportError:
-        from model_loader import get_model_loader
-        from type_definitions import NetworkTrafficData
+        from model_registry import get_model_registry
+        from type_definitions import (
+            NetworkTrafficData, DisplayReports, FeedbackReport, FEATURE_NAMES, FeatureDecodeError, FastJSONResponse, decode_flow
+        )
+        from action_log import get_action_log
+        from prediction_store import get_prediction_store, REPLICA_ID
+        from admission import AdmissionController, PriorityScorer, Shed, RETRY_AFTER_SECONDS
+        from drift_monitor import init_drift_monitor, REFERENCE_FILE
+        from explainer import init_explainer
+        from incidents import get_incident_aggregator
+        from timeseries import init_timeseries, METHODS as TIMESERIES_METHODS, DEFAULT_POINTS, MAX_POINTS
+        from rollup_store import init_rollup_store
+        from history_export import stream_export, FORMATS as EXPORT_FORMATS
+        from startup_report import StartupReport, IMPORT_PROFILE, profile_imports
+        from uds_ingest import UdsIngestServer, UDS_PATH
+        from tracing import get_tracer, parse_emitted, TRACE_HEADER, EMITTED_HEADER
+        from feedback import get_feedback_store, get_feature_cache
+        from retrain_job import RetrainJob, RETRAIN_EVERY
+        import profiling
 
 app = FastAPI(
     title="IDS XGBoost API",
@@ -32,19 +89,115 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand profiling hooks (off by default, see profiling.py)
+if profiling.PROFILING_ENABLED:
+    if profiling.ADMIN_TOKEN:
+        app.include_router(profiling.router)
+    else:
+        print("[API] WARNING: IDS_ENABLE_PROFILING=1 without IDS_ADMIN_TOKEN: /admin/profile not mounted (SIGUSR1 only)")
+    profiling.install_signal_handler()
+
 # Global State
-model_loader = None
+model_registry = None
+model_loader = None  # Default model (pinned in the registry)
+action_log = None
+drift_monitor = None
+explainer = None
+timeseries = None
+rollup_store = None  # Long-horizon trends on disk (minute/hour/day), see /trends
+uds_server = None
 HISTORY_LEN = 100
-prediction_history = deque(maxlen=HISTORY_LEN)
+# Every stored prediction gets a monotonically increasing `seq`, so pollers
+# can fetch incrementally with /history?since=<last seq>. With
+# IDS_PREDICTION_STORE=sqlite all API replicas share one history.
+prediction_store = get_prediction_store(HISTORY_LEN)
+
+# Bounded admission: suspicious flows (high Flow Pkts/s, SYN/RST) jump the
+# queue, the least suspicious ones are shed with 429 when it is full.
+admission = AdmissionController()
+priority_scorer = PriorityScorer(FEATURE_NAMES)
+
+# Repeated threat predictions (same class + flow signature + source) within
+# IDS_INCIDENT_WINDOW seconds are folded into one incident, see /incidents.
+incidents = get_incident_aggregator(FEATURE_NAMES)
+
+# Per-hop latency from producer to dashboard (X-Trace-Id / X-Emitted-At headers), see /traces
+tracer = get_tracer()
+
+# Analyst feedback: labels + the flow's raw features (kept by seq in a bounded
+# ring), used by the background retraining process, see /feedback and /retrain
+feature_cache = get_feature_cache(FEATURE_NAMES)
+feedback_store = get_feedback_store()
+
+# Strict decoding (default) only accepts JSON numbers under the exact feature
+# aliases. IDS_DECODE_MODE=lax also accepts field names and numeric strings.
+STRICT_DECODE = os.getenv("IDS_DECODE_MODE", "strict").lower() != "lax"
+
+# /predict reads the raw body, so the request schema is published manually
+PREDICT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": NetworkTrafficData.model_json_schema(by_alias=True)}},
+    }
+}
+
+# Cold-start phases of this process, printed once at startup and served on /startup
+startup_report = StartupReport()
+startup_report.add("imports", time.perf_counter() - IMPORT_STARTED)
 
 @app.on_event("startup")
 async def startup_event():
-    global model_loader
+    global model_registry, model_loader, action_log, drift_monitor, explainer, timeseries, rollup_store, uds_server
+    with startup_report.phase("action_log"):
+        action_log = get_action_log()
     try:
-        model_loader = get_model_loader()
-        print("[API] Model loaded on startup.")
+        with startup_report.phase("model_load"):
+            model_registry = get_model_registry(FEATURE_NAMES)
+            model_loader = model_registry.default()
+            prediction_store.set_class_info(model_loader.class_map, model_loader.threat_info)
+        print(f"[API] Model {model_loader.registry_key} loaded on startup.")
+        # Promotions made by another replica (registry default pointer) are picked up here too
+        model_registry.watch_promotions(swap_default_model)
+        if list(model_loader.feature_names) != list(FEATURE_NAMES):
+            print("[API] WARNING: Scaler feature order differs from feature_list.txt. Regenerate it with inspect_models.py.")
+        with startup_report.phase("monitors"):
+            drift_monitor = init_drift_monitor(
+                model_loader.scaler, model_loader.feature_names, FEATURE_NAMES,
+                reference_path=os.path.join(os.path.dirname(model_loader.scaler_path), REFERENCE_FILE))
+            explainer = init_explainer(model_loader)
+            timeseries = init_timeseries([model_loader.class_map[i] for i in sorted(model_loader.class_map)])
+            rollup_store = init_rollup_store(timeseries)  # Persists the minute buckets of `timeseries`
     except Exception as e:
         print(f"[API] CRITICAL ERROR: Could not load model. {e}")
+    if UDS_PATH and model_loader is not None:
+        with startup_report.phase("uds_ingest"):
+            uds_server = UdsIngestServer(UDS_PATH, len(FEATURE_NAMES), ingest_batch)
+            await uds_server.start()
+    startup_report.ready()
+    startup_report.print()
+    if IMPORT_PROFILE:
+        threading.Thread(target=run_import_profile, name="import-profile", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if uds_server is not None:
+        await uds_server.close()
+    if rollup_store is not None:
+        rollup_store.close()  # Flushes the unflushed minute buckets
+    if model_registry is not None:
+        model_registry.close()
+
+def run_import_profile():
+    """Per-module import profile of this API module, measured in a child interpreter."""
+    # Directory from which `__name__` is importable (project root for src.app.api)
+    root = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(__name__.count(".")):
+        root = os.path.dirname(root)
+    try:
+        startup_report.import_profile = profile_imports(__name__, cwd=root)
+        print(f"[STARTUP] Import profile: {startup_report.import_profile['top_packages_ms']}")
+    except Exception as e:
+        print(f"[STARTUP] Import profile failed: {e}")
 
 @app.get("/")
 def read_root():
@@ -53,35 +206,361 @@ def read_root():
 @app.get("/health")
 def health_check():
     if model_loader and model_loader.is_loaded:
-        return {"status": "healthy", "model_loaded": True}
-    return {"status": "unhealthy", "model_loaded": False}
+        return {"status": "healthy", "model_loaded": True, "model": model_loader.registry_key, "replica": REPLICA_ID}
+    return {"status": "unhealthy", "model_loaded": False, "replica": REPLICA_ID}
 
-@app.post("/predict")
-def predict_traffic(custom_input: NetworkTrafficData):
+@app.post("/predict", response_class=FastJSONResponse, openapi_extra=PREDICT_OPENAPI)
+async def predict_traffic(request: Request, model: Optional[str] = None, version: Optional[str] = None):
+    """Default model unless `model` (name or name@version) / `version` pick one from the registry."""
     global model_loader
+    marks = {"received": time.time()}
+    emitted = parse_emitted(request.headers.get(EMITTED_HEADER))
+    if emitted is not None:
+        marks["emitted"] = emitted
     if not model_loader or not model_loader.is_loaded:
         raise HTTPException(status_code=503, detail="Model service not ready")
+    entry = None
+    if model or version:
+        try:
+            entry = model_registry.resolve(model or model_loader.registry_key.split("@")[0], version)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=e.args[0])
+
+    # Decode JSON straight into a float vector
+    try:
+        features, source = decode_flow(await request.body(), strict=STRICT_DECODE)
+    except FeatureDecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
     try:
-        # Pydantic conversion
-        features = custom_input.to_array()
-        
-        # Predict
-        result = model_loader.predict(features)
-        
-        # Add timestamp and store in history
-        result['timestamp'] = datetime.datetime.now().isoformat()
-        prediction_history.append(result)
-        
-        return result
+        await admission.acquire(priority_scorer.score(features))
+    except Shed as e:
+        raise HTTPException(status_code=429, detail=f"Overloaded ({e.reason}), retry later",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    marks["admitted"] = time.time()
+
+    try:
+        # Predict + store (off the event loop)
+        return await run_in_threadpool(predict_and_store, features, source, entry,
+                                       marks, request.headers.get(TRACE_HEADER))
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission.release()
+
+async def ingest_batch(matrix):
+    """One UDS frame: admitted as a single request at the score of its most suspicious flow."""
+    marks = {"received": time.time()}
+    await admission.acquire(float(priority_scorer.score_batch(matrix).max()))
+    marks["admitted"] = time.time()
+    try:
+        return await run_in_threadpool(predict_batch_and_store, matrix, marks)
+    finally:
+        admission.release()
+
+def predict_and_store(features, source=None, entry=None, marks=None, trace_id=None):
+    # Non-default models load on first use (and may be evicted again, see model_registry.py)
+    loader = model_registry.get(entry.name, entry.version) if entry is not None else model_loader
+    marks = {} if marks is None else marks
+    marks["inference_start"] = time.time()
+    result = loader.predict(features)
+    marks["inference_end"] = time.time()
+    result = record_prediction(loader, result, features, source, trace_id, marks.get("emitted"))
+    marks["stored"] = time.time()
+    tracer.record(marks, result['seq'], trace_id)
+    return result
+
+def predict_batch_and_store(matrix, marks=None):
+    """Default model, one scaler/model call for the whole batch, then the usual per-flow bookkeeping."""
+    loader = model_loader
+    marks = {} if marks is None else marks
+    marks["inference_start"] = time.time()
+    results = loader.predict_batch(matrix)
+    marks["inference_end"] = time.time()
+    results = [record_prediction(loader, result, features) for result, features in zip(results, matrix)]
+    marks["stored"] = time.time()
+    tracer.record(marks)  # One sample per frame
+    return results
+
+def record_prediction(loader, result, features, source=None, trace_id=None, emitted=None):
+    result['model'] = loader.registry_key
+    if trace_id is not None:
+        result['trace'] = {"id": trace_id, "emitted": emitted}
+    is_default = loader is model_loader
+    if drift_monitor is not None and is_default:
+        drift_monitor.update(features)
+    if timeseries is not None:
+        timeseries.add(result['confidence'], result['prediction_class'])
+    if result['prediction_class'] != 'Benign':
+        result['incident_id'] = incidents.add(result, features, source)
+        if source is not None:
+            result['source'] = source
+
+    # Add timestamp/seq and store in history
+    prediction_store.append(result, features)
+    feature_cache.put(result['seq'], features, result['prediction_id'])
+
+    # Threats (and a sample of benign flows) are explained in background batches
+    if explainer is not None and is_default:
+        explainer.submit(result['seq'], features, result['prediction_id'], result['prediction_class'])
+
+    # Simulated mitigation actions are generated once, server-side
+    if result['prediction_class'] != 'Benign':
+        action_log.record_threat(result['prediction_class'], result['seq'])
+    return result
+
+@app.get("/history", response_class=FastJSONResponse)
+def get_history(response: Response, since: Optional[int] = None,
+                view: str = Query("recent", pattern="^(recent|retained)$")):
+    """
+    Returns stored predictions (oldest first). `since` returns only entries with seq > since.
+    view=retained adds the per-class samples of older predictions: {items, sampling}, each
+    item tagged `retention` = recent | sampled. The X-Last-Seq header carries the newest
+    stored seq, so pollers notice a restarted API (seq below their `since`).
+    """
+    response.headers["X-Last-Seq"] = str(prediction_store.latest_seq())
+    if view == "retained":
+        return prediction_store.retained(since)
+    return prediction_store.history(since)
+
+@app.get("/history/export")
+def export_history(start: Optional[datetime.datetime] = None,
+                   end: Optional[datetime.datetime] = None,
+                   format: str = Query("arrow", pattern="^(arrow|parquet)$")):
+    """
+    Streams stored predictions with start <= timestamp < end as an Arrow IPC
+    stream (default) or a zstd Parquet file, one bounded record batch at a time.
+    """
+    body = stream_export(prediction_store, format,
+                         start.timestamp() if start else None, end.timestamp() if end else None)
+    filename = f"predictions.{'arrows' if format == 'arrow' else 'parquet'}"
+    return StreamingResponse(body, media_type=EXPORT_FORMATS[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/models", response_class=FastJSONResponse)
+def get_models():
+    """Registered models and versions, which of them are loaded and the registry's memory use."""
+    return {"registry": model_registry.status(), "models": model_registry.list()}
+
+@app.post("/models/scan", response_class=FastJSONResponse)
+def scan_models():
+    """Re-reads the registry directory (after publishing a new version)."""
+    model_registry.scan()
+    return {"models": model_registry.list()}
+
+@app.get("/startup", response_class=FastJSONResponse)
+def get_startup_report():
+    """Cold-start phase timings of this process (IDS_IMPORT_PROFILE=1 adds a per-module import profile)."""
+    return startup_report.as_dict()
+
+@app.get("/timeseries", response_class=FastJSONResponse)
+def get_timeseries(window: float = Query(300, gt=0, description="Seconds before `end` (ignored if `start` is given)"),
+                   start: Optional[datetime.datetime] = None,
+                   end: Optional[datetime.datetime] = None,
+                   points: int = Query(DEFAULT_POINTS, ge=2, le=MAX_POINTS),
+                   method: str = Query("minmax", pattern=f"^({'|'.join(TIMESERIES_METHODS)})$")):
+    """
+    Confidence (mean/min/max) and per-class rates over a time range, downsampled
+    server-side to at most `points` points (columnar arrays, `t` in epoch ms).
+    Ranges older than the in-memory rollups (24 h) are read from the rollup store.
+    """
+    if timeseries is None:
+        raise HTTPException(status_code=503, detail="Model service not ready")
+    end_ts = end.timestamp() if end else time.time()
+    start_ts = start.timestamp() if start else end_ts - window
+    return timeseries.series(start_ts, end_ts, points, method)
+
+@app.get("/trends", response_class=FastJSONResponse)
+def get_trends(window: float = Query(7 * 86400, gt=0, description="Seconds before `end` (ignored if `start` is given)"),
+               start: Optional[datetime.datetime] = None,
+               end: Optional[datetime.datetime] = None,
+               points: int = Query(DEFAULT_POINTS, ge=2, le=MAX_POINTS),
+               step: Optional[float] = Query(None, gt=0, description="Wanted granularity in seconds")):
+    """
+    Long-horizon class mix, threat rate and confidence distribution from the
+    on-disk rollups, read at the coarsest level (minute/hour/day) no wider
+    than `step` (default: range / points).
+    """
+    if rollup_store is None:
+        return {"enabled": False}
+    end_ts = end.timestamp() if end else time.time()
+    start_ts = start.timestamp() if start else end_ts - window
+    return rollup_store.query(start_ts, end_ts, points, step)
+
+@app.get("/trends/status", response_class=FastJSONResponse)
+def get_trends_status():
+    """Rows, retention and watermark per rollup level, plus the file size."""
+    if rollup_store is None:
+        return {"enabled": False}
+    return rollup_store.status()
+
+@app.get("/traces/summary", response_class=FastJSONResponse)
+def get_trace_summary():
+    """Per-hop latency percentiles (network, queue, dispatch, inference, store, poll, render, end_to_end)."""
+    return tracer.summary()
+
+@app.post("/traces/display", response_class=FastJSONResponse)
+def report_display(reports: DisplayReports):
+    """Dashboards report when they received and rendered traced predictions (by seq)."""
+    return {"matched": tracer.record_display([r.model_dump() for r in reports.items], reports.client)}
+
+@app.get("/traces/{trace_id}", response_class=FastJSONResponse)
+def get_trace(trace_id: str):
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace")
+    return trace
+
+def swap_default_model(loader):
+    global model_loader
+    if explainer is not None:
+        explainer.set_model(loader)
+    model_loader = loader  # One reference swap: in-flight requests finish on the old model
+    print(f"[API] Default model swapped to {loader.registry_key}")
+
+def promote_model(key):
+    """Makes `key` the default once a retraining run published it (runs on the watcher thread)."""
+    swap_default_model(model_registry.promote(key))
+
+retrain_job = RetrainJob(on_published=promote_model)
+
+def retrain_args():
+    return (model_loader.registry_key, model_registry.root, model_registry.legacy_dir,
+            feedback_store.db_path, feedback_store.stats()["last_id"])
+
+@app.post("/feedback", response_class=FastJSONResponse)
+def submit_feedback(report: FeedbackReport):
+    """
+    Records an analyst-corrected label for a stored prediction (`seq`, while
+    its features are still in the feature cache or the shared sqlite history)
+    or for explicit `features`.
+    """
+    if not model_loader or not model_loader.is_loaded:
+        raise HTTPException(status_code=503, detail="Model service not ready")
+    label_ids = {name: i for i, name in model_loader.class_map.items()}
+    if report.label not in label_ids:
+        raise HTTPException(status_code=422, detail=f"Unknown label '{report.label}' (have: {list(label_ids)})")
+
+    predicted = None
+    if report.features is not None:
+        features = report.features.to_array()
+    elif report.seq is not None:
+        cached = feature_cache.get(report.seq)
+        if cached is None:  # Predicted by another replica (or evicted from this one's cache)
+            cached = prediction_store.features(report.seq)
+        if cached is None:
+            raise HTTPException(status_code=404, detail="Features of this prediction are no longer cached; "
+                                                        "send them as `features`")
+        features, predicted_id = cached
+        predicted = model_loader.class_map.get(predicted_id)
+    else:
+        raise HTTPException(status_code=422, detail="Give `seq` or `features`")
+
+    feedback_id = feedback_store.add(report.label, label_ids[report.label], features, seq=report.seq,
+                                     predicted=predicted, model=model_loader.registry_key,
+                                     analyst=report.analyst, note=report.note)
+    stats = feedback_store.stats()
+    if RETRAIN_EVERY and stats["last_id"] - retrain_job.last_feedback_id >= RETRAIN_EVERY:
+        # No-op while a run is in progress on any replica, or if another replica's run already covered these rows
+        retrain_job.try_start(*retrain_args(), min_new_feedback=RETRAIN_EVERY)
+    return {"id": feedback_id, "seq": report.seq, "label": report.label, "predicted": predicted, "feedback": stats}
+
+@app.get("/feedback", response_class=FastJSONResponse)
+def get_feedback_stats():
+    return {"feedback": feedback_store.stats(), "retrain": retrain_job.status()}
+
+@app.post("/retrain", response_class=FastJSONResponse)
+def trigger_retrain():
+    """Starts a background retraining run on the feedback so far (separate, resource-limited process)."""
+    if not model_loader or not model_loader.is_loaded:
+        raise HTTPException(status_code=503, detail="Model service not ready")
+    if feedback_store.stats()["total"] == 0:
+        raise HTTPException(status_code=400, detail="No feedback recorded yet")
+    try:
+        return {"started": retrain_job.start(*retrain_args())}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/retrain", response_class=FastJSONResponse)
+def get_retrain_status():
+    return retrain_job.status()
+
+@app.get("/stats", response_class=FastJSONResponse)
+def get_stats(window: Optional[float] = Query(None, gt=0)):
+    """
+    Prediction store counters plus per-class counts, rates and mean confidence
+    over the stored predictions, or only their last `window` seconds (global
+    across replicas with the sqlite store).
+    """
+    return {**prediction_store.stats(), "aggregate": prediction_store.aggregate(window)}
+
+@app.get("/admission", response_class=FastJSONResponse)
+async def get_admission_stats():
+    """Admission queue occupancy and shed counters for this API process."""
+    return admission.stats()
+
+@app.get("/ingest", response_class=FastJSONResponse)
+async def get_ingest_stats():
+    """Unix domain socket ingestion counters (IDS_UDS_PATH)."""
+    if uds_server is None:
+        return {"enabled": False}
+    return {"enabled": True, **uds_server.status()}
+
+@app.get("/drift", response_class=FastJSONResponse)
+def get_drift(top: int = Query(10, ge=1, le=len(FEATURE_NAMES))):
+    """Live feature drift vs. the scaler's training statistics (PSI / binned KS per feature, rolling window)."""
+    if drift_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **drift_monitor.report(top)}
+
+@app.get("/explanations", response_class=FastJSONResponse)
+def get_explanations(since: Optional[int] = None, limit: int = Query(100, ge=1, le=1000)):
+    """Top-k feature contributions for recent flagged predictions (IDS_EXPLAIN=1)."""
+    if explainer is None:
+        return {"enabled": False, "items": []}
+    return {"enabled": True, "status": explainer.status(), "items": explainer.recent(since, limit)}
+
+@app.get("/explanations/{seq}", response_class=FastJSONResponse)
+def get_explanation(seq: int):
+    if explainer is None:
+        raise HTTPException(status_code=404, detail="Explanations are disabled (set IDS_EXPLAIN=1)")
+    explanation = explainer.get(seq)
+    if explanation is None:
+        raise HTTPException(status_code=404, detail="No explanation for this prediction (benign, pending or expired)")
+    return explanation
+
+@app.get("/incidents", response_class=FastJSONResponse)
+def get_incidents(since: Optional[int] = None, active: bool = False, limit: int = Query(100, ge=1, le=1000)):
+    """
+    Threat incidents (most recently updated first). Pass the returned
+    `version` as `since` to get only incidents that changed since then.
+    Incidents are per replica: an `incident_id` of a /history row names an
+    incident of the replica in that row's `replica` (sqlite store).
+    """
+    return {**incidents.query(since=since, active_only=active, limit=limit), "replica": REPLICA_ID}
 
-@app.get("/history")
-def get_history():
-    return list(prediction_history)
+@app.get("/actions", response_class=FastJSONResponse)
+def get_actions(category: Optional[str] = None,
+                action_type: Optional[str] = Query(None, alias="type"),
+                start: Optional[datetime.datetime] = None,
+                end: Optional[datetime.datetime] = None,
+                cursor: Optional[int] = None,
+                limit: int = Query(50, ge=1, le=200)):
+    """
+    Paginated SOC mitigation action log (newest first).
+    Pass the returned `next_cursor` as `cursor` to get the next (older) page.
+    """
+    items, next_cursor = action_log.query(
+        category=category.upper() if category else None,
+        action_type=action_type.upper() if action_type else None,
+        start=start.timestamp() if start else None,
+        end=end.timestamp() if end else None,
+        cursor=cursor,
+        limit=limit,
+    )
+    return {"items": items, "next_cursor": next_cursor}
 
 if __name__ == "__main__":
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,249 @@
+import os
+import json
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+DRIFT_ENABLED = os.getenv("IDS_DRIFT_MONITOR", "1") == "1"
+BATCH_SIZE = int(os.getenv("IDS_DRIFT_BATCH", "256"))          # Flows per vectorized update
+WINDOW_BATCHES = int(os.getenv("IDS_DRIFT_WINDOW_BATCHES", "20"))  # Rolling window = BATCH_SIZE * WINDOW_BATCHES flows
+
+# Flow features are heavy-tailed and zero-inflated, so bins are the training
+# data's own quantiles (in z-space), written by train.py next to the scaler.
+# Without that file the first BASELINE_FLOWS live flows become the reference.
+REFERENCE_FILE = "drift_reference.json"
+N_BINS = 10
+REFERENCE_MAX_ROWS = 200_000
+BASELINE_FLOWS = int(os.getenv("IDS_DRIFT_BASELINE", "5000"))
+
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+EPS = 1e-6
+# Discrete features (Protocol, flag counts) sit exactly on their quantile edges; training
+# z-values are float32, so edges are compared with a relative tolerance to keep ties stable.
+EDGE_TOL = 1e-5
+
+
+def build_reference(z: np.ndarray, feature_names: Sequence[str], n_bins: int = N_BINS,
+                    max_rows: int = REFERENCE_MAX_ROWS, source: str = "training") -> Dict[str, Any]:
+    """
+    Per-feature quantile bin edges of scaled rows `z` and the share of rows in
+    each bin. Tied quantiles (e.g. a feature that is 0 for 60% of flows) are
+    merged, so a feature can have fewer than `n_bins` bins.
+    """
+    if len(z) > max_rows:  # Sample before the float64 copy: z can be the whole training split
+        z = z[np.sort(np.random.default_rng(0).choice(len(z), max_rows, replace=False))]
+    z = np.asarray(z, dtype=np.float64)
+    z = z[np.isfinite(z).all(axis=1)]
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    edges, expected = [], []
+    for column in z.T:
+        cuts = np.unique(np.quantile(column, quantiles))
+        counts = np.bincount(np.searchsorted(cuts, column, side="right"), minlength=len(cuts) + 1)
+        edges.append(cuts.tolist())
+        expected.append((counts / len(column)).tolist())
+    return {"feature_names": list(feature_names), "rows": int(len(z)), "source": source,
+            "edges": edges, "expected": expected}
+
+
+def save_reference(reference: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(reference, f)
+
+
+def load_reference(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class DriftMonitor:
+    """
+    Streaming drift monitor against the training data.
+
+    update() only copies the flow vector into a preallocated batch buffer.
+    Every BATCH_SIZE flows the whole buffer is reduced at once: the batch
+    mean and M2 (for a Welford/Chan merge against the scaler's mean_/var_)
+    and per-feature counts in the reference quantile bins. The last
+    WINDOW_BATCHES batch summaries form the rolling window. PSI and a
+    binned KS distance per feature are computed only when report() is called.
+    """
+
+    def __init__(self, mean: np.ndarray, var: np.ndarray, feature_names: List[str],
+                 reference: Optional[Dict[str, Any]] = None, input_names: Optional[Sequence[str]] = None,
+                 batch_size: int = BATCH_SIZE, window_batches: int = WINDOW_BATCHES,
+                 baseline_flows: int = BASELINE_FLOWS):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.var = np.asarray(var, dtype=np.float64)
+        self.scale = np.sqrt(np.where(self.var > 0, self.var, 1.0))
+        # Flows arrive in API order (feature_list.txt); same reordering as ModelLoader.set_input_order
+        self._input_idx = None
+        if input_names is not None and list(input_names) != self.feature_names:
+            input_names = list(input_names)
+            self._input_idx = np.array([input_names.index(f) for f in self.feature_names])
+
+        self.batch_size = batch_size
+        self._buffer = np.empty((batch_size, self.n_features), dtype=np.float64)
+        self._fill = 0
+        self._window = deque(maxlen=window_batches)  # (n, mean, M2, bin counts)
+        self._lock = threading.Lock()
+        self.total_seen = 0
+        self.skipped_nonfinite = 0
+
+        self.reference_source = None
+        self._edges = self._expected = None
+        self._baseline = None
+        if reference is not None:
+            self._set_reference(reference)
+        else:
+            self._baseline = np.empty((baseline_flows, self.n_features), dtype=np.float64)
+            self._baseline_fill = 0
+
+    @classmethod
+    def from_scaler(cls, scaler, feature_names: List[str], **kwargs) -> "DriftMonitor":
+        return cls(scaler.mean_, scaler.var_, feature_names, **kwargs)
+
+    def _set_reference(self, reference: Dict[str, Any]):
+        """Pads the per-feature edges/frequencies into (features, N_BINS) matrices (edges with +inf)."""
+        index = {name: i for i, name in enumerate(reference["feature_names"])}
+        missing = [f for f in self.feature_names if f not in index]
+        if missing:
+            raise ValueError(f"Drift reference lacks features: {missing[:5]}")
+        width = max(len(reference["edges"][index[f]]) for f in self.feature_names) + 1
+        self._edges = np.full((self.n_features, width - 1), np.inf)
+        self._expected = np.zeros((self.n_features, width))
+        for i, name in enumerate(self.feature_names):
+            edges, expected = reference["edges"][index[name]], reference["expected"][index[name]]
+            self._edges[i, :len(edges)] = np.asarray(edges) - EDGE_TOL * (1 + np.abs(edges))
+            self._expected[i, :len(expected)] = expected
+        self.reference_source = reference.get("source", "training")
+
+    def update(self, features: np.ndarray):
+        """Adds one flow (raw, unscaled feature vector in API order). Rows with NaN/inf are skipped."""
+        if self._input_idx is not None:
+            features = np.asarray(features)[self._input_idx]
+        if not np.isfinite(features).all():
+            self.skipped_nonfinite += 1
+            return
+        with self._lock:
+            self.total_seen += 1
+            if self._baseline is not None:
+                self._add_baseline(features)
+                return
+            self._buffer[self._fill] = features
+            self._fill += 1
+            if self._fill == self.batch_size:
+                self._window.append(self._summarize(self._buffer))
+                self._fill = 0
+
+    def _add_baseline(self, features: np.ndarray):
+        self._baseline[self._baseline_fill] = features
+        self._baseline_fill += 1
+        if self._baseline_fill == len(self._baseline):
+            z = (self._baseline - self.mean) / self.scale
+            self._set_reference(build_reference(z, self.feature_names, source="baseline_window"))
+            self._baseline = None
+            print(f"[INFO] Drift reference built from the first {self._baseline_fill} live flows.")
+
+    def _summarize(self, batch: np.ndarray):
+        n = len(batch)
+        batch_mean = batch.mean(axis=0)
+        m2 = ((batch - batch_mean) ** 2).sum(axis=0)
+        z = (batch - self.mean) / self.scale
+        bins = (z[:, :, None] >= self._edges[None]).sum(axis=2)  # searchsorted(side="right") per feature
+        width = self._expected.shape[1]
+        counts = np.bincount((bins + np.arange(self.n_features) * width).ravel(),
+                             minlength=self.n_features * width).reshape(self.n_features, width)
+        return n, batch_mean, m2, counts
+
+    def _merged(self):
+        """Chan/Welford merge of the window summaries (+ the partial batch)."""
+        with self._lock:
+            parts = list(self._window)
+            if self._fill:
+                parts.append(self._summarize(self._buffer[:self._fill]))
+        if not parts:
+            return None
+
+        n, mean, m2, counts = parts[0]
+        mean, m2, counts = mean.copy(), m2.copy(), counts.copy()
+        for n_b, mean_b, m2_b, counts_b in parts[1:]:
+            total = n + n_b
+            delta = mean_b - mean
+            mean += delta * (n_b / total)
+            m2 += m2_b + delta ** 2 * (n * n_b / total)
+            counts += counts_b
+            n = total
+        return n, mean, m2, counts
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        base = {"total_seen": self.total_seen, "skipped_nonfinite": self.skipped_nonfinite,
+                "reference": self.reference_source}
+        with self._lock:
+            calibrating = self._baseline is not None
+            baseline_fill = self._baseline_fill if calibrating else None
+        if calibrating:
+            return {**base, "status": "calibrating", "window_flows": 0,
+                    "baseline_flows": baseline_fill, "baseline_target": len(self._baseline), "features": []}
+        merged = self._merged()
+        if merged is None:
+            return {**base, "window_flows": 0, "features": []}
+
+        n, mean, m2, counts = merged
+        live_var = m2 / max(n - 1, 1)
+        observed = counts / n
+        # Bins absent from the reference (padding) are empty on both sides and add 0
+        actual = np.maximum(observed, EPS)
+        expected = np.maximum(self._expected, EPS)
+        psi = ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+        ks = np.abs(np.cumsum(observed, axis=1) - np.cumsum(self._expected, axis=1)).max(axis=1)
+        mean_shift = (mean - self.mean) / self.scale  # In training standard deviations
+        var_ratio = live_var / np.where(self.var > 0, self.var, 1.0)
+
+        order = np.argsort(psi)[::-1][:top]
+        features = [{
+            "feature": self.feature_names[i],
+            "psi": round(float(psi[i]), 4),
+            "ks": round(float(ks[i]), 4),
+            "mean_shift_sd": round(float(mean_shift[i]), 3),
+            "var_ratio": round(float(var_ratio[i]), 3),
+        } for i in order]
+
+        max_psi = float(psi.max())
+        return {
+            **base,
+            "window_flows": int(n),
+            "max_psi": round(max_psi, 4),
+            "status": "major" if max_psi >= PSI_MAJOR else "moderate" if max_psi >= PSI_MODERATE else "stable",
+            "features_moderate": int((psi >= PSI_MODERATE).sum()),
+            "features_major": int((psi >= PSI_MAJOR).sum()),
+            "features": features,
+        }
+
+
+# Singleton, built at API startup once the scaler is loaded
+_monitor: Optional[DriftMonitor] = None
+
+
+def init_drift_monitor(scaler, feature_names: List[str], input_names: Optional[Sequence[str]] = None,
+                       reference_path: Optional[str] = None) -> Optional[DriftMonitor]:
+    """`reference_path`: drift_reference.json of the model (next to its scaler), if there is one."""
+    global _monitor
+    if DRIFT_ENABLED and hasattr(scaler, "mean_") and hasattr(scaler, "var_"):
+        reference = load_reference(reference_path)
+        if reference is None:
+            print(f"[INFO] No {REFERENCE_FILE} for this model; drift reference = first {BASELINE_FLOWS} live flows.")
+        _monitor = DriftMonitor.from_scaler(scaler, feature_names, reference=reference, input_names=input_names)
+    return _monitor
+
+
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    return _monitor
@@ -1,35 +1,29 @@
+import os
 import time
 import json
+import uuid
 import random
 import requests
 import numpy as np
 from itertools import cycle
 
+try:
+    from uds_ingest import UdsClient, IngestError
+except ImportError:
+    from src.app.uds_ingest import UdsClient, IngestError
+
 # ==============================================================================
 # KONFIGURASI
 # ==============================================================================
 API_URL = "http://localhost:8000/predict" 
 INTERVAL = 2  # Detik
+# Jika IDS_UDS_PATH di-set, flow dikirim lewat Unix domain socket API (lihat uds_ingest.py), bukan HTTP
+UDS_PATH = os.getenv("IDS_UDS_PATH", "")
 
-# Daftar 69 Fitur (Sesuai Scaler)
-FEATURE_COLS = [
-    'Protocol', 'Flow Duration', 'Tot Fwd Pkts', 'Tot Bwd Pkts',
-    'TotLen Fwd Pkts', 'TotLen Bwd Pkts', 'Fwd Pkt Len Max', 'Fwd Pkt Len Min',
-    'Fwd Pkt Len Mean', 'Fwd Pkt Len Std', 'Bwd Pkt Len Max', 'Bwd Pkt Len Min',
-    'Bwd Pkt Len Mean', 'Bwd Pkt Len Std', 'Flow Byts/s', 'Flow Pkts/s',
-    'Flow IAT Mean', 'Flow IAT Std', 'Flow IAT Max', 'Flow IAT Min',
-    'Fwd IAT Tot', 'Fwd IAT Mean', 'Fwd IAT Std', 'Fwd IAT Max', 'Fwd IAT Min',
-    'Bwd IAT Tot', 'Bwd IAT Mean', 'Bwd IAT Std', 'Bwd IAT Max', 'Bwd IAT Min',
-    'Fwd PSH Flags', 'Fwd URG Flags', 'Fwd Header Len', 'Bwd Header Len',
-    'Fwd Pkts/s', 'Bwd Pkts/s', 'Pkt Len Min', 'Pkt Len Max', 'Pkt Len Mean',
-    'Pkt Len Std', 'Pkt Len Var', 'FIN Flag Cnt', 'SYN Flag Cnt', 'RST Flag Cnt',
-    'PSH Flag Cnt', 'ACK Flag Cnt', 'URG Flag Cnt', 'CWE Flag Count',
-    'ECE Flag Cnt', 'Down/Up Ratio', 'Pkt Size Avg', 'Fwd Seg Size Avg',
-    'Bwd Seg Size Avg', 'Subflow Fwd Pkts', 'Subflow Fwd Byts', 'Subflow Bwd Pkts',
-    'Subflow Bwd Byts', 'Init Fwd Win Byts', 'Init Bwd Win Byts',
-    'Fwd Act Data Pkts', 'Fwd Seg Size Min', 'Active Mean', 'Active Std',
-    'Active Max', 'Active Min', 'Idle Mean', 'Idle Std', 'Idle Max', 'Idle Min'
-]
+# Daftar 69 Fitur (Sesuai Scaler) - dibaca dari feature_list.txt agar urutan tidak drift
+FEATURE_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "feature_list.txt")
+with open(FEATURE_LIST_PATH, "r") as f:
+    FEATURE_COLS = [line.strip() for line in f if line.strip()]
 
 # ==============================================================================
 # FUNGSI GENERATOR DATA (Raw Data - No Scaler)
@@ -146,12 +140,44 @@ def generate_sample(attack_type):
     ordered_data = {k: data.get(k, 0) for k in FEATURE_COLS}
     return ordered_data
 
+# ==============================================================================
+# PENGIRIMAN (HTTP / UDS)
+# ==============================================================================
+def send_http(payload):
+    try:
+        # Trace context: the API and dashboards stamp each hop, see /traces/summary
+        headers = {"X-Trace-Id": uuid.uuid4().hex[:16], "X-Emitted-At": f"{time.time():.6f}"}
+        response = requests.post(API_URL, json=payload, headers=headers, timeout=2)
+        status_code = response.status_code
+        if status_code == 200:
+            server_msg = response.json()
+            pred_class = server_msg.get('prediction_class')
+            conf = server_msg.get('confidence')
+            return f"[{status_code}] OK -> {pred_class} ({conf:.2f}) trace {headers['X-Trace-Id']}"
+        return f"[{status_code}] Error"
+    except requests.exceptions.RequestException:
+        return "[FAILED CONNECTION]"
+
+_uds_client = None
+
+def send_uds(payload):
+    """Satu flow sebagai frame biner (69 float32); koneksi dipakai ulang antar flow."""
+    global _uds_client
+    try:
+        if _uds_client is None:
+            _uds_client = UdsClient(UDS_PATH, timeout=2)
+        record = _uds_client.predict([payload[k] for k in FEATURE_COLS])[0]
+        return f"[UDS] OK -> class {record['prediction_id']} ({record['confidence']:.2f}), seq {record['seq']}"
+    except (OSError, IngestError) as e:
+        _uds_client = None
+        return f"[UDS FAILED] {e}"
+
 # ==============================================================================
 # MAIN LOOP SIMULASI
 # ==============================================================================
 if __name__ == "__main__":
     print(f"[*] Traffic Simulator Started...")
-    print(f"[*] Target API: {API_URL}")
+    print(f"[*] Target API: {'unix:' + UDS_PATH if UDS_PATH else API_URL}")
     print(f"[*] Interval: {INTERVAL} seconds")
     print("="*60)
 
@@ -168,20 +194,7 @@ if __name__ == "__main__":
             
             # 3. Kirim ke API Endpoint
             try:
-                try:
-                    response = requests.post(API_URL, json=payload, timeout=2)
-                    status_code = response.status_code
-                    if status_code == 200:
-                        server_msg = response.json()
-                        pred_class = server_msg.get('prediction_class')
-                        conf = server_msg.get('confidence')
-                        status_str = f"[{status_code}] OK -> {pred_class} ({conf:.2f})"
-                    else:
-                        status_str = f"[{status_code}] Error"
-                        server_msg = response.text
-                except requests.exceptions.RequestException:
-                    status_str = "[FAILED CONNECTION]"
-                    server_msg = "Server Not Reachable"
+                status_str = send_uds(payload) if UDS_PATH else send_http(payload)
 
                 # 4. Logging di Terminal
                 print(f"\n[OUTGOING] Type: {current_attack.upper()}")
@@ -0,0 +1,201 @@
+import os
+import queue
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# Explanations are OFF by default (IDS_EXPLAIN=1 to enable)
+EXPLAIN_ENABLED = os.getenv("IDS_EXPLAIN", "0") == "1"
+TOP_K = int(os.getenv("IDS_EXPLAIN_TOP_K", "5"))
+# Threats are always explained; benign flows only with this probability
+BENIGN_SAMPLE_RATE = float(os.getenv("IDS_EXPLAIN_BENIGN_RATE", "0.01"))
+
+MAX_BATCH = 256          # Flows per pred_contribs call
+QUEUE_SIZE = 2048        # Pending flows; beyond this explanations are dropped, never inference
+CACHE_SIZE = 4096        # Explanations cached per signature
+RESULTS_SIZE = 1000      # Recent explanations kept for /explanations
+SIGNATURE_STEP = 0.1     # Flows within 0.1 training SD on every feature share a signature
+
+
+class ExplainedModel(NamedTuple):
+    """What the explainer needs from a ModelLoader, swapped as one reference."""
+    booster: Any
+    mean: np.ndarray
+    scale: np.ndarray
+    feature_names: List[str]         # Scaler / model order
+    to_model_order: Callable         # Request order -> model order (ModelLoader.to_model_order)
+
+
+def explained_model(loader, xgb) -> Optional[ExplainedModel]:
+    """The loader's model as an ExplainedModel, or None if it is not an XGBoost model."""
+    model = loader.model
+    if isinstance(model, xgb.Booster):
+        booster = model
+    elif isinstance(model, xgb.XGBModel):
+        booster = model.get_booster()
+    else:
+        return None
+    return ExplainedModel(booster, np.asarray(loader.scaler.mean_, dtype=np.float32),
+                          np.asarray(loader.scaler.scale_, dtype=np.float32),
+                          list(loader.feature_names), loader.to_model_order)
+
+
+class Explainer:
+    """
+    Batched per-prediction explanations from XGBoost's native tree
+    contributions (pred_contribs, i.e. TreeSHAP).
+
+    submit() is cheap and never blocks the prediction: it either answers
+    from the signature cache or queues the raw flow. A background thread
+    drains the queue, scales the whole batch at once and runs one
+    pred_contribs call per batch, keeping the top-k features (by absolute
+    contribution to the predicted class) per flow.
+    """
+
+    def __init__(self, loader, top_k: int = TOP_K, benign_sample_rate: float = BENIGN_SAMPLE_RATE):
+        import xgboost as xgb  # Already loaded with the model
+
+        self._xgb = xgb
+        self.top_k = top_k
+        self.benign_sample_rate = benign_sample_rate
+
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._cache = OrderedDict()    # signature -> [(feature index, contribution)]
+        self._results = OrderedDict()  # seq -> explanation
+        self._lock = threading.Lock()
+        self.stats = {"explained": 0, "cache_hits": 0, "batches": 0, "dropped": 0, "skipped_benign": 0,
+                      "unsupported": 0}
+        self._model = None
+        self.set_model(loader)
+        self._thread = threading.Thread(target=self._run, name="explainer", daemon=True)
+        self._thread.start()
+
+    def signature(self, x: np.ndarray, class_idx: int, model: ExplainedModel) -> bytes:
+        z = np.round((x - model.mean) / (model.scale * SIGNATURE_STEP))
+        return bytes([class_idx]) + z.astype(np.int64).tobytes()
+
+    def submit(self, seq: int, features: np.ndarray, class_idx: int, class_name: str) -> bool:
+        """
+        Queues one prediction (features in request order, as given to the
+        model loader) for explanation. Returns False if it was skipped or dropped.
+        """
+        model = self._model
+        if model is None:
+            self.stats["unsupported"] += 1
+            return False
+        if class_name == "Benign" and random.random() >= self.benign_sample_rate:
+            self.stats["skipped_benign"] += 1
+            return False
+
+        x = model.to_model_order(np.asarray(features, dtype=np.float32))
+        sig = self.signature(x, class_idx, model)
+        with self._lock:
+            top = self._cache.get(sig)
+            if top is not None:
+                self._cache.move_to_end(sig)
+                self.stats["cache_hits"] += 1
+                self._store(seq, class_name, top, x, model, cached=True)
+                return True
+        try:
+            self._queue.put_nowait((seq, x, class_idx, class_name, sig, model))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            model = self._model
+            batch = [item for item in batch if item[5] is model]  # Queued before a model swap: dropped
+            if not batch:
+                continue
+            try:
+                self._explain_batch(batch, model)
+            except Exception as e:
+                print(f"[EXPLAIN] Batch of {len(batch)} failed: {e}")
+
+    def _explain_batch(self, batch, model: ExplainedModel):
+        X = np.stack([item[1] for item in batch])
+        X -= model.mean
+        X /= model.scale
+        contribs = model.booster.predict(self._xgb.DMatrix(X), pred_contribs=True)
+        if contribs.ndim == 2:  # Binary model: (n, features + bias)
+            contribs = contribs[:, None, :]
+
+        with self._lock:
+            self.stats["batches"] += 1
+            for row, (seq, x, class_idx, class_name, sig, _) in enumerate(batch):
+                c = contribs[row, min(class_idx, contribs.shape[1] - 1), :-1]  # Drop the bias column
+                top = [(int(i), round(float(c[i]), 4)) for i in np.argsort(np.abs(c))[::-1][:self.top_k]]
+                self._cache[sig] = top
+                if len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+                self._store(seq, class_name, top, x, model, cached=False)
+
+    def _store(self, seq, class_name, top, x, model, cached):
+        top_features = [{"feature": model.feature_names[i], "value": float(x[i]), "contribution": contribution}
+                        for i, contribution in top]
+        self._results[seq] = {"seq": seq, "prediction_class": class_name, "top_features": top_features,
+                              "cached": cached}
+        if len(self._results) > RESULTS_SIZE:
+            self._results.popitem(last=False)
+        self.stats["explained"] += 1
+
+    def set_model(self, loader):
+        """
+        Explains with the loader's model (e.g. after retraining); cached
+        contributions are dropped. Models without TreeSHAP contributions
+        (not XGBoost) are skipped until an XGBoost model is served again.
+        """
+        model = explained_model(loader, self._xgb)
+        if model is None:
+            print(f"[EXPLAIN] {type(loader.model).__name__} has no tree contributions: explanations paused")
+        with self._lock:
+            self._model = model
+            self._cache.clear()
+
+    def get(self, seq: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._results.get(seq)
+
+    def recent(self, since: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest explanations (oldest first), only seq > since if given."""
+        with self._lock:
+            items = [e for e in reversed(self._results.values()) if since is None or e["seq"] > since]
+        return items[:limit][::-1]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "queued": self._queue.qsize(), "cached_signatures": len(self._cache),
+                    "top_k": self.top_k, "benign_sample_rate": self.benign_sample_rate}
+
+
+# Singleton, built at API startup once the model is loaded
+_explainer: Optional[Explainer] = None
+
+
+def init_explainer(model_loader) -> Optional[Explainer]:
+    global _explainer
+    if EXPLAIN_ENABLED and _explainer is None:
+        try:
+            import xgboost as xgb
+        except ImportError:
+            print("[EXPLAIN] xgboost is not installed: explanations disabled")
+            return None
+        if explained_model(model_loader, xgb) is None:
+            print(f"[EXPLAIN] Default model {model_loader.registry_key} is not XGBoost: explanations disabled")
+            return None
+        _explainer = Explainer(model_loader)
+    return _explainer
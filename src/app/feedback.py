@@ -0,0 +1,127 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_FEEDBACK_PATH = os.path.join(PROJECT_ROOT, "data", "feedback.db")
+FEEDBACK_PATH = os.getenv("IDS_FEEDBACK_PATH", DEFAULT_FEEDBACK_PATH)
+
+# Raw feature vectors of the latest predictions, so analysts can label a flow by seq
+FEATURE_CACHE_SIZE = int(os.getenv("IDS_FEATURE_CACHE", "20000"))
+
+
+class FeatureCache:
+    """
+    Ring of the last `capacity` feature vectors (float32, API feature order)
+    and predicted class ids, looked up by seq.
+    """
+
+    def __init__(self, n_features: int, capacity: int = FEATURE_CACHE_SIZE):
+        self.capacity = capacity
+        self._features = np.zeros((capacity, n_features), dtype=np.float32)
+        self._predicted = np.zeros(capacity, dtype=np.int16)
+        self._seqs = np.full(capacity, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def put(self, seq: int, features: np.ndarray, prediction_id: int):
+        slot = seq % self.capacity
+        with self._lock:
+            self._features[slot] = features
+            self._predicted[slot] = prediction_id
+            self._seqs[slot] = seq
+
+    def get(self, seq: int) -> Optional[Tuple[np.ndarray, int]]:
+        """(features, predicted class id), or None once the slot has been reused."""
+        slot = seq % self.capacity
+        with self._lock:
+            if self._seqs[slot] != seq:
+                return None
+            return self._features[slot].copy(), int(self._predicted[slot])
+
+
+class FeedbackStore:
+    """
+    Analyst-corrected labels with the raw feature vector of the flow
+    (append-only SQLite, WAL). The retraining job (src/models_dev/retrain.py)
+    reads it from its own process.
+    """
+
+    def __init__(self, db_path: str = FEEDBACK_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                seq INTEGER,
+                label TEXT NOT NULL,
+                label_id INTEGER NOT NULL,
+                predicted TEXT,
+                model TEXT,
+                analyst TEXT,
+                note TEXT,
+                features BLOB NOT NULL
+            )
+        """)
+
+    def add(self, label: str, label_id: int, features: np.ndarray, seq: Optional[int] = None,
+            predicted: Optional[str] = None, model: Optional[str] = None,
+            analyst: Optional[str] = None, note: Optional[str] = None) -> int:
+        blob = np.ascontiguousarray(features, dtype="<f4").tobytes()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO feedback (ts, seq, label, label_id, predicted, model, analyst, note, features) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), seq, label, label_id, predicted, model, analyst, note, blob))
+            return cur.lastrowid
+
+    def load(self, max_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(ids, features (n, n_features) float32, label ids) of every feedback row up to max_id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, label_id, features FROM feedback WHERE id <= ? ORDER BY id",
+                (max_id if max_id is not None else 2**62,)).fetchall()
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        labels = np.array([r[1] for r in rows], dtype=np.int64)
+        features = np.stack([np.frombuffer(r[2], dtype="<f4") for r in rows])
+        return ids, features, labels
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total, last_id = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM feedback").fetchone()
+            by_label = dict(self._conn.execute("SELECT label, COUNT(*) FROM feedback GROUP BY label").fetchall())
+            corrected = self._conn.execute(
+                "SELECT COUNT(*) FROM feedback WHERE predicted IS NOT NULL AND predicted != label").fetchone()[0]
+        return {"total": total, "last_id": last_id, "by_label": by_label, "corrections": corrected}
+
+
+# Singletons
+_store: Optional[FeedbackStore] = None
+_cache: Optional[FeatureCache] = None
+
+
+def get_feedback_store() -> FeedbackStore:
+    global _store
+    if _store is None:
+        _store = FeedbackStore()
+    return _store
+
+
+def get_feature_cache(feature_names: Sequence[str]) -> FeatureCache:
+    global _cache
+    if _cache is None:
+        _cache = FeatureCache(len(feature_names))
+    return _cache
@@ -0,0 +1,102 @@
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# pyarrow is only imported on the first export, not at API startup
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+PARQUET_COMPRESSION = "zstd"
+
+
+@lru_cache(maxsize=None)
+def arrow_schema():
+    """Same order as prediction_store.EXPORT_COLUMNS (ts becomes a UTC timestamp)."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("seq", pa.int64()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("replica", pa.dictionary(pa.int8(), pa.string())),
+        ("prediction_class", pa.dictionary(pa.int8(), pa.string())),
+        ("prediction_id", pa.int8()),
+        ("confidence", pa.float32()),
+        ("incident_id", pa.int64()),
+        ("source", pa.string()),
+    ])
+
+
+def to_record_batch(rows: List[Tuple]):
+    """One store batch (rows of EXPORT_COLUMNS) -> Arrow RecordBatch, column by column."""
+    import pyarrow as pa
+
+    schema = arrow_schema()
+    seq, ts, replica, cls, class_id, confidence, incident_id, source = zip(*rows)
+    micros = (np.asarray(ts, dtype=np.float64) * 1e6).astype(np.int64)
+    return pa.record_batch([
+        pa.array(seq, pa.int64()),
+        pa.array(micros, pa.int64()).cast(schema.field("timestamp").type),
+        pa.array(replica, pa.string()).dictionary_encode().cast(schema.field("replica").type),
+        pa.array(cls, pa.string()).dictionary_encode().cast(schema.field("prediction_class").type),
+        pa.array(class_id, pa.int8()),
+        pa.array(confidence, pa.float32()),
+        pa.array(incident_id, pa.int64()),
+        pa.array(source, pa.string()),
+    ], schema=schema)
+
+
+class _ChunkSink:
+    """Write-only file object whose written bytes are drained after every batch."""
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_export(store, fmt: str = "arrow", start: Optional[float] = None,
+                  end: Optional[float] = None) -> Iterator[bytes]:
+    """
+    Streams the predictions with start <= ts < end as an Arrow IPC stream or
+    a zstd Parquet file. Each store batch becomes one record batch (Parquet:
+    one row group) that is encoded and yielded before the next one is read.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, arrow_schema(), compression=PARQUET_COMPRESSION)
+    else:
+        writer = pa.ipc.new_stream(sink, arrow_schema())
+
+    for rows in store.export_batches(start, end):
+        writer.write_batch(to_record_batch(rows))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
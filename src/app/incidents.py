@@ -0,0 +1,150 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# A flow joins an open incident with the same (class, signature, source) if it
+# arrives within WINDOW_SECONDS of that incident's last flow.
+WINDOW_SECONDS = float(os.getenv("IDS_INCIDENT_WINDOW", "60"))
+CLOSED_SIZE = int(os.getenv("IDS_INCIDENT_HISTORY", "500"))  # Closed incidents kept for /incidents
+
+# Coarse flow signature: protocol, order of magnitude of these features and the set flags
+MAGNITUDE_FEATURES = {"Flow Duration": "dur", "Tot Fwd Pkts": "fwd", "Flow Pkts/s": "pps"}
+FLAG_FEATURES = {"SYN Flag Cnt": "SYN", "RST Flag Cnt": "RST", "FIN Flag Cnt": "FIN", "PSH Flag Cnt": "PSH"}
+
+
+class IncidentAggregator:
+    """
+    Collapses repeated threat predictions into windowed incidents.
+
+    Open incidents live in an OrderedDict keyed by (class, signature, source)
+    and ordered by last_seen, so add() is O(1): update the counters, move the
+    key to the end, and expire stale incidents from the front. Each change
+    bumps a global `version`, so pollers can fetch only what changed with
+    /incidents?since=<version>.
+    """
+
+    def __init__(self, feature_names: Sequence[str], window_seconds: float = WINDOW_SECONDS,
+                 closed_size: int = CLOSED_SIZE):
+        names = list(feature_names)
+        self._protocol_idx = names.index("Protocol") if "Protocol" in names else None
+        self._magnitude = [(names.index(f), tag) for f, tag in MAGNITUDE_FEATURES.items() if f in names]
+        self._flags = [(names.index(f), tag) for f, tag in FLAG_FEATURES.items() if f in names]
+        self.window_seconds = window_seconds
+
+        self._open = OrderedDict()            # key -> incident (oldest last_seen first)
+        self._closed = deque(maxlen=closed_size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.version = 0
+        self.flows = 0
+
+    def signature(self, features: np.ndarray) -> str:
+        """'proto=6 dur~1e5 fwd~1e1 pps~1e3 flags=SYN' (one bucket per order of magnitude)."""
+        parts = []
+        if self._protocol_idx is not None:
+            protocol = features[self._protocol_idx]
+            parts.append(f"proto={int(protocol) if math.isfinite(protocol) else 'nan'}")
+        for idx, tag in self._magnitude:
+            value = features[idx]
+            # Non-finite values (e.g. Flow Pkts/s of a zero-duration flow) get their own bucket
+            parts.append(f"{tag}~1e{int(math.log10(abs(value) + 1))}" if math.isfinite(value) else f"{tag}~{value}")
+        flags = [tag for idx, tag in self._flags if features[idx] > 0]
+        if flags:
+            parts.append("flags=" + ",".join(flags))
+        return " ".join(parts)
+
+    def add(self, result: Dict[str, Any], features: np.ndarray, source: Optional[str] = None,
+            now: Optional[float] = None) -> int:
+        """Adds one threat prediction. Returns the id of the incident it was folded into."""
+        now = time.time() if now is None else now
+        key = (result["prediction_class"], self.signature(features), source)
+        confidence = result["confidence"]
+
+        with self._lock:
+            self._expire(now)
+            self.flows += 1
+            self.version += 1
+            incident = self._open.get(key)
+            if incident is None:
+                incident = {
+                    "id": self._next_id,
+                    "prediction_class": key[0],
+                    "signature": key[1],
+                    "source": source,
+                    "threat_type": result.get("threat_type"),
+                    "response_mode": result.get("response_mode"),
+                    "mitigation_actions": result.get("mitigation_actions", []),
+                    "count": 0,
+                    "first_seen": now,
+                    "confidence_min": confidence,
+                    "confidence_max": confidence,
+                    "confidence_sum": confidence,
+                }
+                self._next_id += 1
+                self._open[key] = incident
+            else:
+                self._open.move_to_end(key)
+                incident["confidence_min"] = min(incident["confidence_min"], confidence)
+                incident["confidence_max"] = max(incident["confidence_max"], confidence)
+                incident["confidence_sum"] += confidence
+            incident["count"] += 1
+            incident["last_seen"] = now
+            incident["version"] = self.version
+            return incident["id"]
+
+    def _expire(self, now: float):
+        while self._open:
+            key, incident = next(iter(self._open.items()))
+            if now - incident["last_seen"] <= self.window_seconds:
+                break
+            del self._open[key]
+            self.version += 1
+            incident["version"] = self.version
+            self._closed.append(incident)
+
+    def _view(self, incident: Dict[str, Any], active: bool) -> Dict[str, Any]:
+        view = {k: v for k, v in incident.items() if k != "confidence_sum"}
+        view["confidence_mean"] = incident["confidence_sum"] / incident["count"]
+        view["duration_seconds"] = incident["last_seen"] - incident["first_seen"]
+        view["status"] = "active" if active else "closed"
+        return view
+
+    def query(self, since: Optional[int] = None, active_only: bool = False,
+              limit: int = 100) -> Dict[str, Any]:
+        """
+        Incidents changed after version `since` (all if None), most recently
+        updated first. Returns the current `version` to pass back as `since`.
+        """
+        with self._lock:
+            self._expire(time.time())
+            groups = [(reversed(self._open.values()), True)]
+            if not active_only:
+                groups.append((reversed(self._closed), False))
+            items = []
+            for incidents, active in groups:
+                for incident in incidents:
+                    if since is not None and incident["version"] <= since:
+                        continue
+                    items.append(self._view(incident, active))
+            items.sort(key=lambda i: i["version"], reverse=True)
+            return {"version": self.version, "active": len(self._open), "flows": self.flows,
+                    "window_seconds": self.window_seconds, "items": items[:limit]}
+
+
+# Singleton
+_aggregator: Optional[IncidentAggregator] = None
+
+
+def get_incident_aggregator(feature_names: Sequence[str]) -> IncidentAggregator:
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = IncidentAggregator(feature_names)
+    return _aggregator
@@ -0,0 +1,123 @@
+"""
+Lightweight local TCP load balancer for API replicas (least-connections).
+
+Each client connection is pinned to one replica for its whole lifetime, so a
+keep-alive client (simulator, dashboard poller, sensor) keeps flow affinity
+while new connections go to the replica with the fewest open connections.
+Replicas that refuse connections are skipped for a short cooldown.
+
+With --primary-port, a second listener sends every connection to the first
+reachable backend in --backends order (the others only on failover). The
+dashboards use it: incidents, time series and traces are per replica, so a
+dashboard must keep reading them from one replica.
+
+Usage:
+    python src/app/load_balancer.py --port 8000 --backends 8001,8002,8003 --primary-port 8099
+"""
+import argparse
+import asyncio
+import time
+
+BACKEND_HOST = "127.0.0.1"
+BACKEND_COOLDOWN = 2.0   # Seconds a refused backend is skipped
+BUFFER_SIZE = 64 * 1024
+
+
+class Backend:
+    def __init__(self, port: int):
+        self.port = port
+        self.active = 0
+        self.total = 0
+        self.down_until = 0.0
+
+
+class LeastConnectionsBalancer:
+    def __init__(self, backend_ports):
+        self.backends = [Backend(p) for p in backend_ports]
+
+    def candidates(self):
+        """Healthy backends ordered by open connections (all of them if every one is cooling down)."""
+        now = time.monotonic()
+        healthy = [b for b in self.backends if b.down_until <= now] or self.backends
+        return sorted(healthy, key=lambda b: (b.active, b.total))
+
+    def primary_candidates(self):
+        """Backends in configured order, cooling-down ones last (the first one unless it is down)."""
+        now = time.monotonic()
+        return sorted(self.backends, key=lambda b: b.down_until > now)
+
+    async def handle(self, client_reader, client_writer):
+        await self.proxy(self.candidates(), client_reader, client_writer)
+
+    async def handle_primary(self, client_reader, client_writer):
+        await self.proxy(self.primary_candidates(), client_reader, client_writer)
+
+    async def proxy(self, candidates, client_reader, client_writer):
+        for backend in candidates:
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection(BACKEND_HOST, backend.port)
+            except OSError:
+                backend.down_until = time.monotonic() + BACKEND_COOLDOWN
+                print(f"[LB] Backend :{backend.port} unreachable, skipping for {BACKEND_COOLDOWN}s")
+                continue
+            break
+        else:
+            client_writer.close()
+            return
+
+        backend.active += 1
+        backend.total += 1
+        try:
+            await asyncio.gather(
+                pipe(client_reader, upstream_writer),
+                pipe(upstream_reader, client_writer),
+            )
+        finally:
+            backend.active -= 1
+
+
+async def pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(BUFFER_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+async def serve(port: int, backend_ports, primary_port=None):
+    balancer = LeastConnectionsBalancer(backend_ports)
+    server = await asyncio.start_server(balancer.handle, "0.0.0.0", port, reuse_address=True)
+    print(f"[LB] Listening on :{port} -> {', '.join(f':{p}' for p in backend_ports)} (least-connections)")
+    servers = [server]
+    if primary_port:
+        servers.append(await asyncio.start_server(balancer.handle_primary, "0.0.0.0", primary_port,
+                                                  reuse_address=True))
+        print(f"[LB] Listening on :{primary_port} -> :{backend_ports[0]} (primary, failover in order)")
+    await asyncio.gather(*(s.serve_forever() for s in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local least-connections load balancer for API replicas")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--backends", required=True, help="Comma separated replica ports, e.g. 8001,8002")
+    parser.add_argument("--primary-port", type=int, default=None,
+                        help="Also listen here and always use the first reachable backend (dashboards)")
+    args = parser.parse_args()
+    backend_ports = [int(p) for p in args.backends.split(",") if p]
+    try:
+        asyncio.run(serve(args.port, backend_ports, args.primary_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
-import joblib
-import pandas as pd
 import numpy as np
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
+
+# Paths relative to project root (src/app -> src/models_dev/models)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models_dev", "models")
+DEFAULT_MODEL_PATH = os.path.join(MODELS_DIR, "xgboost.joblib")
+DEFAULT_SCALER_PATH = os.path.join(MODELS_DIR, "scaler.joblib")
 
 class ModelLoader:
-    def __init__(self, model_path: str, scaler_path: str):
+    def __init__(self, model_path: str, scaler_path: str, class_map: Optional[Dict[int, str]] = None):
         self.model_path = model_path
         self.scaler_path = scaler_path
         self.model = None
         self.scaler = None
         self.feature_names = None
         self.is_loaded = False
+        # Column indices taking the API's feature vector to this scaler's order (None = same order)
+        self._input_idx = None
+        self.registry_key = None  # "name@version" when loaded through model_registry.py
         
         # Threat Mapping
-        self.class_map = {
+        self.class_map = class_map or {
             0: "Benign",
             1: "Brute Force",
             2: "DDoS",
@@ -66,8 +72,24 @@ class ModelLoader:
             if not os.path.exists(self.scaler_path):
                 raise FileNotFoundError(f"Scaler file not found at: {self.scaler_path}")
                 
-            self.model = joblib.load(self.model_path)
+            # The ML stack (joblib/sklearn/xgboost, ~1s) is imported here, not at module import
+            import joblib
+            import xgboost as xgb
+
+            if self.model_path.endswith((".ubj", ".json")):
+                # Raw Booster from src/models_dev/compact_model.py (no sklearn wrapper)
+                self.model = xgb.Booster()
+                self.model.load_model(self.model_path)
+            else:
+                self.model = joblib.load(self.model_path)
             self.scaler = joblib.load(self.scaler_path)
+            self._is_booster = isinstance(self.model, xgb.Booster)
+            # StandardScaler.transform as plain numpy: (x - mean_) / scale_
+            n = self.scaler.n_features_in_
+            mean = getattr(self.scaler, "mean_", None)
+            scale = getattr(self.scaler, "scale_", None)
+            self._mean = np.zeros(n) if mean is None else np.asarray(mean, dtype=np.float64)
+            self._scale = np.ones(n) if scale is None else np.asarray(scale, dtype=np.float64)
             
             # Load features from scaler if available
             if hasattr(self.scaler, 'feature_names_in_'):
@@ -82,10 +104,25 @@ class ModelLoader:
             self.is_loaded = False
             raise e
 
-    def predict(self, input_features: list) -> Dict[str, Any]:
+    def set_input_order(self, input_names: Sequence[str]):
+        """Requests will carry features in `input_names` order (e.g. feature_list.txt); reorder/subset them."""
+        input_names = list(input_names)
+        if list(self.feature_names) == input_names:
+            self._input_idx = None
+            return
+        missing = [f for f in self.feature_names if f not in input_names]
+        if missing:
+            raise ValueError(f"Model needs features the API does not receive: {missing[:5]}")
+        self._input_idx = np.array([input_names.index(f) for f in self.feature_names])
+
+    def to_model_order(self, raw: np.ndarray) -> np.ndarray:
+        """Features in request order (last axis) -> the scaler/model's feature order."""
+        return raw if self._input_idx is None else raw[..., self._input_idx]
+
+    def predict(self, input_features) -> Dict[str, Any]:
         """
-        Melakukan prediksi dari data raw input.
-        - Scaling data using DataFrame to match feature names
+        Melakukan prediksi dari data raw input (list atau numpy array 1D).
+        - Scaling with the scaler's mean_/scale_ (same math as StandardScaler.transform)
         - Prediksi model
         - Mapping hasil ke informasi mitigasi
         """
@@ -93,55 +130,70 @@ class ModelLoader:
             raise RuntimeError("Model or Scaler is not loaded.")
 
         try:
-            # 1. Convert to DataFrame to match Scaler's expected feature names
-            # Expected shape: (1, 69)
-            raw_df = pd.DataFrame([input_features], columns=self.feature_names)
-            
-            # 2. Scaling
-            scaled_data = self.scaler.transform(raw_df)
-            
-            # 3. Predict
-            prediction_idx = self.model.predict(scaled_data)[0]
-            prediction_label = self.class_map.get(prediction_idx, "Unknown")
-            
-            # 4. Get Proba (Optional)
-            try:
-                proba = self.model.predict_proba(scaled_data)[0]
-                confidence = float(np.max(proba))
-            except:
-                confidence = 1.0 # Fallback
-                
-            # 5. Construct Result
-            mitigation = self.threat_info.get(prediction_label, {})
-            
-            result = {
-                "prediction_class": prediction_label,
-                "prediction_id": int(prediction_idx),
-                "confidence": confidence,
-                "threat_type": mitigation.get("Tipe Ancaman", "Unknown"),
-                "response_mode": mitigation.get("Mode Respon", "Manual"),
-                "mitigation_actions": mitigation.get("Aksi Mitigasi", []),
-                "input_summary": f"Proto: {input_features[0]}, Flow: {input_features[1]:.0f}"
-            }
-            
-            return result
+            # 1. Input in scaler feature order, shape (1, 69)
+            raw = np.asarray(input_features, dtype=np.float64).reshape(1, -1)
+            prediction_idx, confidence, proba = self._classify(raw)
+            return self._result(int(prediction_idx[0]), float(confidence[0]), input_features,
+                                None if proba is None else proba[0])
         except Exception as e:
             print(f"[ERROR] Prediction failed: {e}")
             raise e
 
+    def predict_batch(self, matrix) -> List[Dict[str, Any]]:
+        """Same as predict() for every row of a (n, 69) matrix, with one scaler/model call for the batch."""
+        if not self.is_loaded:
+            raise RuntimeError("Model or Scaler is not loaded.")
+        raw = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+        prediction_idx, confidence, proba = self._classify(raw)
+        return [self._result(int(i), float(c), row, None if proba is None else proba[k])
+                for k, (i, c, row) in enumerate(zip(prediction_idx, confidence, raw))]
+
+    def _classify(self, raw: np.ndarray):
+        """(n, features) raw input -> (class index, confidence, class probabilities or None) arrays."""
+        raw = self.to_model_order(raw)
+
+        # 2. Scaling
+        scaled_data = (raw - self._mean) / self._scale
+
+        # 3. Predict
+        if self._is_booster:
+            proba = np.asarray(self.model.inplace_predict(scaled_data)).reshape(len(raw), -1)
+            prediction_idx = np.argmax(proba, axis=1)
+            return prediction_idx, proba[np.arange(len(raw)), prediction_idx], proba
+        prediction_idx = np.asarray(self.model.predict(scaled_data)).reshape(-1)
+
+        # 4. Get Proba (Optional)
+        try:
+            proba = np.asarray(self.model.predict_proba(scaled_data))
+            confidence = np.max(proba, axis=1)
+        except:
+            proba = None
+            confidence = np.ones(len(raw)) # Fallback
+        return prediction_idx, confidence, proba
+
+    def _result(self, prediction_idx: int, confidence: float, input_features, proba=None) -> Dict[str, Any]:
+        prediction_label = self.class_map.get(prediction_idx, "Unknown")
+
+        # 5. Construct Result
+        mitigation = self.threat_info.get(prediction_label, {})
+
+        return {
+            "prediction_class": prediction_label,
+            "prediction_id": prediction_idx,
+            "confidence": confidence,
+            "threat_type": mitigation.get("Tipe Ancaman", "Unknown"),
+            "response_mode": mitigation.get("Mode Respon", "Manual"),
+            "mitigation_actions": mitigation.get("Aksi Mitigasi", []),
+            "input_summary": f"Proto: {int(input_features[0])}, Flow: {input_features[1]:.0f}",
+            "probabilities": None if proba is None else [round(float(p), 6) for p in proba]
+        }
+
 # Singleton Pattern for Global Loader
 _loader = None
 
 def get_model_loader():
     global _loader
     if _loader is None:
-        # Paths relative to project root (assuming main.py is run from root)
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        # Go up one level from src/app to src, then to models_dev
-        ROOT_SRC = os.path.dirname(BASE_DIR) 
-        
-        MODEL_PATH = r"d:\Dev_Drive\Coding Project Files\Uni_Assignment\UAS\36230035_KeamananData_UAS\src\models_dev\models\xgboost.joblib"
-        SCALER_PATH = r"d:\Dev_Drive\Coding Project Files\Uni_Assignment\UAS\36230035_KeamananData_UAS\src\models_dev\models\scaler.joblib"
-        
-        _loader = ModelLoader(MODEL_PATH, SCALER_PATH)
+        # The API serves models through model_registry.py; this is the plain notebook pair
+        _loader = ModelLoader(DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH)
     return _loader
@@ -0,0 +1,402 @@
+import os
+import re
+import json
+import shutil
+import tempfile
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    from app.model_loader import ModelLoader, MODELS_DIR
+    from app.drift_monitor import REFERENCE_FILE as DRIFT_REFERENCE_FILE
+except ImportError:
+    try:
+        from src.app.model_loader import ModelLoader, MODELS_DIR
+        from src.app.drift_monitor import REFERENCE_FILE as DRIFT_REFERENCE_FILE
+    except ImportError:
+        from model_loader import ModelLoader, MODELS_DIR
+        from drift_monitor import REFERENCE_FILE as DRIFT_REFERENCE_FILE
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_REGISTRY_DIR = os.path.join(PROJECT_ROOT, "src", "models_dev", "registry")
+REGISTRY_DIR = os.getenv("IDS_MODEL_REGISTRY", DEFAULT_REGISTRY_DIR)
+
+# Model served when a request does not ask for one: "name" (latest version) or "name@version"
+DEFAULT_MODEL = os.getenv("IDS_DEFAULT_MODEL", "xgboost")
+# Loaded models (except the default, which stays pinned) are evicted LRU above this budget
+MEMORY_BUDGET_MB = float(os.getenv("IDS_MODEL_MEMORY_MB", "2048"))
+
+METADATA_FILE = "metadata.json"
+# promote() records the new default here, so other API replicas and restarts serve it as well
+DEFAULT_POINTER_FILE = "default.json"
+PROMOTION_POLL_SECONDS = float(os.getenv("IDS_PROMOTION_POLL", "5"))
+# Artifacts in src/models_dev/models (notebook / train.py output) are listed as version "legacy"
+LEGACY_VERSION = "legacy"
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def version_key(version: str):
+    """'legacy' < 'v1' < 'v2' < 'v10'; other strings sort after numbered versions."""
+    if version == LEGACY_VERSION:
+        return (0, 0, "")
+    m = re.fullmatch(r"v?(\d+)", version)
+    return (1, int(m.group(1)), "") if m else (2, 0, version)
+
+
+class ModelEntry:
+    """One versioned artifact on disk (metadata only; nothing is loaded)."""
+
+    def __init__(self, name: str, version: str, model_path: str, scaler_path: str, metadata: Dict[str, Any]):
+        self.name = name
+        self.version = version
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.metadata = metadata
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def disk_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in (self.model_path, self.scaler_path) if os.path.exists(p))
+
+    def class_map(self) -> Optional[Dict[int, str]]:
+        class_map = self.metadata.get("class_map")
+        return {int(k): v for k, v in class_map.items()} if class_map else None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "version": self.version, "key": self.key,
+                "disk_mb": round(self.disk_bytes() / 2**20, 2),
+                **{k: v for k, v in self.metadata.items() if k != "feature_names"}}
+
+
+class ModelRegistry:
+    """
+    Versioned models on local disk, loaded on first use.
+
+    Layout: <registry>/<name>/<version>/{model.joblib|model.ubj, scaler.joblib,
+    metadata.json}. Loaded models are kept in LRU order with their measured
+    resident size (RSS delta of the load, at least the size on disk); when
+    the total exceeds the memory budget the least recently used ones are
+    dropped. In-flight requests keep their own reference, so eviction never
+    breaks a prediction.
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR, input_names: Optional[Sequence[str]] = None,
+                 memory_budget_mb: float = MEMORY_BUDGET_MB, default_model: str = DEFAULT_MODEL,
+                 legacy_dir: Optional[str] = MODELS_DIR):
+        self.root = root
+        self.legacy_dir = legacy_dir
+        self.input_names = list(input_names) if input_names is not None else None
+        self.memory_budget = memory_budget_mb * 2**20
+        self.default_model = default_model
+
+        self._entries: Dict[str, Dict[str, ModelEntry]] = {}
+        self._loaded = OrderedDict()   # key -> (ModelLoader, bytes)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # One load at a time, so RSS deltas do not overlap
+        self._pinned = set()
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+        self._pointer_mtime = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.scan()
+        promoted = self._read_pointer()
+        if promoted is not None:
+            self.default_model = promoted
+
+    # --------------------------------------------------------------------------
+    # Catalogue
+    # --------------------------------------------------------------------------
+    def scan(self):
+        """(Re)reads the catalogue from disk. Cheap: only metadata.json files are read."""
+        entries: Dict[str, Dict[str, ModelEntry]] = {}
+        for entry in self._scan_legacy():
+            entries.setdefault(entry.name, {})[entry.version] = entry
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                name_dir = os.path.join(self.root, name)
+                if not os.path.isdir(name_dir):
+                    continue
+                for version in os.listdir(name_dir):
+                    if version.endswith(".tmp"):  # publish() in progress
+                        continue
+                    meta_path = os.path.join(name_dir, version, METADATA_FILE)
+                    if not os.path.exists(meta_path):
+                        continue
+                    with open(meta_path) as f:
+                        meta = json.load(f)
+                    version_dir = os.path.dirname(meta_path)
+                    entries.setdefault(name, {})[version] = ModelEntry(
+                        name, version, os.path.join(version_dir, meta["model_file"]),
+                        os.path.join(version_dir, meta.get("scaler_file", "scaler.joblib")), meta)
+        with self._lock:
+            self._entries = entries
+
+    def _scan_legacy(self) -> List[ModelEntry]:
+        if not self.legacy_dir or not os.path.isdir(self.legacy_dir):
+            return []
+        scaler = os.path.join(self.legacy_dir, "scaler.joblib")
+        if not os.path.exists(scaler):
+            return []
+        entries = []
+        for filename in sorted(os.listdir(self.legacy_dir)):
+            stem, ext = os.path.splitext(filename)
+            if ext in (".joblib", ".ubj") and stem != "scaler":
+                entries.append(ModelEntry(stem, LEGACY_VERSION, os.path.join(self.legacy_dir, filename), scaler,
+                                          {"source": "src/models_dev/models"}))
+        return entries
+
+    def resolve(self, name: Optional[str] = None, version: Optional[str] = None) -> ModelEntry:
+        """`name` may be 'name@version'. No version = latest. Raises KeyError if unknown."""
+        name = name or self.default_model
+        if "@" in name:
+            name, version = name.split("@", 1)
+        with self._lock:
+            versions = self._entries.get(name)
+        if not versions:
+            raise KeyError(f"Unknown model '{name}'")
+        if version is None:
+            return versions[max(versions, key=version_key)]
+        if version not in versions:
+            raise KeyError(f"Unknown version '{version}' of model '{name}' (have: {sorted(versions, key=version_key)})")
+        return versions[version]
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [e for versions in self._entries.values() for e in versions.values()]
+            loaded = {key: size for key, (_, size) in self._loaded.items()}
+        items = []
+        for e in sorted(entries, key=lambda e: (e.name, version_key(e.version))):
+            item = e.describe()
+            item["loaded"] = e.key in loaded
+            item["resident_mb"] = round(loaded[e.key] / 2**20, 2) if e.key in loaded else None
+            items.append(item)
+        return items
+
+    # --------------------------------------------------------------------------
+    # Loading / eviction
+    # --------------------------------------------------------------------------
+    def get(self, name: Optional[str] = None, version: Optional[str] = None) -> ModelLoader:
+        """Loaded model for name/version (default model if None), loading it on first use."""
+        entry = self.resolve(name, version)
+        with self._lock:
+            if entry.key in self._loaded:
+                self._loaded.move_to_end(entry.key)
+                self.stats["hits"] += 1
+                return self._loaded[entry.key][0]
+
+        with self._load_lock:
+            with self._lock:  # Loaded by another thread while we waited
+                if entry.key in self._loaded:
+                    return self._loaded[entry.key][0]
+            import joblib, xgboost  # noqa: F401  Library memory is not charged to the first model
+            before = rss_bytes()
+            loader = ModelLoader(entry.model_path, entry.scaler_path, class_map=entry.class_map())
+            if self.input_names is not None:
+                loader.set_input_order(self.input_names)
+            after = rss_bytes()
+            size = max(entry.disk_bytes(), (after - before) if before is not None else 0)
+            loader.registry_key = entry.key
+
+            with self._lock:
+                self._loaded[entry.key] = (loader, size)
+                self.stats["loads"] += 1
+                self._evict(keep=entry.key)
+        print(f"[REGISTRY] Loaded {entry.key} ({size / 2**20:.1f} MB, {self.resident_bytes() / 2**20:.1f} MB resident)")
+        return loader
+
+    def default(self) -> ModelLoader:
+        """The default model, pinned so it is never evicted."""
+        loader = self.get(self.default_model)
+        self._pinned.add(loader.registry_key)
+        return loader
+
+    def promote(self, key: str, persist: bool = True) -> ModelLoader:
+        """
+        Makes `key` (name@version) the default: loads it and pins it in place of
+        the old default. With `persist` the default pointer file is rewritten so
+        every replica watching it switches too.
+        """
+        self.scan()  # Freshly published versions are not in the catalogue yet
+        loader = self.get(key)
+        with self._lock:
+            self._pinned = {loader.registry_key}
+            self.default_model = loader.registry_key
+            self._evict(keep=loader.registry_key)
+        if persist:
+            self._write_pointer(loader.registry_key)
+        return loader
+
+    # --------------------------------------------------------------------------
+    # Default pointer (shared by replicas)
+    # --------------------------------------------------------------------------
+    @property
+    def pointer_path(self) -> str:
+        return os.path.join(self.root, DEFAULT_POINTER_FILE)
+
+    def _read_pointer(self) -> Optional[str]:
+        """Promoted default from the pointer file, if it names a model in the catalogue."""
+        try:
+            mtime = os.stat(self.pointer_path).st_mtime_ns
+            with open(self.pointer_path) as f:
+                key = json.load(f)["model"]
+        except (OSError, ValueError, KeyError):
+            return None
+        self._pointer_mtime = mtime
+        try:
+            self.resolve(key)
+        except KeyError:
+            self.scan()  # Published after our last scan
+            try:
+                self.resolve(key)
+            except KeyError:
+                print(f"[REGISTRY] WARNING: {DEFAULT_POINTER_FILE} names unknown model {key}, ignored")
+                return None
+        return key
+
+    def _write_pointer(self, key: str):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.pointer_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"model": key, "promoted_at": datetime.datetime.now().isoformat(timespec="seconds")}, f)
+        os.replace(tmp_path, self.pointer_path)
+        self._pointer_mtime = os.stat(self.pointer_path).st_mtime_ns
+
+    def check_promotion(self) -> Optional[ModelLoader]:
+        """Promotes the pointer's model if another process changed it. Cheap when it did not (one stat)."""
+        try:
+            mtime = os.stat(self.pointer_path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self._pointer_mtime:
+            return None
+        key = self._read_pointer()
+        if key is None or key == self.default_model:
+            return None
+        return self.promote(key, persist=False)
+
+    def watch_promotions(self, on_promoted: Callable[[ModelLoader], None],
+                         interval: float = PROMOTION_POLL_SECONDS):
+        """Background check of the pointer file every `interval` seconds; calls on_promoted(loader)."""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(on_promoted, interval),
+                                         name="registry-watch", daemon=True)
+        self._watcher.start()
+
+    def _watch(self, on_promoted, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                loader = self.check_promotion()
+                if loader is not None:
+                    print(f"[REGISTRY] Default changed to {loader.registry_key} by another process")
+                    on_promoted(loader)
+            except Exception as e:
+                print(f"[REGISTRY] Promotion check failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+
+    def _evict(self, keep: str):
+        total = sum(size for _, size in self._loaded.values())
+        for key in list(self._loaded):
+            if total <= self.memory_budget:
+                break
+            if key == keep or key in self._pinned:
+                continue
+            _, size = self._loaded.pop(key)
+            total -= size
+            self.stats["evictions"] += 1
+            print(f"[REGISTRY] Evicted {key} ({size / 2**20:.1f} MB)")
+        if total > self.memory_budget:
+            print(f"[REGISTRY] WARNING: pinned/in-use models ({total / 2**20:.1f} MB) exceed the "
+                  f"{self.memory_budget / 2**20:.0f} MB budget")
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._loaded.values())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = list(self._loaded)
+        return {"root": self.root, "default": self.default_model, "memory_budget_mb": self.memory_budget / 2**20,
+                "resident_mb": round(self.resident_bytes() / 2**20, 2), "loaded": loaded,
+                "pinned": sorted(self._pinned), **self.stats}
+
+
+# ==============================================================================
+# PUBLISHING
+# ==============================================================================
+def publish(name: str, model_path: str, scaler_path: str, metadata: Optional[Dict[str, Any]] = None,
+            version: Optional[str] = None, root: str = REGISTRY_DIR) -> str:
+    """
+    Copies a model/scaler pair into <root>/<name>/<version>/ with metadata.json.
+    Without `version` the next 'vN' is used. Returns the version directory.
+    Safe across processes: the files are staged in a private tmp directory and
+    the version is claimed by the atomic rename, so concurrent publishers
+    never share a tmp directory and the loser takes the next 'vN'.
+    """
+    name_dir = os.path.join(root, name)
+    os.makedirs(name_dir, exist_ok=True)
+    if version is not None and os.path.exists(os.path.join(name_dir, version)):
+        raise FileExistsError(f"{name}@{version} is already registered")
+
+    tmp_dir = tempfile.mkdtemp(prefix=".publish-", suffix=".tmp", dir=name_dir)  # Skipped by scan()
+    try:
+        model_file = "model" + os.path.splitext(model_path)[1]
+        shutil.copy2(model_path, os.path.join(tmp_dir, model_file))
+        shutil.copy2(scaler_path, os.path.join(tmp_dir, "scaler.joblib"))
+        # The drift monitor's training quantiles travel with the scaler they were computed for
+        reference_path = os.path.join(os.path.dirname(scaler_path), DRIFT_REFERENCE_FILE)
+        if os.path.exists(reference_path):
+            shutil.copy2(reference_path, os.path.join(tmp_dir, DRIFT_REFERENCE_FILE))
+
+        while True:
+            target = version or f"v{max(_version_numbers(name_dir), default=0) + 1}"
+            meta = {"name": name, "version": target,
+                    "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "model_file": model_file, "scaler_file": "scaler.joblib", **(metadata or {})}
+            with open(os.path.join(tmp_dir, METADATA_FILE), "w") as f:
+                json.dump(meta, f, indent=2)
+            version_dir = os.path.join(name_dir, target)
+            try:
+                os.rename(tmp_dir, version_dir)  # Never visible half-written; fails if the version exists
+                return version_dir
+            except OSError:
+                if not os.path.isdir(version_dir):
+                    raise
+                if version is not None:
+                    raise FileExistsError(f"{name}@{version} is already registered")
+                # Another process published this vN first: take the next one
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _version_numbers(name_dir: str) -> List[int]:
+    return [int(v[1:]) for v in os.listdir(name_dir) if re.fullmatch(r"v\d+", v)]
+
+
+# Singleton Pattern (same as get_model_loader)
+_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry(input_names: Optional[Sequence[str]] = None) -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(input_names=input_names)
+    return _registry
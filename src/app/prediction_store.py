@@ -0,0 +1,694 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+import datetime
+from itertools import compress
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "predictions.db")
+
+# IDS_PREDICTION_STORE=memory (default, single process) | sqlite (shared by API replicas)
+STORE_BACKEND = os.getenv("IDS_PREDICTION_STORE", "memory").lower()
+REPLICA_ID = os.getenv("IDS_REPLICA_ID", "0")
+
+# The SQLite store keeps a few pages of history and prunes the rest, unless
+# IDS_PREDICTION_RETENTION_HOURS is set (e.g. 24 to allow daily /history/export)
+PRUNE_EVERY = 500
+RETAIN_FACTOR = 10
+RETENTION_HOURS = float(os.getenv("IDS_PREDICTION_RETENTION_HOURS", "0"))
+
+# Besides the recent tail (HISTORY_LEN), a fixed budget of older predictions is
+# kept per class, so rare threats survive benign-heavy periods and floods.
+# Weights split the budget between classes ("*" = any class not listed).
+RESERVOIR_SIZE = int(os.getenv("IDS_HISTORY_RESERVOIR", "400"))
+DEFAULT_CLASS_WEIGHTS = "Benign=1,DDoS=2,Brute Force=3,Other=3,*=1"
+OTHER_CLASSES = "*"
+
+# The memory store keeps the newest IDS_HISTORY_CAPACITY predictions in
+# preallocated NumPy columns (~48 bytes per prediction with 4 classes, pages
+# are only touched as the ring fills); /history serves the newest `maxlen`
+# of them. The default (~5 MB) covers /stats windows of a few minutes under
+# load; longer in-memory windows are opt-in (1000000 = ~46 MB).
+RING_CAPACITY = int(os.getenv("IDS_HISTORY_CAPACITY", "100000"))
+PROBA_CLASSES = 4       # Probability columns until set_class_info() sizes them from the model's class_map
+TRACE_ROWS = 10000      # Trace ids are kept for the newest predictions only (dashboards report recent ones)
+
+# Scalar columns served by export_batches(), in this order
+EXPORT_COLUMNS = ("seq", "ts", "replica", "prediction_class", "prediction_id", "confidence", "incident_id", "source")
+EXPORT_BATCH_ROWS = 65536
+
+
+def parse_class_weights(spec: str) -> Dict[str, float]:
+    """'Benign=1,DDoS=2,*=1' -> {'Benign': 1.0, 'DDoS': 2.0, '*': 1.0}."""
+    weights = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, weight = part.split("=", 1)
+            weights[name.strip()] = float(weight)
+    weights.setdefault(OTHER_CLASSES, 1.0)
+    return weights
+
+
+def class_capacities(weights: Dict[str, float], budget: int) -> Dict[str, int]:
+    """Splits `budget` slots between classes in proportion to their weight."""
+    total = sum(w for w in weights.values() if w > 0)
+    if total <= 0 or budget <= 0:
+        return {name: 0 for name in weights}
+    return {name: int(budget * max(w, 0) / total) for name, w in weights.items()}
+
+
+CLASS_WEIGHTS = parse_class_weights(os.getenv("IDS_HISTORY_CLASS_WEIGHTS", DEFAULT_CLASS_WEIGHTS))
+
+
+def merge_retained(recent: List[Dict[str, Any]], sampled: List[Dict[str, Any]],
+                   since: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Recent tail + sampled older items (deduplicated, oldest first), each tagged with `retention`."""
+    recent_seqs = {p['seq'] for p in recent}
+    items = [{**p, 'retention': 'recent'} for p in recent]
+    items += [{**p, 'retention': 'sampled'} for p in sampled if p['seq'] not in recent_seqs]
+    if since is not None:
+        items = [p for p in items if p['seq'] > since]
+    items.sort(key=lambda p: p['seq'])
+    return items
+
+
+class Interner:
+    """
+    Small string table: value <-> int code (-1 = None). For classes, models
+    and sources. With `refcount`, every code() must be paired with a
+    release() when the slot holding it is overwritten; unused codes are
+    freed and reused, so the table never holds more entries than there are
+    slots (sources are client supplied and unbounded).
+    """
+
+    def __init__(self, refcount: bool = False):
+        self.values: List[Optional[str]] = []
+        self._codes: Dict[str, int] = {}
+        self._refs: Optional[List[int]] = [] if refcount else None
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            if self._free:
+                code = self._free.pop()
+                self.values[code] = value
+            else:
+                code = len(self.values)
+                self.values.append(value)
+                if self._refs is not None:
+                    self._refs.append(0)
+            self._codes[value] = code
+        if self._refs is not None:
+            self._refs[code] += 1
+        return code
+
+    def release(self, code: int):
+        if code < 0 or self._refs is None:
+            return
+        self._refs[code] -= 1
+        if self._refs[code] == 0:
+            del self._codes[self.values[code]]
+            self.values[code] = None
+            self._free.append(code)
+
+    def lookup(self, codes: np.ndarray) -> List[Optional[str]]:
+        return [self.values[c] if c >= 0 else None for c in codes.tolist()]
+
+
+class PredictionColumns:
+    """
+    Ring of the newest `capacity` predictions as preallocated NumPy columns
+    (struct of arrays). A prediction with sequence number seq lives in slot
+    (seq - 1) % capacity, so seq itself is not stored. Strings are interned
+    (class, model, source); source codes are refcounted and freed once
+    their last row is overwritten. Threat metadata is not stored at all, it
+    is looked up in `threat_info` when rows are turned back into dicts.
+    Not thread-safe: the owning store holds its lock (take() resolves the
+    strings, since a freed source code can be reused by the next put()).
+    """
+
+    def __init__(self, capacity: int = RING_CAPACITY, n_classes: int = PROBA_CLASSES):
+        self.capacity = capacity
+        self.n_classes = n_classes
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.class_code = np.zeros(capacity, dtype=np.int16)
+        self.prediction_id = np.zeros(capacity, dtype=np.int16)
+        self.confidence = np.zeros(capacity, dtype=np.float32)
+        self.proba = np.zeros((capacity, n_classes), dtype=np.float32)  # Same values /predict returned
+        self.protocol = np.zeros(capacity, dtype=np.int16)          # Feature summary (input_summary)
+        self.flow_duration = np.zeros(capacity, dtype=np.float32)
+        self.incident_id = np.zeros(capacity, dtype=np.int32)       # -1 = none
+        self.model = np.zeros(capacity, dtype=np.int16)
+        self.source = np.full(capacity, -1, dtype=np.int32)
+        self.classes, self.models, self.sources = Interner(), Interner(), Interner(refcount=True)
+        self.last_seq = 0
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: value for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+
+    @property
+    def bytes_per_row(self) -> int:
+        return sum(column.itemsize * (column.size // self.capacity) for column in self.columns.values())
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest seq still in the ring."""
+        return max(1, self.last_seq - self.capacity + 1)
+
+    def put(self, seq: int, ts: float, result: Dict[str, Any], features=None):
+        self.put_at((seq - 1) % self.capacity, ts, result, features)
+        self.last_seq = seq
+
+    def put_at(self, i: int, ts: float, result: Dict[str, Any], features=None):
+        """Writes one prediction into slot i (ClassReservoirs picks its own slots)."""
+        self.ts[i] = ts
+        self.class_code[i] = self.classes.code(result['prediction_class'])
+        self.prediction_id[i] = result['prediction_id']
+        self.confidence[i] = result['confidence']
+        proba = result.get('probabilities')
+        if proba is None:
+            self.proba[i] = np.nan
+        else:
+            k = min(len(proba), self.n_classes)
+            self.proba[i, :k] = proba[:k]
+            self.proba[i, k:] = np.nan
+        if features is None:
+            self.protocol[i], self.flow_duration[i] = -1, np.nan
+        else:
+            self.protocol[i], self.flow_duration[i] = min(int(features[0]), 32767), features[1]
+        incident_id = result.get('incident_id')
+        self.incident_id[i] = -1 if incident_id is None else incident_id
+        self.model[i] = self.models.code(result.get('model'))
+        self.sources.release(int(self.source[i]))  # -1 while the slot was never written
+        self.source[i] = self.sources.code(result.get('source'))
+
+    def slots(self, lo: int, hi: int) -> np.ndarray:
+        """Slots of seqs lo..hi (inclusive, within the ring)."""
+        return (np.arange(lo, hi + 1) - 1) % self.capacity
+
+    def take(self, lo: int, hi: int) -> Dict[str, Any]:
+        """
+        Copies of every column for seqs lo..hi, plus `seq` and the interned
+        strings resolved to lists (`prediction_class`, `model_name`, `source_name`).
+        """
+        rows = self.rows(self.slots(lo, hi))
+        rows['seq'] = np.arange(lo, hi + 1)
+        return rows
+
+    def rows(self, idx: np.ndarray) -> Dict[str, Any]:
+        """Copies of every column for slots idx, with the interned strings resolved (see take())."""
+        rows = {name: column[idx] for name, column in self.columns.items()}
+        rows['prediction_class'] = self.classes.lookup(rows['class_code'])
+        rows['model_name'] = self.models.lookup(rows['model'])
+        rows['source_name'] = self.sources.lookup(rows['source'])
+        return rows
+
+
+class ClassReservoirs:
+    """
+    One uniform reservoir sample (Algorithm R) per class over everything
+    ever appended, with a fixed number of slots per class. A class seen
+    n times with capacity k keeps each of its predictions with
+    probability k/n, whatever the other classes are doing. Samples are
+    kept as the same compact columns as the ring (PredictionColumns, one
+    block of slots per class), so the budget is fixed memory.
+    Not thread-safe: the owning store holds its lock.
+    """
+
+    def __init__(self, budget: int = RESERVOIR_SIZE, weights: Optional[Dict[str, float]] = None,
+                 rng: Optional[random.Random] = None, n_classes: int = PROBA_CLASSES):
+        self.weights = dict(weights or CLASS_WEIGHTS)
+        self.weights.setdefault(OTHER_CLASSES, 1.0)
+        self.capacity = class_capacities(self.weights, budget)
+        self.seen = {name: 0 for name in self.weights}
+        self.kept = {name: 0 for name in self.weights}
+        self._offset, total = {}, 0
+        for name, capacity in self.capacity.items():
+            self._offset[name] = total
+            total += capacity
+        self.rows = PredictionColumns(max(total, 1), n_classes)
+        self.seq = np.zeros(max(total, 1), dtype=np.int64)
+        self._rng = rng or random.Random()
+
+    def __len__(self) -> int:
+        return sum(self.kept.values())
+
+    def set_n_classes(self, n_classes: int):
+        """Resizes the probability columns; only while nothing was sampled yet."""
+        if n_classes != self.rows.n_classes and not len(self):
+            self.rows = PredictionColumns(self.rows.capacity, n_classes)
+
+    def key(self, class_name: str) -> str:
+        return class_name if class_name in self.capacity else OTHER_CLASSES
+
+    def add(self, seq: int, ts: float, result: Dict[str, Any], features=None):
+        key = self.key(result['prediction_class'])
+        self.seen[key] += 1
+        capacity = self.capacity[key]
+        if self.kept[key] < capacity:
+            j = self.kept[key]
+            self.kept[key] += 1
+        elif capacity:
+            j = self._rng.randrange(self.seen[key])
+            if j >= capacity:
+                return
+        else:
+            return
+        slot = self._offset[key] + j
+        self.rows.put_at(slot, ts, result, features)
+        self.seq[slot] = seq
+
+    def take(self, before: Optional[int] = None) -> Dict[str, Any]:
+        """Column copies of the samples (as PredictionColumns.take), oldest first; only seq < before if given."""
+        idx = np.concatenate([np.arange(self._offset[name], self._offset[name] + kept)
+                              for name, kept in self.kept.items()] or [np.zeros(0, dtype=np.int64)])
+        idx = idx[np.argsort(self.seq[idx], kind="stable")]
+        if before is not None:
+            idx = idx[self.seq[idx] < before]
+        rows = self.rows.rows(idx)
+        rows['seq'] = self.seq[idx]
+        return rows
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: {"weight": self.weights[name], "capacity": self.capacity[name], "seen": self.seen[name],
+                       "kept": self.kept[name],
+                       "keep_probability": round(min(1.0, self.capacity[name] / self.seen[name]), 6)
+                       if self.seen[name] else None}
+                for name in self.weights}
+
+
+class MemoryPredictionStore:
+    """
+    In-process history: the newest `capacity` predictions in a columnar
+    ring (PredictionColumns) plus per-class reservoirs (ClassReservoirs) of
+    older ones. Memory is fixed at ~50 bytes per ring slot + the reservoir
+    budget, plus one interned string per distinct source still in the ring;
+    dicts are only built for the rows a response needs. Every
+    stored prediction gets a monotonically increasing `seq`.
+    """
+
+    def __init__(self, maxlen: int = 100, reservoirs: Optional[ClassReservoirs] = None,
+                 capacity: int = RING_CAPACITY, threat_info: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.maxlen = maxlen
+        self.capacity = max(capacity, maxlen)
+        self._ring = PredictionColumns(self.capacity)
+        self._traces = OrderedDict()  # seq -> trace of the newest TRACE_ROWS traced predictions
+        self._reservoirs = reservoirs if reservoirs is not None else ClassReservoirs()
+        self.threat_info = threat_info or {}
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def set_class_info(self, class_map: Dict[int, str], threat_info: Dict[str, Dict[str, Any]]):
+        """
+        Class metadata of the default model: one probability column per class
+        id, and ModelLoader.threat_info for turning rows back into dicts. Called
+        at startup, before the first prediction; an empty ring is rebuilt
+        (untouched NumPy pages cost nothing), a filled one keeps its columns.
+        """
+        self.threat_info = threat_info
+        with self._lock:
+            if len(class_map) != self._ring.n_classes and self._seq == 0:
+                self._ring = PredictionColumns(self.capacity, len(class_map))
+                self._reservoirs.set_n_classes(len(class_map))
+
+    def append(self, result: Dict[str, Any], features=None) -> Dict[str, Any]:
+        ts = time.time()
+        with self._lock:
+            self._seq += 1
+            result['seq'] = self._seq
+            result['timestamp'] = datetime.datetime.fromtimestamp(ts).isoformat()
+            self._ring.put(self._seq, ts, result, features)
+            if 'trace' in result:
+                self._traces[self._seq] = result['trace']
+                if len(self._traces) > TRACE_ROWS:
+                    self._traces.popitem(last=False)
+            self._reservoirs.add(self._seq, ts, result, features)
+        return result
+
+    def _rows(self, cols: Dict[str, np.ndarray], traces: Dict[int, Any]) -> List[Dict[str, Any]]:
+        """Column copies -> the dicts /predict returned, minus mitigation_actions (see /incidents), oldest first."""
+        classes, models, sources = cols['prediction_class'], cols['model_name'], cols['source_name']
+        proba = cols['proba']
+        items = []
+        for k, (seq, ts, prediction_id, confidence, protocol, flow, incident_id) in enumerate(zip(
+                cols['seq'].tolist(), cols['ts'].tolist(), cols['prediction_id'].tolist(),
+                cols['confidence'].tolist(), cols['protocol'].tolist(), cols['flow_duration'].tolist(),
+                cols['incident_id'].tolist())):
+            info = self.threat_info.get(classes[k], {})
+            item = {
+                "prediction_class": classes[k],
+                "prediction_id": prediction_id,
+                "confidence": confidence,
+                "threat_type": info.get("Tipe Ancaman", "Unknown"),
+                "response_mode": info.get("Mode Respon", "Manual"),
+                "input_summary": f"Proto: {protocol}, Flow: {flow:.0f}" if protocol >= 0 else None,
+                "probabilities": None if np.isnan(proba[k, 0]) else
+                [round(p, 6) for p in proba[k].tolist() if p == p],
+                "model": models[k],
+            }
+            if seq in traces:
+                item['trace'] = traces[seq]
+            if incident_id >= 0:
+                item['incident_id'] = incident_id
+            if sources[k] is not None:
+                item['source'] = sources[k]
+            item['seq'] = seq
+            item['timestamp'] = datetime.datetime.fromtimestamp(ts).isoformat()
+            items.append(item)
+        return items
+
+    def history(self, since: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Returns the newest `maxlen` predictions (oldest first), only seq > since if given."""
+        with self._lock:
+            lo = max(self._seq - self.maxlen, since or 0) + 1
+            if lo > self._seq:
+                return []
+            cols = self._ring.take(lo, self._seq)
+            traces = {seq: self._traces[seq] for seq in range(lo, self._seq + 1) if seq in self._traces}
+        return self._rows(cols, traces)
+
+    def latest_seq(self) -> int:
+        """Seq of the newest prediction (0 after a restart, before the first one)."""
+        return self._seq
+
+    def retained(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """Recent tail plus the per-class samples, with what was sampled and at which rate."""
+        recent = self.history()
+        with self._lock:
+            cols = self._reservoirs.take()
+            traces = {seq: self._traces[seq] for seq in cols['seq'].tolist() if seq in self._traces}
+            classes = self._reservoirs.summary()
+        items = merge_retained(recent, self._rows(cols, traces), since)
+        return {"items": items, "recent": len(recent),
+                "sampled": sum(1 for p in items if p['retention'] == 'sampled'),
+                "sampling": {"method": "reservoir", "classes": classes}}
+
+    def export_batches(self, start: Optional[float] = None, end: Optional[float] = None,
+                       batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[List[Tuple]]:
+        """
+        Rows of EXPORT_COLUMNS with start <= ts < end (epoch seconds), oldest
+        first: sampled predictions older than the ring, then the ring itself,
+        copied out one batch at a time (rows overwritten meanwhile are skipped).
+        """
+        lo_ts = start if start is not None else float("-inf")
+        hi_ts = end if end is not None else float("inf")
+        with self._lock:
+            first_seq = self._ring.first_seq
+            last_seq = self._seq
+            older = self._reservoirs.take(before=first_seq)
+        rows = [(seq, ts, REPLICA_ID, cls, prediction_id, confidence, incident_id if incident_id >= 0 else None, source)
+                for seq, ts, cls, prediction_id, confidence, incident_id, source in zip(
+                    older['seq'].tolist(), older['ts'].tolist(), older['prediction_class'],
+                    older['prediction_id'].tolist(), older['confidence'].tolist(), older['incident_id'].tolist(),
+                    older['source_name'])
+                if lo_ts <= ts < hi_ts]
+        if rows:
+            yield rows
+
+        lo = first_seq
+        while lo <= last_seq:
+            with self._lock:
+                lo = max(lo, self._ring.first_seq)
+                hi = min(lo + batch_rows - 1, last_seq)
+                if lo > hi:
+                    return
+                cols = self._ring.take(lo, hi)
+            keep = (cols['ts'] >= lo_ts) & (cols['ts'] < hi_ts)
+            if keep.any():
+                incident = cols['incident_id'][keep].tolist()
+                yield list(zip(cols['seq'][keep].tolist(), cols['ts'][keep].tolist(),
+                               [REPLICA_ID] * int(keep.sum()), list(compress(cols['prediction_class'], keep)),
+                               cols['prediction_id'][keep].tolist(), cols['confidence'][keep].tolist(),
+                               [i if i >= 0 else None for i in incident],
+                               list(compress(cols['source_name'], keep))))
+            lo = hi + 1
+
+    def aggregate(self, window: Optional[float] = None) -> Dict[str, Any]:
+        """Per-class counts, rates and mean confidence over the ring (or its last `window` seconds)."""
+        now = time.time()
+        with self._lock:
+            lo, hi = self._ring.first_seq, self._seq
+            if lo > hi:
+                return {"rows": 0, "window_s": window, "classes": {}, "threat_rate": None}
+            idx = self._ring.slots(lo, hi)
+            ts = self._ring.ts[idx]
+            mask = ts >= now - window if window else np.ones(len(idx), dtype=bool)
+            codes = self._ring.class_code[idx][mask]
+            confidence = self._ring.confidence[idx][mask]
+            names = list(self._ring.classes.values)
+        n = len(codes)
+        span = window or (float(ts[-1] - ts[0]) if len(ts) > 1 else 0.0)
+        counts = np.bincount(codes, minlength=len(names))
+        sums = np.bincount(codes, weights=confidence, minlength=len(names))
+        classes = {name: {"count": int(counts[c]),
+                          "rate_per_s": round(counts[c] / span, 3) if span else None,
+                          "mean_confidence": round(float(sums[c] / counts[c]), 4) if counts[c] else None}
+                   for c, name in enumerate(names)}
+        benign = counts[names.index("Benign")] if "Benign" in names else 0
+        return {"rows": n, "window_s": window, "classes": classes,
+                "threat_rate": round(float((n - benign) / n), 4) if n else None}
+
+    def features(self, seq: int) -> Optional[Tuple[np.ndarray, int]]:
+        """Feature vectors are not kept here; single-process feedback uses FeatureCache."""
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = self._seq - self._ring.first_seq + 1 if self._seq else 0
+            return {"backend": "memory", "last_seq": self._seq, "stored": stored,
+                    "capacity": self._ring.capacity, "bytes_per_row": self._ring.bytes_per_row,
+                    "ring_mb": round(self._ring.bytes_per_row * self._ring.capacity / 2**20, 1),
+                    "reservoir": len(self._reservoirs),
+                    "reservoir_kb": round(self._reservoirs.rows.bytes_per_row * self._reservoirs.rows.capacity / 1024, 1)}
+
+
+class SQLitePredictionStore:
+    """
+    Prediction history shared by every API replica on the box.
+    `seq` is the SQLite rowid, so it stays globally monotonic across
+    processes and /history?since= works against any replica. Rows are
+    stored as orjson blobs next to the scalar columns that exports and
+    time-range scans need; old rows are pruned every PRUNE_EVERY inserts.
+    Replicas share the table, so instead of in-process reservoirs pruning
+    spares the newest per-class capacity rows of every class.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, maxlen: int = 100,
+                 weights: Optional[Dict[str, float]] = None, reservoir_size: int = RESERVOIR_SIZE):
+        self.db_path = db_path
+        self.maxlen = maxlen
+        self.weights = dict(weights or CLASS_WEIGHTS)
+        self.weights.setdefault(OTHER_CLASSES, 1.0)
+        self.capacity = class_capacities(self.weights, reservoir_size)
+        self._keep_sql, self._keep_params = self._keep_query()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                replica TEXT NOT NULL,
+                prediction_class TEXT NOT NULL,
+                body BLOB NOT NULL
+            )
+        """)
+        # Databases created before exports existed only have the columns above
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(predictions)")}
+        for column, sql_type in (("ts", "REAL"), ("prediction_id", "INTEGER"), ("confidence", "REAL"),
+                                 ("incident_id", "INTEGER"), ("source", "TEXT"), ("features", "BLOB")):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE predictions ADD COLUMN {column} {sql_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_class ON predictions (prediction_class, seq)")
+        self._inserts = 0
+
+    def _keep_query(self) -> Tuple[str, List[Any]]:
+        """SELECT of the seqs spared by pruning: the newest `capacity` rows of each class."""
+        named = [name for name in self.capacity if name != OTHER_CLASSES]
+        parts, params = [], []
+        for name, capacity in self.capacity.items():
+            if capacity <= 0:
+                continue
+            if name == OTHER_CLASSES:
+                where = f"prediction_class NOT IN ({', '.join('?' * len(named))})"
+                params += [*named, capacity]
+            else:
+                where = "prediction_class = ?"
+                params += [name, capacity]
+            parts.append(f"SELECT seq FROM (SELECT seq FROM predictions WHERE {where} ORDER BY seq DESC LIMIT ?)")
+        return " UNION ALL ".join(parts), params
+
+    def set_class_info(self, class_map: Dict[int, str], threat_info: Dict[str, Dict[str, Any]]):
+        """Rows are stored as full bodies (probabilities, threat type and response mode included)."""
+
+    def append(self, result: Dict[str, Any], features=None) -> Dict[str, Any]:
+        ts = time.time()
+        result['timestamp'] = datetime.datetime.fromtimestamp(ts).isoformat()
+        result['replica'] = REPLICA_ID
+        # Raw features (float32, API order) let analysts label this seq through any replica
+        blob = np.ascontiguousarray(features, dtype="<f4").tobytes() if features is not None else None
+        # Mitigation actions are per class, not per flow: dashboards read them from /incidents
+        body = {k: v for k, v in result.items() if k != 'mitigation_actions'}
+        with self._lock:
+            # seq is only known after the insert, so the body is written without it
+            cur = self._conn.execute(
+                "INSERT INTO predictions (replica, prediction_class, body, ts, prediction_id, confidence, "
+                "incident_id, source, features) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (REPLICA_ID, result['prediction_class'], orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY),
+                 ts, result['prediction_id'], float(result['confidence']), result.get('incident_id'),
+                 result.get('source'), blob))
+            result['seq'] = cur.lastrowid
+            self._inserts += 1
+            if self._inserts % PRUNE_EVERY == 0:
+                self._prune(ts, result['seq'])
+        return result
+
+    def features(self, seq: int) -> Optional[Tuple[np.ndarray, int]]:
+        """(features, predicted class id) of a stored prediction from any replica, or None once pruned."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT features, prediction_id FROM predictions WHERE seq = ? AND features IS NOT NULL",
+                (seq,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype="<f4").copy(), int(row[1])
+
+    def _prune(self, now: float, last_seq: int):
+        if RETENTION_HOURS > 0:
+            where, params = "ts < ?", [now - RETENTION_HOURS * 3600]
+        else:
+            where, params = "seq <= ?", [last_seq - self.maxlen * RETAIN_FACTOR]
+        if self._keep_sql:
+            where += f" AND seq NOT IN ({self._keep_sql})"
+            params += self._keep_params
+        self._conn.execute(f"DELETE FROM predictions WHERE {where}", params)
+
+    def history(self, since: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Returns the last `maxlen` predictions across all replicas (oldest first)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, body FROM predictions WHERE seq > ? ORDER BY seq DESC LIMIT ?",
+                (since or 0, self.maxlen)).fetchall()
+        items = []
+        for seq, body in reversed(rows):
+            item = orjson.loads(body)
+            item['seq'] = seq
+            items.append(item)
+        return items
+
+    def latest_seq(self) -> int:
+        """Seq of the newest prediction across all replicas."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM predictions").fetchone()[0]
+
+    def retained(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """Recent tail plus the newest rows of each class (what pruning spares), with per-class counts."""
+        recent = self.history()
+        sampled = []
+        if self._keep_sql:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT seq, body FROM predictions WHERE seq IN ({self._keep_sql})", self._keep_params).fetchall()
+            for seq, body in rows:
+                item = orjson.loads(body)
+                item['seq'] = seq
+                sampled.append(item)
+        kept = {name: 0 for name in self.capacity}
+        for item in sampled:
+            name = item['prediction_class']
+            kept[name if name in self.capacity else OTHER_CLASSES] += 1
+        items = merge_retained(recent, sampled, since)
+        return {"items": items, "recent": len(recent),
+                "sampled": sum(1 for p in items if p['retention'] == 'sampled'),
+                "sampling": {"method": "latest_per_class",
+                             "classes": {name: {"weight": self.weights[name], "capacity": self.capacity[name],
+                                                "seen": None, "kept": kept[name], "keep_probability": None}
+                                         for name in self.capacity}}}
+
+    def export_batches(self, start: Optional[float] = None, end: Optional[float] = None,
+                       batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[List[Tuple]]:
+        """
+        Rows of EXPORT_COLUMNS with start <= ts < end (epoch seconds), oldest
+        first, at most `batch_rows` at a time. Runs on its own read connection
+        (WAL readers never block the writers) and walks the rowid range of the
+        time window, so memory stays bounded by one batch.
+        """
+        window = (start if start is not None else float("-inf"), end if end is not None else float("inf"))
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        try:
+            lo, hi = conn.execute(
+                "SELECT (SELECT MIN(seq) FROM predictions WHERE ts >= ?), (SELECT MAX(seq) FROM predictions WHERE ts < ?)",
+                window).fetchone()
+            if lo is None or hi is None:
+                return
+            query = (f"SELECT {', '.join(EXPORT_COLUMNS)} FROM predictions "
+                     "WHERE seq >= ? AND seq <= ? AND ts >= ? AND ts < ? ORDER BY seq LIMIT ?")
+            while lo <= hi:
+                rows = conn.execute(query, (lo, hi, *window, batch_rows)).fetchall()
+                if not rows:
+                    return
+                yield rows
+                lo = rows[-1][0] + 1
+        finally:
+            conn.close()
+
+    def aggregate(self, window: Optional[float] = None) -> Dict[str, Any]:
+        """Per-class counts, rates and mean confidence over the stored rows (or their last `window` seconds)."""
+        since = time.time() - window if window else float("-inf")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prediction_class, COUNT(*), AVG(confidence), MIN(ts), MAX(ts) FROM predictions "
+                "WHERE ts >= ? GROUP BY prediction_class", (since,)).fetchall()
+        n = sum(count for _, count, _, _, _ in rows)
+        span = window or ((max(r[4] for r in rows) - min(r[3] for r in rows)) if rows else 0.0)
+        classes = {name: {"count": count, "rate_per_s": round(count / span, 3) if span else None,
+                          "mean_confidence": round(mean, 4) if mean is not None else None}
+                   for name, count, mean, _, _ in rows}
+        benign = classes.get("Benign", {}).get("count", 0)
+        return {"rows": n, "window_s": window, "classes": classes,
+                "threat_rate": round((n - benign) / n, 4) if n else None}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            last_seq, = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM predictions").fetchone()
+            per_replica = dict(self._conn.execute(
+                "SELECT replica, COUNT(*) FROM predictions GROUP BY replica").fetchall())
+        return {"backend": "sqlite", "last_seq": last_seq, "replica": REPLICA_ID, "stored_per_replica": per_replica}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Singleton Pattern (same as get_model_loader)
+_store = None
+
+
+def get_prediction_store(maxlen: int = 100):
+    global _store
+    if _store is None:
+        if STORE_BACKEND == "sqlite":
+            _store = SQLitePredictionStore(os.getenv("IDS_PREDICTION_STORE_PATH", DEFAULT_DB_PATH), maxlen)
+        else:
+            _store = MemoryPredictionStore(maxlen)
+    return _store
@@ -0,0 +1,228 @@
+import os
+import sys
+import hmac
+import signal
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import PlainTextResponse
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# Profiling is OFF by default. Nothing in this module runs (no threads, no
+# tracemalloc hooks, no routes) unless IDS_ENABLE_PROFILING=1 is set.
+PROFILING_ENABLED = os.getenv("IDS_ENABLE_PROFILING", "0") == "1"
+# Required for the HTTP endpoints: without it they are not mounted (SIGUSR1 still works)
+ADMIN_TOKEN = os.getenv("IDS_ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("IDS_PROFILE_DIR", tempfile.gettempdir())
+
+DEFAULT_INTERVAL = 0.005  # 200 Hz
+MAX_PROFILE_SECONDS = 60
+SIGNAL_PROFILE_SECONDS = 10
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler based on sys._current_frames().
+    Output is in collapsed-stack format ("frame;frame;frame count"),
+    which flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    def _collapse(self, frame, thread_name: str) -> str:
+        stack = []
+        while frame is not None:
+            stack.append(self._frame_label(frame))
+            frame = frame.f_back
+        stack.append(thread_name)
+        stack.reverse()
+        return ";".join(stack)
+
+    def run(self, seconds: float, interval: Optional[float] = None) -> Counter:
+        """Samples every thread for `seconds` and returns a Counter of collapsed stacks."""
+        interval = interval or self.interval
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A CPU profile is already running.")
+        try:
+            own_ident = threading.get_ident()
+            stacks = Counter()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    stacks[self._collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+                time.sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def render(stacks: Counter) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+class AllocationTracker:
+    """
+    Wraps tracemalloc: start tracing, take snapshots, and diff each snapshot
+    against the previous one to surface allocation hot spots.
+    """
+
+    def __init__(self):
+        self._previous = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, nframes: int = 25):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(nframes)
+            self._previous = self._take()
+
+    def stop(self):
+        with self._lock:
+            self._previous = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    @staticmethod
+    def _take():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def snapshot(self, top: int = 25, group_by: str = "lineno",
+                 path_filter: Optional[str] = None) -> Dict[str, Any]:
+        """Diffs a new snapshot against the previous one. Optionally keeps only paths containing `path_filter`."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running. Start it first.")
+            current = self._take()
+            # The unfiltered snapshot is the next baseline; the filter only applies to this comparison
+            baseline, self._previous = self._previous, current
+            if path_filter:
+                path_only = (tracemalloc.Filter(True, f"*{path_filter}*"),)
+                current = current.filter_traces(path_only)
+                baseline = baseline.filter_traces(path_only) if baseline is not None else None
+
+            stats = current.compare_to(baseline, group_by) if baseline is not None else []
+
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        entries: List[Dict[str, Any]] = []
+        for stat in stats[:top]:
+            frame = stat.traceback[0]
+            entries.append({
+                "location": f"{frame.filename}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024, 2),
+                "size_diff_kb": round(stat.size_diff / 1024, 2),
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            })
+        return {
+            "traced_current_kb": round(traced_current / 1024, 2),
+            "traced_peak_kb": round(traced_peak / 1024, 2),
+            "top": entries,
+        }
+
+
+profiler = SamplingProfiler()
+allocations = AllocationTracker()
+
+
+# ==============================================================================
+# ADMIN ENDPOINTS (mounted only when PROFILING_ENABLED and ADMIN_TOKEN is set)
+# ==============================================================================
+router = APIRouter(prefix="/admin/profile", tags=["admin"])
+
+
+def _check_token(token: Optional[str]):
+    # No configured token never means "open": stack and allocation dumps expose code and data
+    if not ADMIN_TOKEN or token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/cpu", response_class=PlainTextResponse)
+def profile_cpu(seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+                interval: float = Query(DEFAULT_INTERVAL, gt=0, le=1.0),
+                x_admin_token: Optional[str] = Header(None)):
+    """Samples all threads for N seconds and returns collapsed stacks (flamegraph-ready)."""
+    _check_token(x_admin_token)
+    try:
+        stacks = profiler.run(seconds, interval)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(SamplingProfiler.render(stacks))
+
+
+@router.post("/memory/start")
+def memory_start(nframes: int = Query(25, ge=1, le=100), x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    allocations.start(nframes)
+    return {"tracing": True, "nframes": nframes}
+
+
+@router.get("/memory/snapshot")
+def memory_snapshot(top: int = Query(25, ge=1, le=500),
+                    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+                    path_filter: Optional[str] = None,
+                    x_admin_token: Optional[str] = Header(None)):
+    """Returns the allocation diff since the previous snapshot (or since start)."""
+    _check_token(x_admin_token)
+    try:
+        return allocations.snapshot(top=top, group_by=group_by, path_filter=path_filter)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/memory/stop")
+def memory_stop(x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    allocations.stop()
+    return {"tracing": False}
+
+
+# ==============================================================================
+# SIGNAL HANDLER (POSIX)
+# ==============================================================================
+def _dump_profile_to_file():
+    try:
+        stacks = profiler.run(SIGNAL_PROFILE_SECONDS)
+    except RuntimeError as e:
+        print(f"[PROFILE] {e}")
+        return
+    path = os.path.join(PROFILE_DIR, f"ids-api-{os.getpid()}-{int(time.time())}.collapsed")
+    with open(path, "w") as f:
+        f.write(SamplingProfiler.render(stacks))
+    print(f"[PROFILE] CPU profile written to {path}")
+
+
+def install_signal_handler():
+    """`kill -USR1 <pid>` profiles the process for SIGNAL_PROFILE_SECONDS and writes a .collapsed file."""
+    if not hasattr(signal, "SIGUSR1"):
+        return
+
+    def _handler(signum, frame):
+        threading.Thread(target=_dump_profile_to_file, name="profile-dump", daemon=True).start()
+
+    signal.signal(signal.SIGUSR1, _handler)
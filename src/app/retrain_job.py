@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import shlex
+import threading
+import subprocess
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl  # Cross-replica run lock (Unix); without it only this process is serialised
+except ImportError:
+    fcntl = None
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RETRAIN_SCRIPT = os.path.join(PROJECT_ROOT, "src", "models_dev", "retrain.py")
+RUN_DIR = os.getenv("IDS_RETRAIN_DIR", os.path.join(PROJECT_ROOT, "data", "retrain"))  # Logs + results
+
+# Limits of the training process (applied by retrain.py itself), so serving keeps its cores and memory
+THREADS = int(os.getenv("IDS_RETRAIN_THREADS", "1"))           # XGBoost / BLAS threads
+MEMORY_MB = int(os.getenv("IDS_RETRAIN_MEMORY_MB", "4096"))     # Address-space limit (0 = none)
+NICE = int(os.getenv("IDS_RETRAIN_NICE", "10"))                 # Scheduling priority below the API
+CPUS = os.getenv("IDS_RETRAIN_CPUS", "")                        # CPU affinity, e.g. "3" or "2-3,6"
+# Start a run automatically after this many new feedback rows (0 = only via POST /retrain)
+RETRAIN_EVERY = int(os.getenv("IDS_RETRAIN_EVERY", "0"))
+EXTRA_ARGS = shlex.split(os.getenv("IDS_RETRAIN_ARGS", ""))     # e.g. "--rounds 100 --replay-rows 200000"
+# In the registry root: held by the replica whose run is in progress, holds the feedback the last run covered
+LOCK_FILE = ".retrain.lock"
+
+
+class RetrainJob:
+    """
+    One retraining run at a time, in a separate process (src/models_dev/retrain.py).
+
+    The API only spawns the process and waits for it on a daemon thread;
+    training never runs on the serving threads or the event loop. When the
+    run publishes a new registry version, `on_published(key)` is called to
+    swap the default model.
+
+    Replicas share the feedback DB and the registry, so a run also holds an
+    flock on <registry>/.retrain.lock: the file records the last feedback id
+    a run covered, and only the replica that gets the lock starts a run.
+    """
+
+    def __init__(self, on_published: Callable[[str], None], threads: int = THREADS,
+                 memory_mb: int = MEMORY_MB, nice: int = NICE, cpus: str = CPUS, run_dir: str = RUN_DIR):
+        self.on_published = on_published
+        self.threads = threads
+        self.memory_mb = memory_mb
+        self.nice = nice
+        self.cpus = cpus
+        self.run_dir = run_dir
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock_file = None  # Open (and flocked) while a run of this replica is in progress
+        self._lock = threading.Lock()
+        self.current: Optional[Dict[str, Any]] = None
+        self.last: Optional[Dict[str, Any]] = None
+        self.last_feedback_id = 0  # Feedback covered by the last finished run
+        self.runs = 0
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self, base: str, registry_root: str, legacy_dir: Optional[str], feedback_db: str,
+              max_feedback_id: int) -> Dict[str, Any]:
+        """Spawns a run. Raises RuntimeError if one is already running (on any replica)."""
+        run = self.try_start(base, registry_root, legacy_dir, feedback_db, max_feedback_id)
+        if run is None:
+            raise RuntimeError("A retraining run is already in progress")
+        return run
+
+    def try_start(self, base: str, registry_root: str, legacy_dir: Optional[str], feedback_db: str,
+                  max_feedback_id: int, min_new_feedback: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Spawns a run unless one is in progress on any replica, or fewer than
+        `min_new_feedback` rows arrived since the last run. Returns the run or None.
+        """
+        with self._lock:
+            if self.running or not self._acquire(registry_root):
+                return None
+            if max_feedback_id - self.last_feedback_id < min_new_feedback:
+                self._release()
+                return None
+            os.makedirs(self.run_dir, exist_ok=True)
+            run_id = time.strftime("%Y%m%d-%H%M%S")
+            result_path = os.path.join(self.run_dir, f"{run_id}.json")
+            log_path = os.path.join(self.run_dir, f"{run_id}.log")
+            cmd = [sys.executable, RETRAIN_SCRIPT, "--base", base, "--registry", registry_root,
+                   "--feedback-db", feedback_db, "--max-feedback-id", str(max_feedback_id),
+                   "--threads", str(self.threads), "--memory-mb", str(self.memory_mb), "--nice", str(self.nice),
+                   "--result", result_path, *EXTRA_ARGS]
+            if self.cpus:
+                cmd += ["--cpus", self.cpus]
+            if legacy_dir:
+                cmd += ["--legacy-dir", legacy_dir]
+            env = {**os.environ, **{var: str(self.threads) for var in
+                                    ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")}}
+            try:
+                with open(log_path, "wb") as log:
+                    self._proc = subprocess.Popen(cmd, cwd=os.path.dirname(RETRAIN_SCRIPT), env=env, stdout=log,
+                                                  stderr=subprocess.STDOUT)
+            except OSError:
+                self._release()
+                raise
+            self.runs += 1
+            self.current = {"run_id": run_id, "pid": self._proc.pid, "base": base, "started_at": time.time(),
+                            "max_feedback_id": max_feedback_id, "log": log_path, "result": result_path}
+            threading.Thread(target=self._watch, args=(self._proc, self.current), name="retrain-watch",
+                             daemon=True).start()
+        print(f"[RETRAIN] Started run {run_id} (pid {self._proc.pid}, base {base}, "
+              f"feedback <= {max_feedback_id}, {self.threads} threads, nice {self.nice})")
+        return dict(self.current)
+
+    def _watch(self, proc: subprocess.Popen, run: Dict[str, Any]):
+        returncode = proc.wait()
+        try:
+            with open(run["result"]) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            result = {"status": "failed", "reason": f"exit code {returncode}, no result (see log)"}
+        finished = {**run, **result, "returncode": returncode, "finished_at": time.time(),
+                    "wall_s": round(time.time() - run["started_at"], 2)}
+        print(f"[RETRAIN] Run {run['run_id']} {result.get('status')}: {result.get('key') or result.get('reason', '')}")
+        if result.get("status") == "published":
+            try:
+                self.on_published(result["key"])
+                finished["swapped"] = True
+            except Exception as e:
+                finished["swapped"] = False
+                finished["swap_error"] = str(e)
+                print(f"[RETRAIN] Swap to {result['key']} failed: {e}")
+        with self._lock:
+            self.last = finished
+            self.last_feedback_id = run["max_feedback_id"]  # Auto runs wait for RETRAIN_EVERY new rows again
+            if self.current is run:
+                self.current = None
+            self._release(run["max_feedback_id"])
+
+    def _acquire(self, registry_root: str) -> bool:
+        """Takes the cross-replica run lock and adopts the feedback id of the last run (any replica)."""
+        if fcntl is None:
+            return True
+        os.makedirs(registry_root, exist_ok=True)
+        f = open(os.path.join(registry_root, LOCK_FILE), "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()  # Another replica is running one
+            return False
+        f.seek(0)
+        try:
+            self.last_feedback_id = max(self.last_feedback_id, json.loads(f.read() or "{}").get("last_feedback_id", 0))
+        except ValueError:
+            pass
+        self._lock_file = f
+        return True
+
+    def _release(self, last_feedback_id: Optional[int] = None):
+        f, self._lock_file = self._lock_file, None
+        if f is None:
+            return
+        if last_feedback_id is not None:
+            f.seek(0)
+            f.truncate()
+            json.dump({"last_feedback_id": last_feedback_id, "pid": os.getpid(), "finished_at": time.time()}, f)
+            f.flush()
+        f.close()  # Also drops the flock
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"running": self.running, "current": self.current, "last": self.last, "runs": self.runs,
+                    "limits": {"threads": self.threads, "memory_mb": self.memory_mb, "nice": self.nice,
+                               "cpus": self.cpus or None},
+                    "retrain_every": RETRAIN_EVERY, "last_feedback_id": self.last_feedback_id}
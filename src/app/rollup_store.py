@@ -0,0 +1,398 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from app.timeseries import HIST_BINS, TimeSeriesRollups
+except ImportError:
+    try:
+        from src.app.timeseries import HIST_BINS, TimeSeriesRollups
+    except ImportError:
+        from timeseries import HIST_BINS, TimeSeriesRollups
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_ROLLUP_PATH = os.path.join(PROJECT_ROOT, "data", "rollups.db")
+ROLLUP_PATH = os.getenv("IDS_ROLLUP_PATH", DEFAULT_ROLLUP_PATH)  # Empty = disabled
+
+DAY = 86400
+# (name, bucket seconds, retention seconds), finest first. Buckets are aligned to UTC epoch.
+LEVELS = (
+    ("minute", 60, float(os.getenv("IDS_ROLLUP_MINUTE_DAYS", "7")) * DAY),
+    ("hour", 3600, float(os.getenv("IDS_ROLLUP_HOUR_DAYS", "90")) * DAY),
+    ("day", DAY, float(os.getenv("IDS_ROLLUP_DAY_DAYS", "1095")) * DAY),
+)
+FLUSH_SECONDS = float(os.getenv("IDS_ROLLUP_FLUSH", "5"))        # Finished minute buckets -> disk
+FLUSH_GRACE = 2  # A minute is flushed once it ended this long ago (adds racing the minute boundary)
+COMPACT_SECONDS = float(os.getenv("IDS_ROLLUP_COMPACT", "60"))   # Fine -> coarse buckets, retention
+COMPACT_LAG = 120  # A coarse bucket is compacted this long after it ended (late flushes of other replicas)
+DEFAULT_POINTS = 120
+
+
+def _columns(rows: List[tuple], n_classes: int) -> Dict[str, np.ndarray]:
+    """(t, count, conf_sum, conf_min, conf_max, classes blob, hist blob) rows -> column arrays."""
+    classes = np.zeros((len(rows), n_classes), dtype=np.int64)
+    hist = np.zeros((len(rows), HIST_BINS), dtype=np.int64)
+    for k, row in enumerate(rows):
+        counts = np.frombuffer(row[5], dtype="<i8")
+        classes[k, :len(counts)] = counts[:n_classes]  # Rows written before a class was registered are shorter
+        hist[k] = np.frombuffer(row[6], dtype="<i8")
+    return {
+        "t": np.array([r[0] for r in rows], dtype=np.int64),
+        "count": np.array([r[1] for r in rows], dtype=np.int64),
+        "conf_sum": np.array([r[2] for r in rows], dtype=np.float64),
+        "conf_min": np.array([r[3] for r in rows], dtype=np.float64),
+        "conf_max": np.array([r[4] for r in rows], dtype=np.float64),
+        "classes": classes,
+        "hist": hist,
+    }
+
+
+def _group(parts: List[Dict[str, np.ndarray]], resolution: int, n_classes: int) -> Dict[str, np.ndarray]:
+    """Concatenates column sets and merges them into `resolution`-second buckets (sorted by t)."""
+    parts = [p for p in parts if len(p["t"])]
+    if not parts:
+        return _columns([], n_classes)
+    cols = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+    keys = cols["t"] // resolution * resolution
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return {
+        "t": keys[starts],
+        "count": np.add.reduceat(cols["count"][order], starts),
+        "conf_sum": np.add.reduceat(cols["conf_sum"][order], starts),
+        "conf_min": np.minimum.reduceat(cols["conf_min"][order], starts),
+        "conf_max": np.maximum.reduceat(cols["conf_max"][order], starts),
+        "classes": np.add.reduceat(cols["classes"][order], starts, axis=0),
+        "hist": np.add.reduceat(cols["hist"][order], starts, axis=0),
+    }
+
+
+class RollupStore:
+    """
+    Long-horizon traffic trends on local disk (SQLite, WAL): one table per
+    level (minute / hour / day) of per-interval aggregates, never single
+    predictions.
+
+    Predictions are only aggregated once, by TimeSeriesRollups (`source`).
+    A background thread flushes its finished minute buckets every
+    FLUSH_SECONDS (merged into the rows on disk, so API replicas can share
+    the file) and, every
+    COMPACT_SECONDS, compacts finished fine buckets into the next level
+    and drops rows past their level's retention. Each coarse level has a
+    watermark: buckets before it are on disk, later ones are aggregated
+    from the finer level at query time. query() reads the coarsest level
+    whose buckets fit the requested step, so a 30-day range is ~720 hourly
+    rows. Disk use is bounded by retention / bucket width per level.
+    /timeseries reads ranges older than the in-memory rollups through
+    window().
+    """
+
+    def __init__(self, db_path: str, source: TimeSeriesRollups, now: Optional[float] = None):
+        """
+        `now` sets where flushing and compaction start (default: current time;
+        backfills pass an older one).
+        """
+        self.db_path = db_path
+        self.source = source
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()  # Connection, class list, flush position
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rollup_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        for name, _, _ in LEVELS:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS rollup_{name} (
+                    t INTEGER PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    conf_sum REAL NOT NULL,
+                    conf_min REAL NOT NULL,
+                    conf_max REAL NOT NULL,
+                    classes BLOB NOT NULL,
+                    hist BLOB NOT NULL
+                )
+            """)
+        now = time.time() if now is None else now
+        with self._transaction():
+            stored = self._meta("classes")
+            self.class_names = json.loads(stored) if stored else []
+            self.class_names += [name for name in source.class_names if name not in self.class_names]
+            self._set_meta("classes", json.dumps(self.class_names))
+            for name, resolution, _ in LEVELS[1:]:
+                if self._meta(f"watermark_{name}") is None:
+                    self._set_meta(f"watermark_{name}", str(int(now // resolution * resolution)))
+        self._class_idx = {name: i for i, name in enumerate(self.class_names)}
+        self.stats = {"flushed_minutes": 0, "flushes": 0, "compactions": 0, "errors": 0}
+        self._flushed_until = int(now // 60 * 60)  # Source minutes before this are on disk
+        self._last_compact = now
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --------------------------------------------------------------------------
+    # Write path
+    # --------------------------------------------------------------------------
+    def flush(self, upto: Optional[float] = None):
+        """
+        Merges the source's minute buckets that ended before `upto` (default:
+        FLUSH_GRACE seconds ago) and since the last flush into the minute
+        table, and into levels already compacted past them.
+        """
+        upto = time.time() - FLUSH_GRACE if upto is None else upto
+        with self._lock:
+            start, end = self._flushed_until, int(upto // 60 * 60)
+            if end <= start:
+                return
+            source_classes, cols = self.source.minute_buckets(start, end)
+            self._flushed_until = end
+            if not len(cols["t"]):
+                return
+            cols["classes"] = self._align(source_classes, cols["classes"])
+            n = len(self.class_names)
+            with self._transaction():
+                self._set_meta("classes", json.dumps(self.class_names))
+                watermarks = self._watermarks()
+                self._merge(0, cols, n)
+                for level in range(1, len(LEVELS)):
+                    late = cols["t"] < watermarks[level]
+                    if late.any():  # Arrived after compaction (slow replica): fold into that level too
+                        self._merge(level, _group([{k: v[late] for k, v in cols.items()}], LEVELS[level][1], n), n)
+            self.stats["flushes"] += 1
+            self.stats["flushed_minutes"] += len(cols["t"])
+
+    def _align(self, source_classes: List[str], classes: np.ndarray) -> np.ndarray:
+        """Per-class counts in the source's class order -> this file's order (new names are appended)."""
+        for name in source_classes:
+            if name not in self._class_idx:  # Class of another model; persisted with the next flush
+                self._class_idx[name] = len(self.class_names)
+                self.class_names = self.class_names + [name]
+        aligned = np.zeros((len(classes), len(self.class_names)), dtype=np.int64)
+        aligned[:, [self._class_idx[name] for name in source_classes]] = classes
+        return aligned
+
+    def compact(self, now: Optional[float] = None):
+        """Folds finished buckets into the next level, then applies each level's retention."""
+        now = time.time() if now is None else now
+        with self._lock:
+            n = len(self.class_names)
+            with self._transaction():
+                watermarks = self._watermarks()
+                for level in range(1, len(LEVELS)):
+                    name, resolution, _ = LEVELS[level]
+                    target = int((now - COMPACT_LAG) // resolution * resolution)
+                    if target <= watermarks[level]:
+                        continue
+                    parts = self._fetch(level - 1, watermarks[level], target, watermarks, n)
+                    self._merge(level, _group(parts, resolution, n), n)
+                    watermarks[level] = target
+                    self._set_meta(f"watermark_{name}", str(target))
+                for level, (name, _, retention) in enumerate(LEVELS):
+                    cutoff = now - retention
+                    if level + 1 < len(LEVELS):
+                        cutoff = min(cutoff, watermarks[level + 1])  # Never drop rows not compacted yet
+                    self._conn.execute(f"DELETE FROM rollup_{name} WHERE t < ?", (cutoff,))
+            self.stats["compactions"] += 1
+            self._last_compact = now
+
+    # --------------------------------------------------------------------------
+    # Read path
+    # --------------------------------------------------------------------------
+    def pick_level(self, start: float, step: float, now: Optional[float] = None) -> int:
+        """Coarsest level with buckets no wider than `step` whose retention still reaches `start`."""
+        now = time.time() if now is None else now
+        covering = [i for i, (_, _, retention) in enumerate(LEVELS) if now - start <= retention]
+        if not covering:
+            return len(LEVELS) - 1
+        fine_enough = [i for i in covering if LEVELS[i][1] <= step]
+        return fine_enough[-1] if fine_enough else covering[0]
+
+    def _collect(self, start: float, end: float, step: float):
+        """(level, class names, bucket columns with data in [start, end)), unflushed source minutes included."""
+        level = self.pick_level(start, step)
+        with self._lock:
+            source_classes, pending = self.source.minute_buckets(max(start // 60 * 60, self._flushed_until), end)
+            pending["classes"] = self._align(source_classes, pending["classes"])
+            class_names = list(self.class_names)
+            parts = self._fetch(level, start, end, self._watermarks(), len(class_names))
+        return level, class_names, _group(parts + [pending], LEVELS[level][1], len(class_names))
+
+    def query(self, start: float, end: float, points: int = DEFAULT_POINTS,
+              step: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Class mix, threat rate and confidence distribution over [start, end),
+        one point per bucket with data (`t` in epoch ms). `step` (seconds)
+        defaults to (end - start) / points.
+        """
+        end = max(end, start + 1)
+        level, class_names, cols = self._collect(start, end, step or (end - start) / max(points, 1))
+        name, resolution, _ = LEVELS[level]
+
+        count = cols["count"]
+        safe = np.maximum(count, 1)
+        benign = cols["classes"][:, class_names.index("Benign")] if "Benign" in class_names else 0
+        totals = cols["classes"].sum(axis=0)
+        return {
+            "start": start,
+            "end": end,
+            "resolution": name,
+            "resolution_seconds": resolution,
+            "t": (cols["t"] * 1000).tolist(),
+            "count": count.tolist(),
+            "mean": np.round(cols["conf_sum"] / safe, 4).tolist(),
+            "min": np.round(cols["conf_min"], 4).tolist(),
+            "max": np.round(cols["conf_max"], 4).tolist(),
+            "threat_rate": np.round((count - benign) / safe, 4).tolist(),
+            "class_counts": {c: cols["classes"][:, i].tolist() for i, c in enumerate(class_names)},
+            "confidence_bins": np.round(np.linspace(0, 1, HIST_BINS + 1), 2).tolist(),
+            "confidence_hist": cols["hist"].tolist(),
+            "totals": {"count": int(count.sum()),
+                       "classes": {c: int(totals[i]) for i, c in enumerate(class_names)},
+                       "threat_rate": round(float((count.sum() - np.sum(benign)) / count.sum()), 4)
+                       if count.sum() else None},
+        }
+
+    def window(self, start: float, end: float, points: int) -> Tuple[int, List[str], Dict[str, np.ndarray]]:
+        """
+        (resolution, class names, every bucket in [start, end) as columns, empty
+        ones with count 0) at the level with at least `points` buckets: the
+        layout of the in-memory rollups, for /timeseries ranges older than them.
+        """
+        level, class_names, cols = self._collect(start, end, (end - start) / points)
+        resolution = LEVELS[level][1]
+        t = np.arange(start // resolution * resolution, end, resolution, dtype=np.int64)
+        idx = np.searchsorted(t, cols["t"])
+        dense = {
+            "t": t,
+            "count": np.zeros(len(t), dtype=np.int64),
+            "conf_sum": np.zeros(len(t)),
+            "conf_min": np.full(len(t), np.inf),
+            "conf_max": np.full(len(t), -np.inf),
+            "classes": np.zeros((len(t), len(class_names)), dtype=np.int64),
+            "hist": np.zeros((len(t), HIST_BINS), dtype=np.int64),
+        }
+        for key, column in dense.items():
+            if key != "t":
+                column[idx] = cols[key]
+        return resolution, class_names, dense
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            watermarks = self._watermarks()
+            levels = {}
+            for level, (name, resolution, retention) in enumerate(LEVELS):
+                rows, first, last = self._conn.execute(
+                    f"SELECT COUNT(*), MIN(t), MAX(t) FROM rollup_{name}").fetchone()
+                levels[name] = {"resolution_seconds": resolution, "retention_days": retention / DAY,
+                                "rows": rows, "max_rows": int(retention // resolution), "first": first, "last": last,
+                                "watermark": watermarks.get(level)}
+        size = sum(os.path.getsize(self.db_path + suffix) for suffix in ("", "-wal")
+                   if os.path.exists(self.db_path + suffix)) if self.db_path != ":memory:" else None
+        return {"path": self.db_path, "disk_bytes": size, "levels": levels, "flushed_until": self._flushed_until,
+                "classes": list(self.class_names), **self.stats}
+
+    # --------------------------------------------------------------------------
+    # Background flush / compaction
+    # --------------------------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rollup-store", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(FLUSH_SECONDS):
+            try:
+                self.flush()
+                if time.time() - self._last_compact >= COMPACT_SECONDS:
+                    self.compact()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[ROLLUP] Flush/compaction failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush(upto=time.time() + 60)  # Including the current minute
+        with self._lock:
+            self._conn.close()
+
+    # --------------------------------------------------------------------------
+    # SQLite helpers (caller holds self._lock)
+    # --------------------------------------------------------------------------
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")  # Replicas serialize their read-merge-write
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM rollup_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO rollup_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _watermarks(self) -> Dict[int, int]:
+        return {level: int(self._meta(f"watermark_{name}") or 0) for level, (name, _, _) in enumerate(LEVELS)
+                if level > 0}
+
+    def _read(self, level: int, start: float, end: float, n_classes: int) -> Dict[str, np.ndarray]:
+        rows = self._conn.execute(
+            f"SELECT t, count, conf_sum, conf_min, conf_max, classes, hist FROM rollup_{LEVELS[level][0]} "
+            "WHERE t >= ? AND t < ? ORDER BY t", (start, end)).fetchall()
+        return _columns(rows, n_classes)
+
+    def _fetch(self, level: int, start: float, end: float, watermarks: Dict[int, int],
+               n_classes: int) -> List[Dict[str, np.ndarray]]:
+        """Stored rows of `level` in [start, end); the part past its watermark comes from the finer level."""
+        resolution = LEVELS[level][1]
+        start = start // resolution * resolution
+        if level == 0:
+            return [self._read(0, start, end, n_classes)]
+        watermark = watermarks[level]
+        parts = [self._read(level, start, min(end, watermark), n_classes)] if start < watermark else []
+        if end > watermark:
+            parts += self._fetch(level - 1, max(start, watermark), end, watermarks, n_classes)
+        return parts
+
+    def _merge(self, level: int, cols: Dict[str, np.ndarray], n_classes: int):
+        """Adds bucket columns to the rows already stored at `level`."""
+        if not len(cols["t"]):
+            return
+        existing = self._read(level, int(cols["t"][0]), int(cols["t"][-1]) + 1, n_classes)
+        merged = _group([existing, cols], LEVELS[level][1], n_classes)
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO rollup_{LEVELS[level][0]} "
+            "(t, count, conf_sum, conf_min, conf_max, classes, hist) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(t, count, conf_sum, conf_min, conf_max, classes.astype("<i8").tobytes(), hist.astype("<i8").tobytes())
+             for t, count, conf_sum, conf_min, conf_max, classes, hist in zip(
+                 merged["t"].tolist(), merged["count"].tolist(), merged["conf_sum"].tolist(),
+                 merged["conf_min"].tolist(), merged["conf_max"].tolist(), merged["classes"], merged["hist"])])
+
+
+# Singleton, built at API startup once the class map is known
+_store: Optional[RollupStore] = None
+
+
+def init_rollup_store(source: TimeSeriesRollups) -> Optional[RollupStore]:
+    """Persists `source`'s minute buckets and serves its ranges past the in-memory retention."""
+    global _store
+    if _store is None and ROLLUP_PATH:
+        _store = RollupStore(ROLLUP_PATH, source)
+        source.archive = _store
+        _store.start()
+    return _store
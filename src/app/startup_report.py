@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import time
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# Modules that must not be imported by the API module itself (the ML stack is
+# loaded once by ModelLoader at startup, pyarrow/pandas only on the paths that use them)
+HEAVY_MODULES = ("pandas", "pyarrow", "sklearn", "xgboost", "scipy", "joblib", "plotly", "streamlit")
+
+# IDS_IMPORT_PROFILE=1 adds a per-module import profile (python -X importtime
+# in a child process, off the startup path) to the startup report
+IMPORT_PROFILE = os.getenv("IDS_IMPORT_PROFILE", "0") == "1"
+PROFILE_TOP = 15
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was started (Linux /proc), or None."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupReport:
+    """Wall time of each cold-start phase (imports, model load, ...) of this process."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.import_profile: Optional[Dict[str, Any]] = None
+        self.ready_after: Optional[float] = None
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def ready(self):
+        self.ready_after = process_age()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "phases_ms": {name: round(s * 1000, 1) for name, s in self.phases.items()},
+            "total_ms": round(sum(self.phases.values()) * 1000, 1),
+            "ready_after_process_start_ms": round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+            "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+            "import_profile": self.import_profile,
+        }
+
+    def print(self, prefix: str = "[STARTUP]"):
+        parts = " | ".join(f"{name} {s * 1000:.0f}ms" for name, s in self.phases.items())
+        ready = f" | ready {self.ready_after * 1000:.0f}ms after process start" if self.ready_after is not None else ""
+        print(f"{prefix} {parts}{ready}")
+
+
+# ==============================================================================
+# IMPORT PROFILE (python -X importtime)
+# ==============================================================================
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """`-X importtime` lines -> [{module, self_ms, cumulative_ms, depth}]."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _IMPORTTIME_LINE.match(line)
+        if m:
+            rows.append({"module": m.group(4), "self_ms": int(m.group(1)) / 1000,
+                         "cumulative_ms": int(m.group(2)) / 1000, "depth": len(m.group(3)) // 2})
+    return rows
+
+
+def profile_imports(module: str, cwd: Optional[str] = None, python: str = sys.executable,
+                    top: int = PROFILE_TOP) -> Dict[str, Any]:
+    """Imports `module` in a fresh interpreter under -X importtime and summarises the cost."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=cwd,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    target = next((r for r in reversed(rows) if r["module"] == module), None)
+    packages = {}  # Self time summed per top-level package
+    for r in rows:
+        name = r["module"].split(".")[0]
+        packages[name] = packages.get(name, 0.0) + r["self_ms"]
+    return {
+        "module": module,
+        "import_ms": target["cumulative_ms"] if target else None,
+        "interpreter_wall_ms": round(wall * 1000, 1),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in packages],
+        "top_packages_ms": dict(sorted(((k, round(v, 1)) for k, v in packages.items()),
+                                       key=lambda kv: kv[1], reverse=True)[:top]),
+        "top_modules_self_ms": [{"module": r["module"], "self_ms": r["self_ms"]}
+                                for r in sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top]],
+    }
@@ -0,0 +1,214 @@
+import time
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# (bucket seconds, buckets kept): 1s for 1h, 10s for 24h, 1min for 24h. The minute
+# buckets are also what RollupStore persists; older ranges are served from it.
+RESOLUTIONS = ((1, 3600), (10, 8640), (60, 1440))
+HIST_BINS = 10  # Confidence histogram over [0, 1] per bucket
+DEFAULT_POINTS = 120
+MAX_POINTS = 2000
+METHODS = ("minmax", "lttb")
+
+
+class _Rollup:
+    """Ring of fixed-width time buckets: count, confidence sum/min/max/histogram and per-class counts."""
+
+    def __init__(self, resolution: int, capacity: int, n_classes: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.ids = np.full(capacity, -1, dtype=np.int64)  # Bucket number held by each slot
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.conf_sum = np.zeros(capacity, dtype=np.float64)
+        self.conf_min = np.full(capacity, np.inf)
+        self.conf_max = np.full(capacity, -np.inf)
+        self.classes = np.zeros((capacity, n_classes), dtype=np.int64)
+        self.hist = np.zeros((capacity, HIST_BINS), dtype=np.int64)
+
+    def add_class(self):
+        self.classes = np.pad(self.classes, ((0, 0), (0, 1)))
+
+    def add(self, ts: float, confidence: float, class_idx: int):
+        bucket = int(ts // self.resolution)
+        slot = bucket % self.capacity
+        if self.ids[slot] != bucket:  # Slot still holds an expired bucket: recycle it
+            self.ids[slot] = bucket
+            self.count[slot] = 0
+            self.conf_sum[slot] = 0.0
+            self.conf_min[slot] = np.inf
+            self.conf_max[slot] = -np.inf
+            self.classes[slot] = 0
+            self.hist[slot] = 0
+        self.count[slot] += 1
+        self.conf_sum[slot] += confidence
+        if confidence < self.conf_min[slot]:
+            self.conf_min[slot] = confidence
+        if confidence > self.conf_max[slot]:
+            self.conf_max[slot] = confidence
+        self.classes[slot, class_idx] += 1
+        self.hist[slot, min(max(int(confidence * HIST_BINS), 0), HIST_BINS - 1)] += 1
+
+    def window(self, start: float, end: float) -> Dict[str, np.ndarray]:
+        """Every bucket in [start, end), oldest first; buckets with no data (or expired) have count 0."""
+        first = int(start // self.resolution)
+        last = int(np.ceil(end / self.resolution))
+        buckets = np.arange(max(first, last - self.capacity), last, dtype=np.int64)
+        slots = buckets % self.capacity
+        valid = self.ids[slots] == buckets
+        count = np.where(valid, self.count[slots], 0)
+        return {
+            "t": buckets * self.resolution,
+            "count": count,
+            "conf_sum": np.where(valid, self.conf_sum[slots], 0.0),
+            "conf_min": np.where(valid, self.conf_min[slots], np.inf),
+            "conf_max": np.where(valid, self.conf_max[slots], -np.inf),
+            "classes": np.where(valid[:, None], self.classes[slots], 0),
+            "hist": np.where(valid[:, None], self.hist[slots], 0),
+        }
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the visual shape of (x, y)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 inner buckets
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+class TimeSeriesRollups:
+    """
+    Multi-resolution rollups of prediction confidence and per-class counts.
+
+    This is the only per-prediction aggregation: add() updates one bucket
+    per resolution in O(1), and RollupStore (if enabled, set as `archive`)
+    persists the finished minute buckets. series() picks the coarsest
+    resolution that still gives at least `points` buckets for the requested
+    range (within its retention; older ranges are read from the archive)
+    and reduces those buckets to at most `points` output points, so the
+    payload and chart cost depend on `points`, not on the range or the
+    flow rate:
+
+      - minmax: contiguous groups of buckets -> mean, min, max, count, class rates
+      - lttb:   Largest-Triangle-Three-Buckets picks `points` representative buckets
+    """
+
+    def __init__(self, class_names: Sequence[str], resolutions=RESOLUTIONS):
+        self.class_names = list(class_names)
+        self._class_idx = {name: i for i, name in enumerate(self.class_names)}
+        self._rollups = [_Rollup(res, cap, len(self.class_names)) for res, cap in resolutions]
+        self._minutes = next(r for r in self._rollups if r.resolution == 60)
+        self.retention = max(r.resolution * r.capacity for r in self._rollups)
+        self.archive = None  # RollupStore for ranges older than `retention`
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, confidence: float, class_name: str, ts: Optional[float] = None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            class_idx = self._class_idx.get(class_name)
+            if class_idx is None:  # Class of another model: one more column
+                class_idx = self._class_idx[class_name] = len(self.class_names)
+                self.class_names = self.class_names + [class_name]
+                for rollup in self._rollups:
+                    rollup.add_class()
+            self.total += 1
+            for rollup in self._rollups:
+                rollup.add(ts, confidence, class_idx)
+
+    def minute_buckets(self, start: float, end: float):
+        """(class names, columns of the minute buckets with data in [start, end)), for RollupStore."""
+        with self._lock:
+            w = self._minutes.window(start, end)
+            class_names = list(self.class_names)
+        has_data = w["count"] > 0
+        return class_names, {key: values[has_data] for key, values in w.items()}
+
+    def _pick(self, start: float, end: float, points: int, now: float) -> _Rollup:
+        covering = [r for r in self._rollups if now - start <= r.resolution * r.capacity]
+        if not covering:
+            return self._rollups[-1]
+        detailed = [r for r in covering if (end - start) / r.resolution >= points]
+        return detailed[-1] if detailed else covering[0]
+
+    def series(self, start: float, end: float, points: int = DEFAULT_POINTS,
+               method: str = "minmax") -> Dict[str, Any]:
+        points = max(2, min(points, MAX_POINTS))
+        end = max(end, start + 1)
+        now = time.time()
+        if self.archive is not None and now - start > self.retention:
+            resolution, class_names, w = self.archive.window(start, end, points)
+        else:
+            rollup = self._pick(start, end, points, now)
+            with self._lock:
+                w = rollup.window(start, end)
+                class_names = list(self.class_names)
+            resolution = rollup.resolution
+
+        if method == "lttb":
+            has_data = np.flatnonzero(w["count"])
+            mean = w["conf_sum"][has_data] / w["count"][has_data]
+            keep = has_data[lttb_indices(w["t"][has_data].astype(np.float64), mean, points)]
+            t, count = w["t"][keep], w["count"][keep]
+            conf_sum, conf_min, conf_max = w["conf_sum"][keep], w["conf_min"][keep], w["conf_max"][keep]
+            classes = w["classes"][keep]
+            seconds = np.full(len(keep), resolution, dtype=np.float64)
+        else:
+            # Contiguous groups of buckets, one output point each
+            n = len(w["t"])
+            starts = np.unique(np.linspace(0, n, min(points, n) + 1).astype(np.int64)[:-1])
+            t = w["t"][starts]
+            count = np.add.reduceat(w["count"], starts)
+            conf_sum = np.add.reduceat(w["conf_sum"], starts)
+            conf_min = np.minimum.reduceat(w["conf_min"], starts)
+            conf_max = np.maximum.reduceat(w["conf_max"], starts)
+            classes = np.add.reduceat(w["classes"], starts, axis=0)
+            seconds = np.diff(np.append(starts, n)) * float(resolution)
+
+        has = count > 0
+        safe = np.maximum(count, 1)
+        return {
+            "start": start,
+            "end": end,
+            "resolution_seconds": resolution,
+            "method": method,
+            "t": (t * 1000).tolist(),  # Epoch milliseconds (bucket start)
+            "count": count.tolist(),
+            "mean": _nullable(conf_sum / safe, has),
+            "min": _nullable(conf_min, has),
+            "max": _nullable(conf_max, has),
+            "rate": np.round(count / seconds, 4).tolist(),  # Flows per second
+            "class_rates": {name: np.round(classes[:, i] / seconds, 4).tolist()
+                            for i, name in enumerate(class_names)},
+        }
+
+
+def _nullable(values: np.ndarray, mask: np.ndarray) -> List[Optional[float]]:
+    """Rounded floats, None where the point has no data (a gap in the chart)."""
+    return [round(float(v), 4) if m else None for v, m in zip(values, mask)]
+
+
+# Singleton, built at API startup once the class map is known
+_rollups: Optional[TimeSeriesRollups] = None
+
+
+def init_timeseries(class_names: Sequence[str]) -> TimeSeriesRollups:
+    global _rollups
+    if _rollups is None:
+        _rollups = TimeSeriesRollups(class_names)
+    return _rollups
@@ -0,0 +1,127 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# Producers (simulator, sensors) send these headers with POST /predict.
+# X-Emitted-At is epoch seconds; producer and API share the host clock.
+TRACE_HEADER = "X-Trace-Id"
+EMITTED_HEADER = "X-Emitted-At"
+
+WINDOW = int(os.getenv("IDS_TRACE_WINDOW", "2048"))        # Latest samples per hop for the percentiles
+CAPACITY = int(os.getenv("IDS_TRACE_CAPACITY", "10000"))   # Traced predictions kept for display reports
+
+# Pipeline hops, in order: (name, start mark, end mark). Marks are epoch seconds.
+#   emitted -> received (network) -> admitted (admission queue) -> inference_start (threadpool)
+#   -> inference_end -> stored (bookkeeping + store) -> dashboard received (poll) -> rendered
+HOPS = (
+    ("network", "emitted", "received"),
+    ("queue", "received", "admitted"),
+    ("dispatch", "admitted", "inference_start"),
+    ("inference", "inference_start", "inference_end"),
+    ("store", "inference_end", "stored"),
+    ("poll", "stored", "display_received"),
+    ("render", "display_received", "rendered"),
+)
+END_TO_END = ("end_to_end", "emitted", "rendered")
+PERCENTILES = (50, 90, 99)
+
+
+class LatencyTracer:
+    """
+    Per-hop latency of the detection-to-display pipeline.
+
+    The API stamps each request (received, admitted, inference start/end,
+    stored); dashboards report when they received and rendered a prediction
+    (POST /traces/display, by seq). Every completed hop becomes one sample
+    in a bounded per-hop window; summary() turns the windows into
+    percentiles and names the hop with the largest median.
+    """
+
+    def __init__(self, window: int = WINDOW, capacity: int = CAPACITY):
+        hop_names = [name for name, _, _ in HOPS] + [END_TO_END[0]]
+        self._samples = {name: deque(maxlen=window) for name in hop_names}
+        self._traces = OrderedDict()  # seq -> marks of traced predictions (oldest first)
+        self._by_id: Dict[str, int] = {}
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+    def _add_hops(self, marks: Dict[str, float], hops):
+        for name, start, end in hops:
+            if start in marks and end in marks:
+                self._samples[name].append(max(0.0, marks[end] - marks[start]))
+
+    def record(self, marks: Dict[str, float], seq: Optional[int] = None, trace_id: Optional[str] = None):
+        """API-side marks of one prediction (or one batch). Traced ones are kept for display reports."""
+        with self._lock:
+            self._add_hops(marks, HOPS[:5])
+            if trace_id is None or seq is None:
+                return
+            self._traces[seq] = {"trace_id": trace_id, "seq": seq, **marks}
+            self._by_id[trace_id] = seq
+            while len(self._traces) > self.capacity:
+                _, old = self._traces.popitem(last=False)
+                self._by_id.pop(old["trace_id"], None)
+
+    def record_display(self, reports: List[Dict[str, Any]], client: str = "dashboard") -> int:
+        """[{seq, received, rendered}] from a dashboard. Returns how many matched a known trace."""
+        matched = 0
+        with self._lock:
+            for report in reports:
+                trace = self._traces.get(report.get("seq"))
+                if trace is None or "rendered" in trace:
+                    continue  # Unknown/expired, or already reported by another dashboard
+                marks = {**trace, "display_received": report["received"], "rendered": report["rendered"]}
+                self._add_hops(marks, HOPS[5:] + (END_TO_END,))
+                trace.update(display_received=report["received"], rendered=report["rendered"], client=client)
+                matched += 1
+        return matched
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            seq = self._by_id.get(trace_id)
+            trace = dict(self._traces[seq]) if seq is not None else None
+        if trace is None:
+            return None
+        trace["hops_ms"] = {name: round((trace[end] - trace[start]) * 1000, 3)
+                            for name, start, end in HOPS + (END_TO_END,) if start in trace and end in trace}
+        return trace
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            windows = {name: np.array(samples) for name, samples in self._samples.items()}
+        hops = {}
+        for name, values in windows.items():
+            if not len(values):
+                hops[name] = {"count": 0}
+                continue
+            ms = values * 1000
+            hops[name] = {"count": len(ms), "mean_ms": round(float(ms.mean()), 3),
+                          **{f"p{p}_ms": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))},
+                          "max_ms": round(float(ms.max()), 3)}
+        medians = {name: h["p50_ms"] for name, h in hops.items() if h["count"] and name != END_TO_END[0]}
+        return {"hops": hops, "bottleneck": max(medians, key=medians.get) if medians else None,
+                "traced": len(self._traces), "window": self._samples[END_TO_END[0]].maxlen}
+
+
+def parse_emitted(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# Singleton
+_tracer: Optional[LatencyTracer] = None
+
+
+def get_tracer() -> LatencyTracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = LatencyTracer()
+    return _tracer
@@ -1,100 +1,155 @@
-from pydantic import BaseModel, Field, ConfigDict
+import os
+import re
+from operator import itemgetter
+from typing import List, Optional, Tuple
 
-class NetworkTrafficData(BaseModel):
+import numpy as np
+import orjson
+from pydantic import BaseModel, Field, ConfigDict, create_model
+from starlette.responses import JSONResponse
+
+# ==============================================================================
+# FEATURE SCHEMA (generated once from feature_list.txt)
+# ==============================================================================
+# feature_list.txt is written by inspect_models.py straight from the scaler's
+# feature_names_in_, so it is the single source of truth for field order.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FEATURE_LIST_PATH = os.path.join(PROJECT_ROOT, "feature_list.txt")
+
+# Features that are categorical codes rather than measurements
+INT_FEATURES = {"Protocol"}
+
+
+def load_feature_names(path: str = FEATURE_LIST_PATH) -> Tuple[str, ...]:
+    with open(path, "r") as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+
+def to_field_name(alias: str) -> str:
+    """'Flow Byts/s' -> 'Flow_Byts_s'"""
+    return re.sub(r"\W+", "_", alias).strip("_")
+
+
+FEATURE_NAMES = load_feature_names()
+FIELD_NAMES = tuple(to_field_name(name) for name in FEATURE_NAMES)
+N_FEATURES = len(FEATURE_NAMES)
+
+
+class _TrafficBase(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    def to_array(self) -> np.ndarray:
+        """Converts model to a float64 vector in the correct order for the model."""
+        return np.fromiter((getattr(self, name) for name in FIELD_NAMES), dtype=np.float64, count=N_FEATURES)
+
+
+NetworkTrafficData = create_model(
+    "NetworkTrafficData",
+    __base__=_TrafficBase,
+    __doc__=(
+        "Model input representing the 69 features required by the Scaler/Model.\n"
+        "Generated from feature_list.txt; aliases match the scaler feature names exactly."
+    ),
+    **{
+        field: (int if alias in INT_FEATURES else float, Field(..., alias=alias))
+        for field, alias in zip(FIELD_NAMES, FEATURE_NAMES)
+    },
+)
+
+
+class DisplayReport(BaseModel):
+    """When a dashboard received (poll) and rendered one prediction, epoch seconds."""
+    seq: int
+    received: float
+    rendered: float
+
+
+class DisplayReports(BaseModel):
+    client: str = "dashboard"
+    items: List[DisplayReport]
+
+
+class FeedbackReport(BaseModel):
+    """Analyst label for a stored prediction (`seq`) or for a flow given by its `features`."""
+    label: str
+    seq: Optional[int] = None
+    features: Optional[NetworkTrafficData] = None  # Same body as /predict, validated the same way
+    analyst: Optional[str] = None
+    note: Optional[str] = None
+
+
+# ==============================================================================
+# FAST DECODE / ENCODE
+# ==============================================================================
+class FeatureDecodeError(ValueError):
+    """Raised when a request body cannot be decoded into a feature vector."""
+
+
+_NUMBER_TYPES = {int, float}
+_get_features = itemgetter(*FEATURE_NAMES)
+
+
+# Optional, non-feature keys naming where a flow came from (used to group incidents)
+SOURCE_KEYS = ("source", "Src IP", "src_ip")
+
+
+def decode_features(body: bytes, strict: bool = True) -> np.ndarray:
     """
-    Model input representing the 69 features required by the Scaler/Model.
-    Field names match the scaler feature names exactly.
+    Decodes a JSON body straight into a float64 feature vector, skipping model
+    construction. Strict mode requires every alias, accepts only JSON numbers
+    and rejects NaN/Infinity. Lax mode falls back to the pydantic model, which
+    also accepts field names and numeric strings.
     """
-    model_config = ConfigDict(populate_by_name=True)
+    return _decode_obj(_parse(body), strict)
+
+
+def decode_flow(body: bytes, strict: bool = True) -> Tuple[np.ndarray, Optional[str]]:
+    """decode_features() plus the optional flow source (first of SOURCE_KEYS present)."""
+    obj = _parse(body)
+    source = next((obj[k] for k in SOURCE_KEYS if obj.get(k) is not None), None)
+    return _decode_obj(obj, strict), (str(source) if source is not None else None)
+
+
+def _parse(body: bytes) -> dict:
+    try:
+        obj = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise FeatureDecodeError(f"Invalid JSON: {e}")
+    if not isinstance(obj, dict):
+        raise FeatureDecodeError("Request body must be a JSON object.")
+    return obj
+
+
+def _decode_obj(obj: dict, strict: bool) -> np.ndarray:
+    try:
+        values = _get_features(obj)
+    except KeyError:
+        if not strict:
+            return _decode_lax(obj)
+        missing = [name for name in FEATURE_NAMES if name not in obj]
+        raise FeatureDecodeError(f"Missing {len(missing)} feature(s): {missing[:5]}")
+
+    if not _NUMBER_TYPES.issuperset(map(type, values)):
+        if not strict:
+            return _decode_lax(obj)
+        bad = [name for name, v in zip(FEATURE_NAMES, values) if type(v) not in _NUMBER_TYPES]
+        raise FeatureDecodeError(f"Non-numeric value for feature(s): {bad[:5]}")
+
+    features = np.array(values, dtype=np.float64)
+    if strict and not np.isfinite(features).all():
+        raise FeatureDecodeError("Feature values must be finite.")
+    return features
+
+
+def _decode_lax(obj: dict) -> np.ndarray:
+    try:
+        return NetworkTrafficData.model_validate(obj).to_array()
+    except ValueError as e:
+        raise FeatureDecodeError(str(e))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (also handles numpy scalars/arrays)."""
 
-    Protocol: int
-    Flow_Duration: float = Field(..., alias='Flow Duration')
-    Tot_Fwd_Pkts: float = Field(..., alias='Tot Fwd Pkts')
-    Tot_Bwd_Pkts: float = Field(..., alias='Tot Bwd Pkts')
-    TotLen_Fwd_Pkts: float = Field(..., alias='TotLen Fwd Pkts')
-    TotLen_Bwd_Pkts: float = Field(..., alias='TotLen Bwd Pkts')
-    Fwd_Pkt_Len_Max: float = Field(..., alias='Fwd Pkt Len Max')
-    Fwd_Pkt_Len_Min: float = Field(..., alias='Fwd Pkt Len Min')
-    Fwd_Pkt_Len_Mean: float = Field(..., alias='Fwd Pkt Len Mean')
-    Fwd_Pkt_Len_Std: float = Field(..., alias='Fwd Pkt Len Std')
-    Bwd_Pkt_Len_Max: float = Field(..., alias='Bwd Pkt Len Max')
-    Bwd_Pkt_Len_Min: float = Field(..., alias='Bwd Pkt Len Min')
-    Bwd_Pkt_Len_Mean: float = Field(..., alias='Bwd Pkt Len Mean')
-    Bwd_Pkt_Len_Std: float = Field(..., alias='Bwd Pkt Len Std')
-    Flow_Byts_s: float = Field(..., alias='Flow Byts/s')
-    Flow_Pkts_s: float = Field(..., alias='Flow Pkts/s')
-    Flow_IAT_Mean: float = Field(..., alias='Flow IAT Mean')
-    Flow_IAT_Std: float = Field(..., alias='Flow IAT Std')
-    Flow_IAT_Max: float = Field(..., alias='Flow IAT Max')
-    Flow_IAT_Min: float = Field(..., alias='Flow IAT Min')
-    Fwd_IAT_Tot: float = Field(..., alias='Fwd IAT Tot')
-    Fwd_IAT_Mean: float = Field(..., alias='Fwd IAT Mean')
-    Fwd_IAT_Std: float = Field(..., alias='Fwd IAT Std')
-    Fwd_IAT_Max: float = Field(..., alias='Fwd IAT Max')
-    Fwd_IAT_Min: float = Field(..., alias='Fwd IAT Min')
-    Bwd_IAT_Tot: float = Field(..., alias='Bwd IAT Tot')
-    Bwd_IAT_Mean: float = Field(..., alias='Bwd IAT Mean')
-    Bwd_IAT_Std: float = Field(..., alias='Bwd IAT Std')
-    Bwd_IAT_Max: float = Field(..., alias='Bwd IAT Max')
-    Bwd_IAT_Min: float = Field(..., alias='Bwd IAT Min')
-    Fwd_PSH_Flags: float = Field(..., alias='Fwd PSH Flags')
-    Fwd_URG_Flags: float = Field(..., alias='Fwd URG Flags')
-    Fwd_Header_Len: float = Field(..., alias='Fwd Header Len')
-    Bwd_Header_Len: float = Field(..., alias='Bwd Header Len')
-    Fwd_Pkts_s: float = Field(..., alias='Fwd Pkts/s')
-    Bwd_Pkts_s: float = Field(..., alias='Bwd Pkts/s')
-    Pkt_Len_Min: float = Field(..., alias='Pkt Len Min')
-    Pkt_Len_Max: float = Field(..., alias='Pkt Len Max')
-    Pkt_Len_Mean: float = Field(..., alias='Pkt Len Mean')
-    Pkt_Len_Std: float = Field(..., alias='Pkt Len Std')
-    Pkt_Len_Var: float = Field(..., alias='Pkt Len Var')
-    FIN_Flag_Cnt: float = Field(..., alias='FIN Flag Cnt')
-    SYN_Flag_Cnt: float = Field(..., alias='SYN Flag Cnt')
-    RST_Flag_Cnt: float = Field(..., alias='RST Flag Cnt')
-    PSH_Flag_Cnt: float = Field(..., alias='PSH Flag Cnt')
-    ACK_Flag_Cnt: float = Field(..., alias='ACK Flag Cnt')
-    URG_Flag_Cnt: float = Field(..., alias='URG Flag Cnt')
-    CWE_Flag_Count: float = Field(..., alias='CWE Flag Count')
-    ECE_Flag_Cnt: float = Field(..., alias='ECE Flag Cnt')
-    Down_Up_Ratio: float = Field(..., alias='Down/Up Ratio')
-    Pkt_Size_Avg: float = Field(..., alias='Pkt Size Avg')
-    Fwd_Seg_Size_Avg: float = Field(..., alias='Fwd Seg Size Avg')
-    Bwd_Seg_Size_Avg: float = Field(..., alias='Bwd Seg Size Avg')
-    Subflow_Fwd_Pkts: float = Field(..., alias='Subflow Fwd Pkts')
-    Subflow_Fwd_Byts: float = Field(..., alias='Subflow Fwd Byts')
-    Subflow_Bwd_Pkts: float = Field(..., alias='Subflow Bwd Pkts')
-    Subflow_Bwd_Byts: float = Field(..., alias='Subflow Bwd Byts')
-    Init_Fwd_Win_Byts: float = Field(..., alias='Init Fwd Win Byts')
-    Init_Bwd_Win_Byts: float = Field(..., alias='Init Bwd Win Byts')
-    Fwd_Act_Data_Pkts: float = Field(..., alias='Fwd Act Data Pkts')
-    Fwd_Seg_Size_Min: float = Field(..., alias='Fwd Seg Size Min')
-    Active_Mean: float = Field(..., alias='Active Mean')
-    Active_Std: float = Field(..., alias='Active Std')
-    Active_Max: float = Field(..., alias='Active Max')
-    Active_Min: float = Field(..., alias='Active Min')
-    Idle_Mean: float = Field(..., alias='Idle Mean')
-    Idle_Std: float = Field(..., alias='Idle Std')
-    Idle_Max: float = Field(..., alias='Idle Max')
-    Idle_Min: float = Field(..., alias='Idle Min')
-
-    def to_array(self):
-        """Converts model to a list of values in the correct order for the model."""
-        return [
-            self.Protocol, self.Flow_Duration, self.Tot_Fwd_Pkts, self.Tot_Bwd_Pkts,
-            self.TotLen_Fwd_Pkts, self.TotLen_Bwd_Pkts, self.Fwd_Pkt_Len_Max, self.Fwd_Pkt_Len_Min,
-            self.Fwd_Pkt_Len_Mean, self.Fwd_Pkt_Len_Std, self.Bwd_Pkt_Len_Max, self.Bwd_Pkt_Len_Min,
-            self.Bwd_Pkt_Len_Mean, self.Bwd_Pkt_Len_Std, self.Flow_Byts_s, self.Flow_Pkts_s,
-            self.Flow_IAT_Mean, self.Flow_IAT_Std, self.Flow_IAT_Max, self.Flow_IAT_Min,
-            self.Fwd_IAT_Tot, self.Fwd_IAT_Mean, self.Fwd_IAT_Std, self.Fwd_IAT_Max, self.Fwd_IAT_Min,
-            self.Bwd_IAT_Tot, self.Bwd_IAT_Mean, self.Bwd_IAT_Std, self.Bwd_IAT_Max, self.Bwd_IAT_Min,
-            self.Fwd_PSH_Flags, self.Fwd_URG_Flags, self.Fwd_Header_Len, self.Bwd_Header_Len,
-            self.Fwd_Pkts_s, self.Bwd_Pkts_s, self.Pkt_Len_Min, self.Pkt_Len_Max,
-            self.Pkt_Len_Mean, self.Pkt_Len_Std, self.Pkt_Len_Var, self.FIN_Flag_Cnt,
-            self.SYN_Flag_Cnt, self.RST_Flag_Cnt, self.PSH_Flag_Cnt, self.ACK_Flag_Cnt,
-            self.URG_Flag_Cnt, self.CWE_Flag_Count, self.ECE_Flag_Cnt, self.Down_Up_Ratio,
-            self.Pkt_Size_Avg, self.Fwd_Seg_Size_Avg, self.Bwd_Seg_Size_Avg, self.Subflow_Fwd_Pkts,
-            self.Subflow_Fwd_Byts, self.Subflow_Bwd_Pkts, self.Subflow_Bwd_Byts,
-            self.Init_Fwd_Win_Byts, self.Init_Bwd_Win_Byts, self.Fwd_Act_Data_Pkts,
-            self.Fwd_Seg_Size_Min, self.Active_Mean, self.Active_Std, self.Active_Max,
-            self.Active_Min, self.Idle_Mean, self.Idle_Std, self.Idle_Max, self.Idle_Min
-        ]
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
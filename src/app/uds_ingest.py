@@ -0,0 +1,214 @@
+import os
+import socket
+import struct
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from app.admission import Shed
+except ImportError:
+    try:
+        from src.app.admission import Shed
+    except ImportError:
+        from admission import Shed
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+# Unix domain socket for on-box sensors (empty = disabled). Same host only, no HTTP/JSON.
+UDS_PATH = os.getenv("IDS_UDS_PATH", "")
+UDS_MODE = 0o660  # Socket file permissions: owner + group (put sensors in the API's group)
+MAX_BATCH = int(os.getenv("IDS_UDS_MAX_BATCH", "4096"))  # Flows per frame
+
+# ==============================================================================
+# PROTOKOL (little-endian)
+# ==============================================================================
+# Request:  header (magic "IDSQ", n_records u32, n_features u16, reserved u16)
+#           + n_records * n_features float32 (feature_list.txt order, raw/unscaled)
+# Response: header (magic "IDSR", count u32, status u16, reserved u16)
+#           status OK:   + count * RESULT_DTYPE records, same order as the request
+#           otherwise:   + count bytes of UTF-8 error message
+# Frames on one connection are answered in order, so a sensor may pipeline them.
+REQUEST_MAGIC = b"IDSQ"
+RESPONSE_MAGIC = b"IDSR"
+HEADER = struct.Struct("<4sIHH")
+
+STATUS_OK = 0
+STATUS_ERROR = 1      # Bad frame or inference error (a bad header also closes the connection)
+STATUS_OVERLOADED = 2  # Shed by admission control (HTTP 429), retry later
+
+RESULT_DTYPE = np.dtype([
+    ("seq", "<i8"),            # Prediction store seq (same as /history)
+    ("incident_id", "<i8"),    # 0 for Benign
+    ("confidence", "<f4"),
+    ("prediction_id", "<i4"),  # Class index, see the model's class map (/models)
+])
+
+
+class IngestError(Exception):
+    """Non-OK response frame (client side)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"status {status}: {message}")
+        self.status = status
+
+
+def encode_request(matrix) -> bytes:
+    """(n, n_features) array -> one request frame."""
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    return HEADER.pack(REQUEST_MAGIC, matrix.shape[0], matrix.shape[1], 0) + matrix.tobytes()
+
+
+def encode_results(results: List[Dict[str, Any]]) -> bytes:
+    records = np.zeros(len(results), dtype=RESULT_DTYPE)
+    records["seq"] = [r["seq"] for r in results]
+    records["incident_id"] = [r.get("incident_id") or 0 for r in results]
+    records["confidence"] = [r["confidence"] for r in results]
+    records["prediction_id"] = [r["prediction_id"] for r in results]
+    return HEADER.pack(RESPONSE_MAGIC, len(records), STATUS_OK, 0) + records.tobytes()
+
+
+def encode_error(status: int, message: str) -> bytes:
+    data = message.encode("utf-8")
+    return HEADER.pack(RESPONSE_MAGIC, len(data), status, 0) + data
+
+
+class UdsIngestServer:
+    """
+    Batched binary ingestion over a Unix domain socket (asyncio, on the API's event loop).
+
+    Each frame is decoded with one np.frombuffer and handed to `handle_batch`
+    (admission + one batched model call in the API), and the results go back
+    as fixed-width records. No HTTP parsing, JSON or per-flow request cost.
+    """
+
+    def __init__(self, path: str, n_features: int,
+                 handle_batch: Callable[[np.ndarray], Awaitable[List[Dict[str, Any]]]],
+                 max_batch: int = MAX_BATCH):
+        self.path = path
+        self.n_features = n_features
+        self.handle_batch = handle_batch
+        self.max_batch = max_batch
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {"connections": 0, "active": 0, "frames": 0, "flows": 0,
+                      "errors": 0, "overloaded": 0, "bad_frames": 0}
+
+    async def start(self):
+        if os.path.exists(self.path):  # Stale socket from a previous run
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, UDS_MODE)
+        print(f"[UDS] Listening on {self.path} ({self.n_features} float32 features, max {self.max_batch} flows/frame)")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        self.stats["active"] += 1
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break  # Client closed
+                magic, n, n_features, _ = HEADER.unpack(header)
+                problem = self._check(magic, n, n_features)
+                if problem:
+                    # The stream can no longer be trusted to be frame-aligned: answer and hang up
+                    self.stats["bad_frames"] += 1
+                    writer.write(encode_error(STATUS_ERROR, problem))
+                    await writer.drain()
+                    break
+                payload = await reader.readexactly(n * n_features * 4)
+                matrix = np.frombuffer(payload, dtype="<f4").reshape(n, n_features).astype(np.float64)
+
+                self.stats["frames"] += 1
+                if not np.isfinite(matrix).all():
+                    # Rejected whole, before admission: no flow of the frame is predicted or stored
+                    self.stats["bad_frames"] += 1
+                    writer.write(encode_error(STATUS_ERROR, "Frame contains NaN/inf features"))
+                    await writer.drain()
+                    continue
+                try:
+                    response = encode_results(await self.handle_batch(matrix))
+                    self.stats["flows"] += n
+                except Shed as e:
+                    self.stats["overloaded"] += 1
+                    response = encode_error(STATUS_OVERLOADED, f"Overloaded ({e.reason}), retry later")
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    response = encode_error(STATUS_ERROR, str(e))
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Client went away mid-frame
+        finally:
+            self.stats["active"] -= 1
+            writer.close()
+
+    def _check(self, magic: bytes, n: int, n_features: int) -> Optional[str]:
+        if magic != REQUEST_MAGIC:
+            return "Bad magic (expected IDSQ)"
+        if n_features != self.n_features:
+            return f"Expected {self.n_features} features per flow, got {n_features}"
+        if not 0 < n <= self.max_batch:
+            return f"Batch size must be 1..{self.max_batch}, got {n}"
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        return {"path": self.path, "max_batch": self.max_batch, **self.stats}
+
+
+# ==============================================================================
+# CLIENT (sensor side, blocking)
+# ==============================================================================
+class UdsClient:
+    """Blocking client: predict(matrix) sends one frame and returns RESULT_DTYPE records."""
+
+    def __init__(self, path: str = UDS_PATH, timeout: Optional[float] = 5.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+
+    def send(self, matrix):
+        self.sock.sendall(encode_request(matrix))
+
+    def receive(self) -> np.ndarray:
+        _, count, status, _ = HEADER.unpack(self._recv_exact(HEADER.size))
+        if status != STATUS_OK:
+            raise IngestError(status, self._recv_exact(count).decode("utf-8", "replace"))
+        return np.frombuffer(self._recv_exact(count * RESULT_DTYPE.itemsize), dtype=RESULT_DTYPE)
+
+    def predict(self, matrix) -> np.ndarray:
+        self.send(matrix)
+        return self.receive()
+
+    def _recv_exact(self, size: int) -> bytes:
+        buf = bytearray(size)
+        view = memoryview(buf)
+        got = 0
+        while got < size:
+            n = self.sock.recv_into(view[got:])
+            if n == 0:
+                raise ConnectionError("Server closed the connection")
+            got += n
+        return bytes(buf)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,6 @@
 "use client"
 
-import { useEffect, useState, useRef } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import {
   Shield, Activity, AlertTriangle, CheckCircle, Terminal, RefreshCw,
@@ -24,26 +24,83 @@ interface Prediction {
   confidence: number
   threat_type: string
   response_mode: string
-  mitigation_actions: string[]
   timestamp: string
   input_summary: string
   prediction_id: number
+  seq: number
+  incident_id?: number // Threats only, see GET /incidents (ids are per replica)
+  replica?: string // Replica that predicted it (main.py --replicas)
+  trace?: { id: string; emitted: number | null } // Set when the producer sent X-Trace-Id
+}
+
+// Repeated threats folded into one incident; mitigation actions live here, not on each prediction
+interface Incident {
+  id: number
+  prediction_class: string
+  signature: string
+  threat_type: string
+  response_mode: string
+  mitigation_actions: string[]
+  count: number
+  confidence_mean: number
+  status: "active" | "closed"
+  version: number
+  replica?: string // Copied from the IncidentPage
+}
+
+// GET /incidents?since=<version>: incidents changed after `since`
+interface IncidentPage {
+  version: number
+  items: Incident[]
+  replica: string
+}
+
+// Receive/render time of one traced prediction, reported to POST /traces/display
+interface DisplayReport {
+  seq: number
+  received: number
+  rendered: number
 }
 
+// Mitigation actions are generated server-side and served by GET /actions
 interface ActionLog {
-  id: string
+  id: number
   type: "BLOCK" | "ISOLATE" | "THROTTLE" | "TRACE" | "LOCK" | "QUARANTINE"
-  threatSource: string
+  threat_source: string
   target: string
   status: "PENDING" | "EXECUTED"
-  timestamp: Date
+  time: string
   details: string
   category: "NETWORK" | "ENDPOINT" | "IDENTITY"
+  prediction_seq: number | null
+}
+
+interface ActionPage {
+  items: ActionLog[]
+  next_cursor: number | null
+}
+
+type ActionTab = "all" | "network" | "endpoint" | "identity"
+
+// Server-side downsampled confidence trend (GET /timeseries), columnar
+interface TimeSeries {
+  resolution_seconds: number
+  t: number[]
+  count: number[]
+  mean: (number | null)[]
+  min: (number | null)[]
+  max: (number | null)[]
 }
 
 // --- CONSTANTS ---
-const API_URL = "http://localhost:8000"
+// main.py --replicas sets the dashboard port (always the same replica: incidents and trends are per replica)
+const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000"
 const REFRESH_RATE = 2000
+const ACTION_PAGE_SIZE = 20
+// Any range is downsampled by the API to TREND_POINTS points
+const TREND_RANGES = { "1m": 60, "15m": 900, "1h": 3600, "24h": 86400 } as const
+type TrendRange = keyof typeof TREND_RANGES
+const TREND_POINTS = 120
 
 const COLORS = {
   Benign: "#10B981",
@@ -52,42 +109,22 @@ const COLORS = {
   Other: "#8B5CF6",
 }
 
-// --- MOCK DATA GENERATORS ---
-const MOCK_IPS = ["192.168.1.105", "10.0.5.22", "203.114.12.5", "172.16.0.44", "45.33.22.11", "88.99.100.50", "12.34.56.78", "77.88.99.10"]
-const MOCK_HASHES = ["e5d3...8a2f", "99a1...b2c3", "malware_win32.exe", "trojan_dropper.bat", "ransomware.dll", "keylogger_v2.exe", "backdoor.sh"]
-const MOCK_USERS = ["admin_sys", "root", "user_service", "database_admin", "guest_wifi", "backup_operator", "web_service", "ftp_admin"]
-const MOCK_PORTS = ["22", "443", "3389", "8080", "21", "3306", "5432", "27017"]
-
-const ACTIONS = {
-  NETWORK: [
-    { type: "BLOCK", template: "Blocking source IP {target} via firewall rule #442" },
-    { type: "THROTTLE", template: "Applying QoS limit (10kbps) on flow from {target}" },
-    { type: "BLOCK", template: "Adding {target} to IP blacklist (24h TTL)" },
-    { type: "THROTTLE", template: "Rate limiting connections from {target} to 5/min" },
-    { type: "BLOCK", template: "Dropping all packets from {target} on port 443" },
-    { type: "TRACE", template: "Capturing packet dump for traffic from {target}" },
-  ],
-  ENDPOINT: [
-    { type: "QUARANTINE", template: "Isolating file hash {target} to Sandbox" },
-    { type: "TRACE", template: "Tracing process origin for {target}" },
-    { type: "QUARANTINE", template: "Moving {target} to quarantine zone" },
-    { type: "BLOCK", template: "Killing process associated with {target}" },
-    { type: "TRACE", template: "Analyzing memory dump for {target}" },
-    { type: "QUARANTINE", template: "Preventing execution of {target} system-wide" },
-  ],
-  IDENTITY: [
-    { type: "LOCK", template: "Locking account {target} due to repeated failures" },
-    { type: "ISOLATE", template: "Terminating active sessions for {target}" },
-  ]
-} as const;
-
 export default function Dashboard() {
   const [history, setHistory] = useState<Prediction[]>([])
-  const [actionLog, setActionLog] = useState<ActionLog[]>([])
+  const [actionPage, setActionPage] = useState<ActionPage>({ items: [], next_cursor: null })
+  const [activeTab, setActiveTab] = useState<ActionTab>("all")
+  const [cursors, setCursors] = useState<number[]>([]) // [] = newest page
   const [health, setHealth] = useState({ status: "unknown", model_loaded: false })
   const [loading, setLoading] = useState(true)
   const [autoRefresh, setAutoRefresh] = useState(true)
-  const seenPredictionIds = useRef<Set<number>>(new Set())
+  const [trendRange, setTrendRange] = useState<TrendRange>("1m")
+  const [trend, setTrend] = useState<TimeSeries | null>(null)
+  // Active incidents by id, kept current with /incidents?since=
+  const [incidents, setIncidents] = useState<Record<number, Incident>>({})
+  const incidentVersion = useRef<number | null>(null)
+  // Traced predictions received but not yet painted (seq -> received, epoch seconds)
+  const awaitingRender = useRef(new Map<number, number>())
+  const lastTracedSeq = useRef(0)
 
   // --- DATA FETCHING ---
   const fetchData = async () => {
@@ -95,18 +132,39 @@ export default function Dashboard() {
       const resHistory = await fetch(`${API_URL}/history`)
       if (resHistory.ok) {
         const data: Prediction[] = await resHistory.json()
+        const received = Date.now() / 1000
+        for (const p of data) {
+          if (p.trace && p.seq > lastTracedSeq.current) awaitingRender.current.set(p.seq, received)
+        }
+        if (data.length) lastTracedSeq.current = Math.max(lastTracedSeq.current, data[data.length - 1].seq)
+        setHistory(data)
+      }
 
-        data.forEach(prediction => {
-          if (
-            !seenPredictionIds.current.has(prediction.prediction_id) &&
-            prediction.prediction_class !== "Benign"
-          ) {
-            triggerRandomAction(prediction.prediction_class)
-            seenPredictionIds.current.add(prediction.prediction_id)
+      const since = incidentVersion.current
+      const resIncidents = await fetch(`${API_URL}/incidents${since !== null ? `?since=${since}` : ""}`)
+      if (resIncidents.ok) {
+        const page: IncidentPage = await resIncidents.json()
+        if (since !== null && page.version < since) {
+          incidentVersion.current = null // API restarted: resync on the next poll
+          setIncidents({})
+        } else {
+          incidentVersion.current = page.version
+          if (page.items.length) {
+            setIncidents(prev => {
+              const next = { ...prev }
+              for (const incident of page.items) {
+                if (incident.status === "active") next[incident.id] = { ...incident, replica: page.replica }
+                else delete next[incident.id]
+              }
+              return next
+            })
           }
-        })
-        data.forEach(p => seenPredictionIds.current.add(p.prediction_id))
-        setHistory(data)
+        }
+      }
+
+      const resTrend = await fetch(`${API_URL}/timeseries?window=${TREND_RANGES[trendRange]}&points=${TREND_POINTS}`)
+      if (resTrend.ok) {
+        setTrend(await resTrend.json())
       }
 
       const resHealth = await fetch(`${API_URL}/health`)
@@ -121,56 +179,33 @@ export default function Dashboard() {
     }
   }
 
-  // --- ACTION SIMULATION ---
-  const triggerRandomAction = (threatType: string) => {
-    const newActions: ActionLog[] = []
-    const numActions = Math.floor(Math.random() * 3) + 2 // 2-4 actions per threat
-    const categories: ("NETWORK" | "ENDPOINT" | "IDENTITY")[] = ["NETWORK", "ENDPOINT", "IDENTITY"]
-
-    for (let i = 0; i < numActions; i++) {
-      let category: "NETWORK" | "ENDPOINT" | "IDENTITY"
-      let target: string
-
-      // Assign category based on threat type but also add cross-category actions
-      if (i === 0) {
-        // First action matches threat type
-        if (threatType === "DDoS") {
-          category = "NETWORK"
-          target = MOCK_IPS[Math.floor(Math.random() * MOCK_IPS.length)]
-        } else if (threatType === "Brute Force") {
-          category = "IDENTITY"
-          target = MOCK_USERS[Math.floor(Math.random() * MOCK_USERS.length)]
-        } else {
-          category = "ENDPOINT"
-          target = MOCK_HASHES[Math.floor(Math.random() * MOCK_HASHES.length)]
-        }
-      } else {
-        // Subsequent actions can be any category
-        category = categories[Math.floor(Math.random() * categories.length)]
-        if (category === "NETWORK") {
-          target = MOCK_IPS[Math.floor(Math.random() * MOCK_IPS.length)]
-        } else if (category === "IDENTITY") {
-          target = MOCK_USERS[Math.floor(Math.random() * MOCK_USERS.length)]
-        } else {
-          target = MOCK_HASHES[Math.floor(Math.random() * MOCK_HASHES.length)]
-        }
-      }
-
-      const actionTemplate = ACTIONS[category][Math.floor(Math.random() * ACTIONS[category].length)]
-
-      newActions.push({
-        id: crypto.randomUUID(),
-        type: actionTemplate.type as ActionLog["type"],
-        threatSource: threatType,
-        target: target,
-        status: "EXECUTED",
-        timestamp: new Date(Date.now() + i * 100), // Slight time offset
-        details: actionTemplate.template.replace("{target}", target),
-        category: category
-      })
+  // --- LATENCY TRACING: report when traced predictions were painted ---
+  useEffect(() => {
+    if (awaitingRender.current.size === 0) return
+    const frame = requestAnimationFrame(() => {
+      const rendered = Date.now() / 1000
+      const items: DisplayReport[] = Array.from(awaitingRender.current, ([seq, received]) => ({ seq, received, rendered }))
+      awaitingRender.current.clear()
+      fetch(`${API_URL}/traces/display`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ client: "nextjs", items }),
+      }).catch(() => {}) // Best effort
+    })
+    return () => cancelAnimationFrame(frame)
+  }, [history])
+
+  // --- ACTION LOG (server-side, one page at a time) ---
+  const fetchActions = async (tab: ActionTab, cursor?: number) => {
+    try {
+      const params = new URLSearchParams({ limit: String(ACTION_PAGE_SIZE) })
+      if (tab !== "all") params.set("category", tab.toUpperCase())
+      if (cursor !== undefined) params.set("cursor", String(cursor))
+      const res = await fetch(`${API_URL}/actions?${params}`)
+      if (res.ok) setActionPage(await res.json())
+    } catch (error) {
+      console.error("Fetch actions error:", error)
     }
-
-    setActionLog(prev => [...newActions, ...prev].slice(0, 100))
   }
 
   useEffect(() => {
@@ -179,7 +214,16 @@ export default function Dashboard() {
       if (autoRefresh) fetchData()
     }, REFRESH_RATE)
     return () => clearInterval(interval)
-  }, [autoRefresh])
+  }, [autoRefresh, trendRange])
+
+  useEffect(() => {
+    const cursor = cursors[cursors.length - 1]
+    fetchActions(activeTab, cursor)
+    // Older pages never change (append-only log), only the newest page is polled
+    if (cursor !== undefined || !autoRefresh) return
+    const interval = setInterval(() => fetchActions(activeTab), REFRESH_RATE)
+    return () => clearInterval(interval)
+  }, [activeTab, cursors, autoRefresh])
 
   // --- DERIVED METRICS ---
   const totalPkts = history.length
@@ -194,12 +238,21 @@ export default function Dashboard() {
   const newestItem = sortedHistory[0]
   const isOk = health.status === "healthy"
   const systemStatus = newestItem?.prediction_class === "Benign" || !newestItem ? "SECURE" : "CRITICAL"
+  // Incident of the newest threat (ids only match within the same replica), else the most recently
+  // updated active one of its class (mitigation actions are per class), else of any class
+  const ownIncident = newestItem?.incident_id !== undefined ? incidents[newestItem.incident_id] : undefined
+  const byVersion = Object.values(incidents).sort((a, b) => b.version - a.version)
+  const activeIncident = (ownIncident && (newestItem?.replica === undefined || newestItem.replica === ownIncident.replica)
+    ? ownIncident : undefined)
+    ?? byVersion.find(i => i.prediction_class === newestItem?.prediction_class)
+    ?? byVersion[0]
 
   // Chart Data
-  const confidenceData = history.slice(0, 50).map((h, i) => ({
-    name: i,
-    confidence: h.confidence
-  })).reverse()
+  const confidenceData = (trend?.t ?? []).map((t, i) => ({
+    name: new Date(t).toLocaleTimeString(),
+    confidence: trend!.mean[i],
+    band: trend!.min[i] === null ? null : [trend!.min[i], trend!.max[i]],
+  }))
 
   const pieData = [
     { name: 'Benign', value: benignCount },
@@ -275,6 +328,12 @@ export default function Dashboard() {
               <CardHeader>
                 <CardTitle className="text-white flex items-center gap-2">
                   <Activity className="w-5 h-5 text-blue-400" /> Confidence Trend
+                  <div className="ml-auto flex gap-1">
+                    {(Object.keys(TREND_RANGES) as TrendRange[]).map(r => (
+                      <Button key={r} size="sm" variant={trendRange === r ? "default" : "ghost"}
+                        className="h-7 px-2 text-xs" onClick={() => setTrendRange(r)}>{r}</Button>
+                    ))}
+                  </div>
                 </CardTitle>
               </CardHeader>
               <CardContent>
@@ -291,7 +350,8 @@ export default function Dashboard() {
                       <XAxis dataKey="name" hide />
                       <YAxis domain={[0, 1.2]} hide />
                       <Tooltip contentStyle={{ backgroundColor: '#0f172a', borderColor: '#1e293b', color: '#f8fafc' }} />
-                      <Area type="monotone" dataKey="confidence" stroke="#3B82F6" fillOpacity={1} fill="url(#colorConf)" />
+                      <Area type="monotone" dataKey="band" stroke="none" fill="#3B82F6" fillOpacity={0.15} connectNulls={false} />
+                      <Area type="monotone" dataKey="confidence" stroke="#3B82F6" fillOpacity={1} fill="url(#colorConf)" connectNulls={false} />
                     </AreaChart>
                   </ResponsiveContainer>
                 </div>
@@ -421,10 +481,13 @@ export default function Dashboard() {
                   <div className="space-y-4">
                     <div className="p-3 bg-red-500/10 rounded-lg border border-red-500/20">
                       <h4 className="text-red-400 font-bold mb-1">{newestItem.threat_type}</h4>
-                      <p className="text-xs text-red-200/70 mb-2">Confidence: {(newestItem.confidence * 100).toFixed(1)}%</p>
+                      <p className="text-xs text-red-200/70 mb-2">
+                        Confidence: {(newestItem.confidence * 100).toFixed(1)}%
+                        {activeIncident && ` · Incident #${activeIncident.id} (${activeIncident.count} flows)`}
+                      </p>
                       <Separator className="bg-red-500/20 my-2" />
                       <div className="grid gap-2">
-                        {newestItem.mitigation_actions?.slice(0, 3).map((action, i) => (
+                        {activeIncident?.mitigation_actions.slice(0, 3).map((action, i) => (
                           <div key={i} className="flex items-start gap-2 text-xs text-red-100">
                             <CheckCircle className="w-3 h-3 mt-0.5 text-red-500 flex-shrink-0" />
                             <span>{action}</span>
@@ -447,13 +510,17 @@ export default function Dashboard() {
 
         {/* SOC OPERATIONS CENTER */}
         <Card className="bg-slate-900/50 border-slate-800 shadow-xl">
-          <Tabs defaultValue="all" className="w-full">
+          <Tabs
+            value={activeTab}
+            onValueChange={(v) => { setActiveTab(v as ActionTab); setCursors([]) }}
+            className="w-full"
+          >
             <CardHeader className="pb-0 border-b border-slate-800">
               <div className="flex items-center justify-between">
                 <CardTitle className="text-white flex items-center gap-2">
                   <Terminal className="w-5 h-5 text-cyan-400" />
                   Security Operations Center
-                  <Badge variant="outline" className="ml-2 text-xs">{actionLog.length} Events</Badge>
+                  <Badge variant="outline" className="ml-2 text-xs">Page {cursors.length + 1}</Badge>
                 </CardTitle>
                 <TabsList className="bg-slate-800/50">
                   <TabsTrigger value="all" className="data-[state=active]:bg-slate-500/20 data-[state=active]:text-white">
@@ -474,17 +541,35 @@ export default function Dashboard() {
 
             <CardContent className="p-0">
               <TabsContent value="all" className="m-0 min-h-[300px]">
-                <ActionLogTable logs={actionLog} color="all" emptyMsg="No Security Events" showCategory />
+                <ActionLogTable logs={actionPage.items} color="all" emptyMsg="No Security Events" showCategory />
               </TabsContent>
               <TabsContent value="network" className="m-0 min-h-[300px]">
-                <ActionLogTable logs={actionLog.filter(l => l.category === 'NETWORK')} color="cyan" emptyMsg="No Network Events" />
+                <ActionLogTable logs={actionPage.items} color="cyan" emptyMsg="No Network Events" />
               </TabsContent>
               <TabsContent value="endpoint" className="m-0 min-h-[300px]">
-                <ActionLogTable logs={actionLog.filter(l => l.category === 'ENDPOINT')} color="purple" emptyMsg="No Endpoint Events" />
+                <ActionLogTable logs={actionPage.items} color="purple" emptyMsg="No Endpoint Events" />
               </TabsContent>
               <TabsContent value="identity" className="m-0 min-h-[300px]">
-                <ActionLogTable logs={actionLog.filter(l => l.category === 'IDENTITY')} color="amber" emptyMsg="No Identity Events" />
+                <ActionLogTable logs={actionPage.items} color="amber" emptyMsg="No Identity Events" />
               </TabsContent>
+              <div className="flex items-center justify-end gap-2 p-3 border-t border-slate-800">
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={cursors.length === 0}
+                  onClick={() => setCursors(prev => prev.slice(0, -1))}
+                >
+                  Newer
+                </Button>
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={actionPage.next_cursor === null}
+                  onClick={() => setCursors(prev => [...prev, actionPage.next_cursor as number])}
+                >
+                  Older
+                </Button>
+              </div>
             </CardContent>
           </Tabs>
         </Card>
@@ -557,7 +642,7 @@ function ActionLogTable({ logs, color, emptyMsg, showCategory = false }: { logs:
                 className="border-slate-800"
               >
                 <TableCell className="font-mono text-xs text-slate-400">
-                  {log.timestamp.toLocaleTimeString()}
+                  {new Date(log.time).toLocaleTimeString()}
                 </TableCell>
                 {showCategory && (
                   <TableCell>
@@ -0,0 +1,229 @@
+import time
+import threading
+from typing import Dict, List, Optional, NamedTuple, Tuple
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+HISTORY_COLUMNS = ["seq", "timestamp", "prediction_class", "prediction_id", "confidence",
+                   "threat_type", "response_mode", "incident_id", "replica", "input_summary"]
+ACTION_COLUMNS = ["id", "time", "category", "type", "threat_source", "target", "details", "status", "prediction_seq"]
+ACTION_CATEGORIES = ("ALL", "NETWORK", "ENDPOINT", "IDENTITY")
+
+ActionPage = Tuple[pd.DataFrame, Optional[int]]  # (rows newest first, next_cursor)
+AWAITING_RENDER_MAX = 1000  # Traced rows remembered while no session is rendering
+
+
+class Snapshot(NamedTuple):
+    """Immutable view shared by every dashboard session. Frames are newest first."""
+    version: int
+    history_df: pd.DataFrame
+    action_pages: Dict[str, ActionPage]  # First /actions page per category
+    incidents: Dict[int, dict]            # Active incidents by id (threat type, mitigation actions, count)
+
+
+def append_newest(new_df: pd.DataFrame, current_df: pd.DataFrame, max_len: int) -> pd.DataFrame:
+    """Prepends new rows (already newest first) and trims to max_len."""
+    if current_df.empty:
+        return new_df.head(max_len).reset_index(drop=True)
+    return pd.concat([new_df, current_df], ignore_index=True).head(max_len)
+
+
+class HistoryPoller:
+    """
+    One background thread per dashboard process. Polls /history?since=<seq>
+    over a keep-alive session and publishes a versioned Snapshot, so API load
+    does not grow with the number of open browser tabs. The first /actions
+    page of each category is refreshed only when new threats arrived, and
+    active incidents are followed with /incidents?since=<version> while
+    there are threats or open incidents.
+    """
+
+    def __init__(self, api_url: str, interval: float = 2.0, history_len: int = 100,
+                 action_page_size: int = 20):
+        self.api_url = api_url.rstrip("/")
+        self.interval = interval
+        self.history_len = history_len
+        self.action_page_size = action_page_size
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+        self.last_seq = 0
+        self.incident_version: Optional[int] = None
+        self.connected = False
+        self._lock = threading.Lock()
+        empty_page = (pd.DataFrame(columns=ACTION_COLUMNS), None)
+        self._snapshot = Snapshot(0, pd.DataFrame(columns=HISTORY_COLUMNS),
+                                  {category: empty_page for category in ACTION_CATEGORIES}, {})
+        self._thread = None
+        self._stop = threading.Event()
+        self._timeseries = {}  # (window, points) -> (fetched_at, payload)
+        # Traced predictions: (snapshot version, seq, received) until rendered, then reported to /traces/display
+        self._awaiting_render: List[Tuple[int, int, float]] = []
+        self._rendered: List[dict] = []
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            return self._snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.interval)
+
+    def poll_once(self):
+        self._report_rendered()
+        try:
+            r = self.session.get(f"{self.api_url}/history", params={"since": self.last_seq}, timeout=1)
+            if r.status_code != 200:
+                self.connected = False
+                return
+            data = r.json()
+            self.connected = True
+        except requests.RequestException:
+            self.connected = False
+            return
+
+        # The API restarted (seq reset): since=last_seq would return nothing until
+        # the new seqs pass the old ones, so drop the old view and resync from scratch
+        if int(r.headers.get("X-Last-Seq", self.last_seq)) < self.last_seq:
+            self._reset()
+            return self.poll_once()
+
+        new_rows = [p for p in data if p.get("seq", 0) > self.last_seq]
+        if not new_rows:
+            if self.snapshot().incidents:  # Open incidents close by time alone
+                self._publish_incidents()
+            return
+        self.last_seq = new_rows[-1]["seq"]
+        self._publish(new_rows, received=time.time())
+
+    def _reset(self):
+        self.last_seq = 0
+        self.incident_version = None
+        with self._lock:
+            self._awaiting_render.clear()
+            self._snapshot = self._snapshot._replace(version=self._snapshot.version + 1,
+                                                     history_df=pd.DataFrame(columns=HISTORY_COLUMNS),
+                                                     incidents={})
+
+    def fetch_incidents(self, current: Dict[int, dict]) -> Dict[int, dict]:
+        """Active incidents after applying the changes since the last poll (all of them on the first)."""
+        params = {} if self.incident_version is None else {"since": self.incident_version}
+        r = self.session.get(f"{self.api_url}/incidents", params=params, timeout=1)
+        r.raise_for_status()
+        page = r.json()
+        if self.incident_version is not None and page["version"] < self.incident_version:
+            self.incident_version = None  # API restarted: resync on the next poll
+            return {}
+        incidents = dict(current)
+        for incident in page["items"]:
+            if incident["status"] == "active":
+                incidents[incident["id"]] = {**incident, "replica": page.get("replica")}
+            else:
+                incidents.pop(incident["id"], None)
+        self.incident_version = page["version"]
+        return incidents
+
+    def _publish_incidents(self):
+        current = self.snapshot()
+        try:
+            incidents = self.fetch_incidents(current.incidents)
+        except requests.RequestException:
+            return
+        if incidents != current.incidents:
+            with self._lock:
+                self._snapshot = current._replace(version=current.version + 1, incidents=incidents)
+
+    def mark_rendered(self, version: int):
+        """Called by the dashboard after it rendered snapshot `version`."""
+        rendered = time.time()
+        with self._lock:
+            if not self._awaiting_render or self._awaiting_render[0][0] > version:
+                return
+            done = [t for t in self._awaiting_render if t[0] <= version]
+            self._awaiting_render = [t for t in self._awaiting_render if t[0] > version]
+            self._rendered.extend({"seq": seq, "received": received, "rendered": rendered}
+                                  for _, seq, received in done)
+
+    def _report_rendered(self):
+        with self._lock:
+            items, self._rendered = self._rendered, []
+        if not items:
+            return
+        try:
+            self.session.post(f"{self.api_url}/traces/display", json={"client": "streamlit", "items": items}, timeout=1)
+        except requests.RequestException:
+            pass  # Latency reports are best effort
+
+    def fetch_action_page(self, category: str = "ALL", cursor: Optional[int] = None) -> ActionPage:
+        """Fetches one /actions page. Pages with a cursor are immutable (append-only log)."""
+        params = {"limit": self.action_page_size}
+        if category != "ALL":
+            params["category"] = category
+        if cursor is not None:
+            params["cursor"] = cursor
+        r = self.session.get(f"{self.api_url}/actions", params=params, timeout=1)
+        r.raise_for_status()
+        page = r.json()
+        df = pd.DataFrame(page["items"], columns=ACTION_COLUMNS)
+        df["time"] = pd.to_datetime(df["time"])
+        return df, page["next_cursor"]
+
+    def fetch_timeseries(self, window: float, points: int = 120) -> Optional[dict]:
+        """
+        Server-side downsampled /timeseries for the last `window` seconds. Shared
+        by every session: each range is fetched at most once per poll interval.
+        """
+        key = (window, points)
+        cached = self._timeseries.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.interval:
+            return cached[1]
+        try:
+            r = self.session.get(f"{self.api_url}/timeseries", params={"window": window, "points": points}, timeout=1)
+            r.raise_for_status()
+            payload = r.json()
+        except requests.RequestException:
+            return cached[1] if cached is not None else None
+        self._timeseries[key] = (time.monotonic(), payload)
+        return payload
+
+    def _publish(self, new_rows: List[dict], received: Optional[float] = None):
+        new_df = pd.DataFrame(new_rows, columns=HISTORY_COLUMNS)
+        new_df["timestamp"] = pd.to_datetime(new_df["timestamp"])
+        new_df = new_df.iloc[::-1]  # Newest first
+
+        current = self.snapshot()
+        history_df = append_newest(new_df, current.history_df, self.history_len)
+
+        # Actions are only written for threats, so the first pages can only change then
+        action_pages, incidents = current.action_pages, current.incidents
+        new_threats = current.version == 0 or (new_df["prediction_class"] != "Benign").any()
+        if new_threats:
+            try:
+                action_pages = {category: self.fetch_action_page(category) for category in ACTION_CATEGORIES}
+            except requests.RequestException:
+                pass
+        if new_threats or incidents:
+            try:
+                incidents = self.fetch_incidents(incidents)
+            except requests.RequestException:
+                pass
+
+        with self._lock:
+            self._snapshot = Snapshot(current.version + 1, history_df, action_pages, incidents)
+            if received is not None:
+                self._awaiting_render.extend((current.version + 1, p["seq"], received)
+                                             for p in new_rows if p.get("trace"))
+                del self._awaiting_render[:-AWAITING_RENDER_MAX]
@@ -1,12 +1,9 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import requests
-import time
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import uuid
-import random
+
+# Figures use plotly.graph_objects, imported on first build (plotly.express alone costs ~0.3s)
 
 # ==============================================================================
 # CONFIG & PAGE SETUP
@@ -19,7 +16,7 @@ st.set_page_config(
 )
 
 # Constants from React App
-API_URL = "http://localhost:8000"
+API_URL = os.getenv("IDS_API_URL", "http://localhost:8000")  # main.py --replicas: the dashboard port (one replica)
 REFRESH_RATE = 2  # Seconds (matches Recharts 2000ms)
 
 COLORS = {
@@ -29,34 +26,6 @@ COLORS = {
     "Other": "#8B5CF6",        # Violet
 }
 
-# Mock Data for Simulation (Ported from page.tsx)
-MOCK_IPS = ["192.168.1.105", "10.0.5.22", "203.114.12.5", "172.16.0.44", "45.33.22.11", "88.99.100.50", "12.34.56.78", "77.88.99.10"]
-MOCK_HASHES = ["e5d3...8a2f", "99a1...b2c3", "malware_win32.exe", "trojan_dropper.bat", "ransomware.dll", "keylogger_v2.exe", "backdoor.sh"]
-MOCK_USERS = ["admin_sys", "root", "user_service", "database_admin", "guest_wifi", "backup_operator", "web_service", "ftp_admin"]
-
-ACTIONS_TEMPLATE = {
-    "NETWORK": [
-        {"type": "BLOCK", "template": "Blocking source IP {target} via firewall rule #442"},
-        {"type": "THROTTLE", "template": "Applying QoS limit (10kbps) on flow from {target}"},
-        {"type": "BLOCK", "template": "Adding {target} to IP blacklist (24h TTL)"},
-        {"type": "THROTTLE", "template": "Rate limiting connections from {target} to 5/min"},
-        {"type": "BLOCK", "template": "Dropping all packets from {target} on port 443"},
-        {"type": "TRACE", "template": "Capturing packet dump for traffic from {target}"},
-    ],
-    "ENDPOINT": [
-        {"type": "QUARANTINE", "template": "Isolating file hash {target} to Sandbox"},
-        {"type": "TRACE", "template": "Tracing process origin for {target}"},
-        {"type": "QUARANTINE", "template": "Moving {target} to quarantine zone"},
-        {"type": "BLOCK", "template": "Killing process associated with {target}"},
-        {"type": "TRACE", "template": "Analyzing memory dump for {target}"},
-        {"type": "QUARANTINE", "template": "Preventing execution of {target} system-wide"},
-    ],
-    "IDENTITY": [
-        {"type": "LOCK", "template": "Locking account {target} due to repeated failures"},
-        {"type": "ISOLATE", "template": "Terminating active sessions for {target}"},
-    ]
-}
-
 # ==============================================================================
 # CSS STYLING (Theming to match page.tsx)
 # ==============================================================================
@@ -159,269 +128,160 @@ st.markdown("""
 # ==============================================================================
 # STATE & LOGIC
 # ==============================================================================
-# Initialize Session State
-if 'history' not in st.session_state:
-    st.session_state.history = []     # List of predictions
-if 'action_log' not in st.session_state:
-    st.session_state.action_log = []  # List of simulated actions
-if 'seen_prediction_ids' not in st.session_state:
-    st.session_state.seen_prediction_ids = set()
-
-def fetch_data():
-    """Fetch history from API and handle action simulation."""
-    try:
-        r = requests.get(f"{API_URL}/history", timeout=1)
-        if r.status_code == 200:
-            data = r.json()
-            
-            # Process new predictions for Action Simulation
-            for prediction in data:
-                pid = prediction.get('prediction_id')
-                pclass = prediction.get('prediction_class')
-                
-                # If new and NOT Benign, trigger random actions
-                if pid not in st.session_state.seen_prediction_ids:
-                    st.session_state.seen_prediction_ids.add(pid)
-                    if pclass != 'Benign':
-                        trigger_random_action(pclass)
-            
-            # Sync history
-            st.session_state.history = data
-            return data
-    except Exception as e:
-        # st.error(f"Connection Error: {e}")
-        return []
-    return []
-
-def trigger_random_action(threat_type):
-    """Simulate SOC mitigation actions based on threat type."""
-    num_actions = random.randint(2, 4)
-    categories = ["NETWORK", "ENDPOINT", "IDENTITY"]
-    
-    new_logs = []
-    
-    for i in range(num_actions):
-        # 1. Determine Category & Target
-        category = "NETWORK" # Default
-        target = "Unknown"
-        
-        # Rule: First action matches threat type strongly
-        if i == 0:
-            if threat_type == "DDoS":
-                category = "NETWORK"
-                target = random.choice(MOCK_IPS)
-            elif threat_type == "Brute Force":
-                category = "IDENTITY"
-                target = random.choice(MOCK_USERS)
-            else:
-                category = "ENDPOINT"
-                target = random.choice(MOCK_HASHES)
-        else:
-            # Randomize subsequent actions
-            category = random.choice(categories)
-            if category == "NETWORK": target = random.choice(MOCK_IPS)
-            elif category == "IDENTITY": target = random.choice(MOCK_USERS)
-            else: target = random.choice(MOCK_HASHES)
-            
-        # 2. Select Template
-        template_obj = random.choice(ACTIONS_TEMPLATE[category])
-        details = template_obj["template"].replace("{target}", target)
-        
-        # 3. Create Log Entry
-        log_entry = {
-            "id": str(uuid.uuid4()),
-            "time": datetime.now() + timedelta(milliseconds=i*100),
-            "category": category,
-            "type": template_obj["type"],
-            "target": target,
-            "details": details,
-            "status": "EXECUTED"
-        }
-        new_logs.append(log_entry)
-        
-    # Prepend to log (newest first)
-    st.session_state.action_log = new_logs + st.session_state.action_log
-    # Keep only last 100
-    st.session_state.action_log = st.session_state.action_log[:100]
+# A single HistoryPoller per Streamlit process fetches /history incrementally
+# and publishes a versioned snapshot. Every session reads that snapshot, and
+# figures/tables are built once per version and shared by all sessions.
+from history_poller import HistoryPoller
+
+HISTORY_LEN = 100       # Matches API HISTORY_LEN
+# Confidence trend: any range is downsampled by the API to TREND_POINTS points
+TREND_RANGES = {"1m": 60, "15m": 900, "1h": 3600, "24h": 86400}
+TREND_POINTS = 120
+ACTION_PAGE_SIZE = 20   # Rows per /actions page
+
+BADGE_CLASS = {"Benign": "badge-benign", "DDoS": "badge-ddos", "Brute Force": "badge-brute", "Other": "badge-other"}
+CATEGORY_STYLE = {
+    "NETWORK": "color: #22d3ee; background: rgba(34, 211, 238, 0.1); padding: 2px 6px; border-radius: 4px; font-weight: bold;",
+    "ENDPOINT": "color: #c084fc; background: rgba(192, 132, 252, 0.1); padding: 2px 6px; border-radius: 4px; font-weight: bold;",
+    "IDENTITY": "color: #fbbf24; background: rgba(251, 191, 36, 0.1); padding: 2px 6px; border-radius: 4px; font-weight: bold;",
+}
+
+@st.cache_resource
+def get_poller():
+    """Process-wide poller shared by every browser session."""
+    return HistoryPoller(API_URL, interval=REFRESH_RATE, history_len=HISTORY_LEN,
+                         action_page_size=ACTION_PAGE_SIZE).start()
+
+@st.cache_resource
+def get_render_cache():
+    """Process-wide {name: (version, object)} cache of built figures and tables."""
+    return {}
+
+def cached(name, version, builder):
+    """Returns the object built for `version`, rebuilding only when the version changed."""
+    render_cache = get_render_cache()
+    entry = render_cache.get(name)
+    if entry is None or entry[0] != version:
+        entry = (version, builder())
+        render_cache[name] = entry
+    return entry[1]
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def older_action_page_html(category, cursor):
+    """Older pages (cursor != None) never change in the append-only log, so they are cached for good."""
+    page_df, next_cursor = get_poller().fetch_action_page(category, cursor)
+    return (build_log_table(page_df) if not page_df.empty else None), next_cursor
+
+def compute_summary(df):
+    total_pkts = len(df)
+    if total_pkts == 0:
+        return {"total": 0, "benign": 0, "threat": 0, "threat_rate": 0.0, "newest": None, "status": "SECURE"}
+
+    benign_count = int((df['prediction_class'] == 'Benign').sum())
+    threat_count = total_pkts - benign_count
+    newest_item = df.iloc[0]
+    return {
+        "total": total_pkts,
+        "benign": benign_count,
+        "threat": threat_count,
+        "threat_rate": (threat_count / total_pkts) * 100,
+        "newest": newest_item,
+        "status": "CRITICAL" if newest_item['prediction_class'] != 'Benign' else "SECURE",
+    }
 
 # ==============================================================================
-# LAYOUT RENDERING
+# BUILDERS (Figures & Tables)
 # ==============================================================================
-
-# 1. Identity Header
-st.markdown("""
-<div class="identity-header">
-    <div class="id-section">
-        <span>NAMA: <span class="text-cyan">JOSIA GIVEN SANTOSO</span></span>
-        <span>|</span>
-        <span>NIM: <span class="text-emerald">36230035</span></span>
-    </div>
-    <div class="id-section">
-        <span>DOSEN: ALANIAH NISRINA, B.ENG., M.ENG.</span>
-        <span>|</span>
-        <span>MK: KEAMANAN DATA</span>
-    </div>
-</div>
-""", unsafe_allow_html=True)
-
-# 2. Main Title & Status
-history = fetch_data()
-df = pd.DataFrame(history)
-
-# Derived Metrics
-total_pkts = len(df)
-if total_pkts > 0:
-    benign_count = len(df[df['prediction_class'] == 'Benign'])
-    ddos_count = len(df[df['prediction_class'] == 'DDoS'])
-    brute_count = len(df[df['prediction_class'] == 'Brute Force'])
-    other_count = len(df[df['prediction_class'] == 'Other'])
-    threat_count = total_pkts - benign_count
-    threat_rate = (threat_count / total_pkts) * 100
+def build_confidence_figure(ts):
+    """Mean confidence with a min/max band from the API's downsampled /timeseries (fixed point count)."""
+    import plotly.graph_objects as go
+
+    x = pd.to_datetime(ts["t"], unit="ms")
+    fig = go.Figure([
+        go.Scatter(x=x, y=ts["max"], mode="lines", line=dict(width=0), hoverinfo="skip", showlegend=False),
+        go.Scatter(x=x, y=ts["min"], mode="lines", line=dict(width=0), fill="tonexty",
+                   fillcolor="rgba(59, 130, 246, 0.15)", hoverinfo="skip", showlegend=False),
+        go.Scatter(x=x, y=ts["mean"], mode="lines", line=dict(color='#3b82f6'), name="mean", showlegend=False),
+    ])
     
-    # Sort by time desc
-    if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp', ascending=False)
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=10, b=0),
+        height=250,
+        xaxis=dict(showgrid=False, title=None),
+        yaxis=dict(showgrid=True, gridcolor="#1e293b", range=[0, 1.1])
+    )
+    return fig
+
+def build_pie_figure(df):
+    import plotly.graph_objects as go
+
+    counts = df['prediction_class'].value_counts()
     
-    newest_item = df.iloc[0] if not df.empty else None
-    system_status = "SECURE"
-    if newest_item is not None and newest_item['prediction_class'] != 'Benign':
-        system_status = "CRITICAL"
-else:
-    benign_count, ddos_count, brute_count, other_count, threat_count, threat_rate = 0, 0, 0, 0, 0, 0.0
-    newest_item = None
-    system_status = "SECURE"
-
-# Header Row
-col_header_1, col_header_2 = st.columns([3, 1])
-with col_header_1:
-    st.markdown(f"""
-    <div style="display: flex; align-items: center; gap: 15px;">
-        <div style="background: rgba(16, 185, 129, 0.1); padding: 10px; border-radius: 50%;">
-            <span style="font-size: 30px;">🛡️</span>
-        </div>
-        <div>
-            <h1 style="margin: 0; background: linear-gradient(to right, #22d3ee, #3b82f6, #a855f7); -webkit-background-clip: text; color: transparent;">SHIELDGUARD SOC</h1>
-            <p style="margin: 0; color: #94a3b8; font-size: 14px;">Advanced Network Intrusion Detection System</p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col_header_2:
-    status_color = "#34d399" if system_status == "SECURE" else "#f43f5e"
-    status_icon = "🔒" if system_status == "SECURE" else "🚨"
-    st.markdown(f"""
-    <div style="text-align: right;">
-        <div style="text-transform: uppercase; letter-spacing: 1px; font-size: 10px; color: #64748b; font-weight: bold;">System Status</div>
-        <div style="font-size: 24px; font-weight: bold; color: {status_color};">
-            {status_icon} {system_status}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
-st.markdown("<br>", unsafe_allow_html=True)
-
-# 3. Metric Cards (Grid)
-m1, m2, m3, m4 = st.columns(4)
-m1.metric("Total Analyzed", total_pkts)
-m2.metric("Benign Traffic", benign_count)
-m3.metric("Threat Detected", threat_count, delta=f"{threat_count} Events", delta_color="inverse")
-m4.metric("Threat Rate", f"{threat_rate:.1f}%")
-
-st.markdown("<br>", unsafe_allow_html=True)
-
-# 4. Main Charts (Left: Confidence, Right: Pie & Mitigation)
-row_charts = st.columns([2, 1])
-
-with row_charts[0]:
-    # --- Confidence Area Chart ---
-    st.markdown("### 📈 Confidence Trend")
-    if not df.empty:
-        # Take last 50 points, reverse for chart (old -> new)
-        chart_df = df.head(50).iloc[::-1].copy()
-        
-        fig = px.area(chart_df, x="timestamp", y="confidence", 
-                      template="plotly_dark",
-                      color_discrete_sequence=['#3b82f6'])
-        
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            margin=dict(l=0, r=0, t=10, b=0),
-            height=250,
-            xaxis=dict(showgrid=False, title=None),
-            yaxis=dict(showgrid=True, gridcolor="#1e293b", range=[0, 1.1])
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("No data available")
-        
-    # --- Live Traffic Table ---
-    st.markdown("### 🖥️ Live Traffic Log")
-    if not df.empty:
-        # Build a nice table dataframe
-        display_df = df.head(10).copy()
-        
-        # Display
-        # Using HTML table for full control over badges
-        table_html = '<table style="width:100%; border-collapse: collapse; color: #cbd5e1; font-size: 12px;">'
-        table_html += '<thead style="background: #0f172a; border-bottom: 1px solid #334155;">'
-        table_html += '<tr>'
-        table_html += '<th style="text-align: left; padding: 8px;">TIMESTAMP</th>'
-        table_html += '<th style="text-align: left; padding: 8px;">CLASS</th>'
-        table_html += '<th style="text-align: left; padding: 8px;">CONFIDENCE</th>'
-        table_html += '<th style="text-align: left; padding: 8px;">SUMMARY</th>'
-        table_html += '</tr></thead><tbody>'
-        
-        for index, row in display_df.iterrows():
-            ts = row['timestamp'].strftime('%H:%M:%S')
-            cls = row['prediction_class']
-            conf = row['confidence'] * 100
-            summ = row['input_summary']
-            
-            # Badge Class
-            badge_class = "badge-benign"
-            if cls == "DDoS": badge_class = "badge-ddos"
-            elif cls == "Brute Force": badge_class = "badge-brute"
-            elif cls == "Other": badge_class = "badge-other"
-            
-            table_html += '<tr style="border-bottom: 1px solid #1e293b;">'
-            table_html += f'<td style="padding: 8px; font-family: monospace;">{ts}</td>'
-            table_html += f'<td style="padding: 8px;"><span class="badge {badge_class}">{cls}</span></td>'
-            table_html += '<td style="padding: 8px;">'
-            table_html += '<div style="display: flex; align-items: center; gap: 8px;">'
-            table_html += '<div style="width: 50px; height: 6px; background: #334155; border-radius: 3px; overflow: hidden;">'
-            table_html += f'<div style="width: {conf}%; height: 100%; background: #3b82f6;"></div>'
-            table_html += '</div>'
-            table_html += f'<span>{conf:.0f}%</span>'
-            table_html += '</div></td>'
-            table_html += f'<td style="padding: 8px; color: #94a3b8;">{summ}</td>'
-            table_html += '</tr>'
-            
-        table_html += "</tbody></table>"
-        st.markdown(table_html, unsafe_allow_html=True)
-
-with row_charts[1]:
-    # --- Pie Chart ---
-    st.markdown("### Traffic Distribution")
-    if total_pkts > 0:
-        counts = df['prediction_class'].value_counts()
-        pie_data = pd.DataFrame({'Class': counts.index, 'Count': counts.values})
-        
-        fig_pie = px.pie(pie_data, names='Class', values='Count', hole=0.6,
-                         color='Class',
-                         color_discrete_map=COLORS)
-        fig_pie.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            margin=dict(l=0, r=0, t=0, b=0),
-            height=200,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
-
-    # --- Active Mitigation Card ---
-    is_critical = system_status == "CRITICAL"
+    fig_pie = go.Figure(go.Pie(labels=counts.index, values=counts.values, hole=0.6,
+                               marker=dict(colors=[COLORS.get(c) for c in counts.index])))
+    fig_pie.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=200,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+    )
+    return fig_pie
+
+def build_traffic_table(df):
+    """Builds the live traffic HTML table with vectorized string ops (no iterrows)."""
+    display_df = df.head(10)
+    ts = display_df['timestamp'].dt.strftime('%H:%M:%S')
+    cls = display_df['prediction_class'].astype(str)
+    badge = cls.map(BADGE_CLASS).fillna("badge-benign")
+    conf = display_df['confidence'].astype(float) * 100
+
+    rows = (
+        '<tr style="border-bottom: 1px solid #1e293b;">'
+        '<td style="padding: 8px; font-family: monospace;">' + ts + '</td>'
+        '<td style="padding: 8px;"><span class="badge ' + badge + '">' + cls + '</span></td>'
+        '<td style="padding: 8px;"><div style="display: flex; align-items: center; gap: 8px;">'
+        '<div style="width: 50px; height: 6px; background: #334155; border-radius: 3px; overflow: hidden;">'
+        '<div style="width: ' + conf.astype(str) + '%; height: 100%; background: #3b82f6;"></div>'
+        '</div><span>' + conf.round(0).astype(int).astype(str) + '%</span></div></td>'
+        '<td style="padding: 8px; color: #94a3b8;">' + display_df['input_summary'].astype(str) + '</td>'
+        '</tr>'
+    )
+
+    return (
+        '<table style="width:100%; border-collapse: collapse; color: #cbd5e1; font-size: 12px;">'
+        '<thead style="background: #0f172a; border-bottom: 1px solid #334155;"><tr>'
+        '<th style="text-align: left; padding: 8px;">TIMESTAMP</th>'
+        '<th style="text-align: left; padding: 8px;">CLASS</th>'
+        '<th style="text-align: left; padding: 8px;">CONFIDENCE</th>'
+        '<th style="text-align: left; padding: 8px;">SUMMARY</th>'
+        '</tr></thead><tbody>' + rows.str.cat() + '</tbody></table>'
+    )
+
+def find_incident(newest_item, incidents):
+    """
+    Active incident of the newest threat (from /incidents), else the most recently
+    updated one of its class (mitigation actions are per class), else of any class.
+    Incident ids are per replica, so a row predicted by another replica never
+    matches by id.
+    """
+    if newest_item is None:
+        return max(incidents.values(), key=lambda i: i["version"], default=None)
+    incident_id, replica = newest_item.get("incident_id"), newest_item.get("replica")
+    if incident_id is not None and pd.notna(incident_id) and int(incident_id) in incidents:
+        incident = incidents[int(incident_id)]
+        if replica is None or pd.isna(replica) or str(replica) == str(incident.get("replica")):
+            return incident
+    same_class = [i for i in incidents.values() if i["prediction_class"] == newest_item.get("prediction_class")]
+    return max(same_class or incidents.values(), key=lambda i: i["version"], default=None)
+
+def build_mitigation_card(summary, incidents):
+    newest_item = summary["newest"]
+    incident = find_incident(newest_item, incidents)
+    is_critical = summary["status"] == "CRITICAL"
     card_class = "mitigation-card mitigation-danger" if is_critical else "mitigation-card"
     
     mitigation_html = f'<div class="{card_class}">'
@@ -438,11 +298,14 @@ with row_charts[1]:
     if is_critical and newest_item is not None:
         mitigation_html += '<div style="background: rgba(239, 68, 68, 0.1); padding: 10px; border-radius: 6px; border: 1px solid rgba(239, 68, 68, 0.2);">'
         mitigation_html += f'<h4 style="margin: 0 0 5px 0; color: #f87171;">{newest_item["threat_type"]}</h4>'
-        mitigation_html += f'<p style="margin: 0 0 10px 0; font-size: 12px; color: #fecaca;">Confidence: {newest_item["confidence"]*100:.1f}%</p>'
+        mitigation_html += f'<p style="margin: 0 0 10px 0; font-size: 12px; color: #fecaca;">Confidence: {newest_item["confidence"]*100:.1f}%'
+        if incident is not None:
+            mitigation_html += f' · Incident #{incident["id"]} ({incident["count"]} flows)'
+        mitigation_html += '</p>'
         mitigation_html += '<hr style="border-color: rgba(239, 68, 68, 0.2); margin: 5px 0;">'
         mitigation_html += '<div style="display: grid; gap: 5px;">'
         
-        for action in newest_item.get('mitigation_actions', [])[:3]:
+        for action in (incident['mitigation_actions'] if incident else [])[:3]:
             mitigation_html += f'<div style="display: flex; gap: 8px; font-size: 12px; color: #fee2e2;"><span>✔</span> {action}</div>'
             
         mitigation_html += '</div></div>'
@@ -454,82 +317,175 @@ with row_charts[1]:
         mitigation_html += '</div>'
         
     mitigation_html += "</div>"
-    st.markdown(mitigation_html, unsafe_allow_html=True)
-
-st.markdown("<br>", unsafe_allow_html=True)
+    return mitigation_html
+
+def build_log_table(df_subset):
+    """Builds the SOC action log HTML table with vectorized string ops (no iterrows)."""
+    ts = pd.to_datetime(df_subset['time']).dt.strftime('%H:%M:%S')
+    cat = df_subset['category'].astype(str)
+    cat_style = cat.map(CATEGORY_STYLE).fillna("color: #94a3b8;")
+
+    rows = (
+        '<tr style="border-bottom: 1px solid #334155;">'
+        '<td style="padding: 8px; font-family: monospace; color: #64748b;">' + ts + '</td>'
+        '<td style="padding: 8px;"><span style="' + cat_style + '">' + cat + '</span></td>'
+        '<td style="padding: 8px;"><span style="border: 1px solid #475569; padding: 2px 6px; border-radius: 4px; font-size: 10px;">' + df_subset['type'].astype(str) + '</span></td>'
+        '<td style="padding: 8px;"><code style="background: #0f172a; padding: 2px 4px; border-radius: 3px; color: #f1f5f9;">' + df_subset['target'].astype(str) + '</code></td>'
+        '<td style="padding: 8px; color: #cbd5e1;">' + df_subset['details'].astype(str) + '</td>'
+        '<td style="padding: 8px; text-align: right; color: #34d399; font-weight: bold;">✔ ' + df_subset['status'].astype(str) + '</td>'
+        '</tr>'
+    )
+
+    return (
+        '<table style="width:100%; border-collapse: collapse; font-size: 12px; color: #cbd5e1;">'
+        '<thead style="background: #1e293b; color: #94a3b8;"><tr>'
+        '<th style="padding: 8px; text-align: left;">TIME</th>'
+        '<th style="padding: 8px; text-align: left;">CATEGORY</th>'
+        '<th style="padding: 8px; text-align: left;">TYPE</th>'
+        '<th style="padding: 8px; text-align: left;">TARGET</th>'
+        '<th style="padding: 8px; text-align: left;">DETAILS</th>'
+        '<th style="padding: 8px; text-align: right;">STATUS</th>'
+        '</tr></thead><tbody>' + rows.str.cat() + '</tbody></table>'
+    )
 
-# 5. SOC Operations Center (Table with Tabs)
-st.markdown("### 📟 Security Operations Center")
+# ==============================================================================
+# LAYOUT RENDERING
+# ==============================================================================
 
-# Filter Log Data
-logs = st.session_state.action_log
-logs_df = pd.DataFrame(logs)
-# Convert Time
-if not logs_df.empty and 'time' in logs_df.columns:
-    logs_df['time'] = pd.to_datetime(logs_df['time'])
-    logs_df = logs_df.sort_values('time', ascending=False)
+# 1. Identity Header (static, rendered once per full run)
+st.markdown("""
+<div class="identity-header">
+    <div class="id-section">
+        <span>NAMA: <span class="text-cyan">JOSIA GIVEN SANTOSO</span></span>
+        <span>|</span>
+        <span>NIM: <span class="text-emerald">36230035</span></span>
+    </div>
+    <div class="id-section">
+        <span>DOSEN: ALANIAH NISRINA, B.ENG., M.ENG.</span>
+        <span>|</span>
+        <span>MK: KEAMANAN DATA</span>
+    </div>
+</div>
+""", unsafe_allow_html=True)
 
-tab_all, tab_net, tab_end, tab_id = st.tabs(["All Events", "Network", "Endpoint", "Identity"])
+@st.fragment(run_every=REFRESH_RATE)
+def live_overview():
+    """Status, metrics, charts and live table. Re-runs alone every REFRESH_RATE seconds."""
+    snap = get_poller().snapshot()
+    df, version = snap.history_df, snap.version
+    summary = cached("summary", version, lambda: compute_summary(df))
+    system_status = summary["status"]
+
+    # 2. Header Row
+    col_header_1, col_header_2 = st.columns([3, 1])
+    with col_header_1:
+        st.markdown(f"""
+        <div style="display: flex; align-items: center; gap: 15px;">
+            <div style="background: rgba(16, 185, 129, 0.1); padding: 10px; border-radius: 50%;">
+                <span style="font-size: 30px;">🛡️</span>
+            </div>
+            <div>
+                <h1 style="margin: 0; background: linear-gradient(to right, #22d3ee, #3b82f6, #a855f7); -webkit-background-clip: text; color: transparent;">SHIELDGUARD SOC</h1>
+                <p style="margin: 0; color: #94a3b8; font-size: 14px;">Advanced Network Intrusion Detection System</p>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col_header_2:
+        status_color = "#34d399" if system_status == "SECURE" else "#f43f5e"
+        status_icon = "🔒" if system_status == "SECURE" else "🚨"
+        st.markdown(f"""
+        <div style="text-align: right;">
+            <div style="text-transform: uppercase; letter-spacing: 1px; font-size: 10px; color: #64748b; font-weight: bold;">System Status</div>
+            <div style="font-size: 24px; font-weight: bold; color: {status_color};">
+                {status_icon} {system_status}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # 3. Metric Cards (Grid)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Total Analyzed", summary["total"])
+    m2.metric("Benign Traffic", summary["benign"])
+    m3.metric("Threat Detected", summary["threat"], delta=f"{summary['threat']} Events", delta_color="inverse")
+    m4.metric("Threat Rate", f"{summary['threat_rate']:.1f}%")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # 4. Main Charts (Left: Confidence, Right: Pie & Mitigation)
+    row_charts = st.columns([2, 1])
+
+    with row_charts[0]:
+        # --- Confidence Area Chart ---
+        st.markdown("### 📈 Confidence Trend")
+        trend_range = st.radio("Range", list(TREND_RANGES), horizontal=True, key="trend_range",
+                               label_visibility="collapsed")
+        ts = get_poller().fetch_timeseries(TREND_RANGES[trend_range], TREND_POINTS)
+        if ts and any(ts["count"]):
+            st.plotly_chart(cached(f"confidence_fig_{trend_range}", ts["end"], lambda: build_confidence_figure(ts)),
+                            use_container_width=True, key="confidence_chart")
+        else:
+            st.info("No data available")
+            
+        # --- Live Traffic Table ---
+        st.markdown("### 🖥️ Live Traffic Log")
+        if not df.empty:
+            st.markdown(cached("traffic_table", version, lambda: build_traffic_table(df)), unsafe_allow_html=True)
+
+    with row_charts[1]:
+        # --- Pie Chart ---
+        st.markdown("### Traffic Distribution")
+        if summary["total"] > 0:
+            st.plotly_chart(cached("pie_fig", version, lambda: build_pie_figure(df)),
+                            use_container_width=True, key="pie_chart")
+
+        # --- Active Mitigation Card ---
+        st.markdown(cached("mitigation_card", version, lambda: build_mitigation_card(summary, snap.incidents)),
+                    unsafe_allow_html=True)
+
+    # Render time of traced predictions, reported to /traces/display by the poller
+    get_poller().mark_rendered(version)
+
+@st.fragment(run_every=REFRESH_RATE)
+def soc_operations():
+    """SOC action log tabs, one server-side /actions page at a time."""
+    st.markdown("### 📟 Security Operations Center")
+
+    snap = get_poller().snapshot()
+    tabs = st.tabs(["All Events", "Network", "Endpoint", "Identity"])
+
+    for tab, category in zip(tabs, ["ALL", "NETWORK", "ENDPOINT", "IDENTITY"]):
+        with tab:
+            render_action_page(category, snap)
+
+def render_action_page(category, snap):
+    # Cursor stack per tab: [] = newest page, [c1, c2] = older pages
+    stack_key = f"action_cursors_{category}"
+    cursors = st.session_state.setdefault(stack_key, [])
+
+    if not cursors:
+        page_df, next_cursor = snap.action_pages[category]
+        html = cached(f"log_table_{category}", snap.version,
+                      lambda: build_log_table(page_df) if not page_df.empty else None)
+    else:
+        try:
+            html, next_cursor = older_action_page_html(category, cursors[-1])
+        except Exception:
+            html, next_cursor = None, None
 
-def render_log_table(df_subset, category_color="slate"):
-    if df_subset.empty:
+    if html is None:
         st.info("No events in this category.")
-        return
-
-    # Use a similar styling approach
-    # Use a similar styling approach
-    t_html = '<table style="width:100%; border-collapse: collapse; font-size: 12px; color: #cbd5e1;">'
-    t_html += '<thead style="background: #1e293b; color: #94a3b8;">'
-    t_html += '<tr>'
-    t_html += '<th style="padding: 8px; text-align: left;">TIME</th>'
-    t_html += '<th style="padding: 8px; text-align: left;">CATEGORY</th>'
-    t_html += '<th style="padding: 8px; text-align: left;">TYPE</th>'
-    t_html += '<th style="padding: 8px; text-align: left;">TARGET</th>'
-    t_html += '<th style="padding: 8px; text-align: left;">DETAILS</th>'
-    t_html += '<th style="padding: 8px; text-align: right;">STATUS</th>'
-    t_html += '</tr></thead><tbody>'
-    
-    for idx, row in df_subset.iterrows():
-        ts = row['time'].strftime('%H:%M:%S')
-        cat = row['category']
-        type_ = row['type']
-        target = row['target']
-        details = row['details']
-        status = row['status']
-        
-        # Color Logic
-        cat_style = "color: #94a3b8;"
-        if cat == "NETWORK": cat_style = "color: #22d3ee; background: rgba(34, 211, 238, 0.1); padding: 2px 6px; border-radius: 4px; font-weight: bold;"
-        elif cat == "ENDPOINT": cat_style = "color: #c084fc; background: rgba(192, 132, 252, 0.1); padding: 2px 6px; border-radius: 4px; font-weight: bold;"
-        elif cat == "IDENTITY": cat_style = "color: #fbbf24; background: rgba(251, 191, 36, 0.1); padding: 2px 6px; border-radius: 4px; font-weight: bold;"
-        
-        t_html += '<tr style="border-bottom: 1px solid #334155;">'
-        t_html += f'<td style="padding: 8px; font-family: monospace; color: #64748b;">{ts}</td>'
-        t_html += f'<td style="padding: 8px;"><span style="{cat_style}">{cat}</span></td>'
-        t_html += f'<td style="padding: 8px;"><span style="border: 1px solid #475569; padding: 2px 6px; border-radius: 4px; font-size: 10px;">{type_}</span></td>'
-        t_html += f'<td style="padding: 8px;"><code style="background: #0f172a; padding: 2px 4px; border-radius: 3px; color: #f1f5f9;">{target}</code></td>'
-        t_html += f'<td style="padding: 8px; color: #cbd5e1;">{details}</td>'
-        t_html += f'<td style="padding: 8px; text-align: right; color: #34d399; font-weight: bold;">✔ {status}</td>'
-        t_html += '</tr>'
-        
-    t_html += "</tbody></table>"
-    st.markdown(t_html, unsafe_allow_html=True)
-
-with tab_all:
-    render_log_table(logs_df)
-with tab_net:
-    if not logs_df.empty:
-        render_log_table(logs_df[logs_df['category'] == 'NETWORK'])
-    else: st.info("No Data")
-with tab_end:
-    if not logs_df.empty:
-        render_log_table(logs_df[logs_df['category'] == 'ENDPOINT'])
-    else: st.info("No Data")
-with tab_id:
-    if not logs_df.empty:
-        render_log_table(logs_df[logs_df['category'] == 'IDENTITY'])
-    else: st.info("No Data")
-
-# Auto-Refresh (Bottom)
-time.sleep(REFRESH_RATE)
-st.rerun()
+    else:
+        st.markdown(html, unsafe_allow_html=True)
+
+    col_prev, col_page, col_next = st.columns([1, 4, 1])
+    col_prev.button("◀ Newer", key=f"newer_{category}", disabled=not cursors, on_click=cursors.pop)
+    col_page.caption(f"Page {len(cursors) + 1}")
+    col_next.button("Older ▶", key=f"older_{category}", disabled=next_cursor is None,
+                    on_click=cursors.append, args=(next_cursor,))
+
+live_overview()
+st.markdown("<br>", unsafe_allow_html=True)
+soc_operations()
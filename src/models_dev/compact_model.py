@@ -0,0 +1,264 @@
+"""
+Model compaction for the served XGBoost artifact.
+
+    1. Truncates trailing boosting rounds whose marginal validation gain
+       (drop in multi-class log loss) is below a threshold
+    2. Drops the sklearn XGBClassifier wrapper and saves the raw Booster in
+       binary UBJSON (split thresholds and leaf values stay float32, the
+       precision XGBoost evaluates them in)
+    3. Reports original vs compacted: size on disk, resident memory after
+       load, batch latency and per-class F1
+
+The compacted .ubj file is loaded by ModelLoader like the .joblib one.
+
+Usage (from the project root):
+    python src/models_dev/compact_model.py --input src/models_dev/datasets/IDS_2018_Final.parquet
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import f1_score, log_loss
+
+from dataset_cache import DEFAULT_CACHE_DIR, TARGET_COLUMN, TARGET_NAMES, get_clean_dataset, iter_clean_batches
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+MODELS_DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(MODELS_DEV_DIR, "models", "xgboost.joblib")
+DEFAULT_SCALER = os.path.join(MODELS_DEV_DIR, "models", "scaler.joblib")
+DEFAULT_INPUT = os.path.join(MODELS_DEV_DIR, "datasets", "IDS_2018_Final.parquet")
+
+RANDOM_STATE = 42
+EVAL_ROWS = 100_000
+MIN_GAIN = 1e-3          # Log loss a truncated tail may cost at most
+BATCH_SIZES = (1, 64, 1024)
+LATENCY_REPEATS = 50
+
+
+def rss_bytes():
+    """Current resident memory of this process, or None if it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def load_artifact(path):
+    """sklearn wrapper (.joblib) or raw Booster (.ubj / .json)."""
+    if path.endswith((".ubj", ".json")):
+        booster = xgb.Booster()
+        booster.load_model(path)
+        return booster
+    return joblib.load(path)
+
+
+def _measure_load(path, queue):
+    before = rss_bytes()
+    model = load_artifact(path)
+    after = rss_bytes()
+    queue.put(None if before is None else after - before)
+    del model
+
+
+def load_rss(path):
+    """Resident memory added by loading `path`, measured in a fresh process."""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure_load, args=(path, queue))
+    proc.start()
+    delta = queue.get()
+    proc.join()
+    return delta
+
+
+def predict_proba(model, X):
+    if isinstance(model, xgb.Booster):
+        return model.inplace_predict(X)
+    return model.predict_proba(X)
+
+
+# ==============================================================================
+# DATA
+# ==============================================================================
+def load_eval_data(input_path, scaler, eval_rows, cache_dir, training_report=None):
+    """
+    Validation / test rows scaled with the served scaler. With the model's
+    training_report.json the exact held-out splits of train.py are rebuilt;
+    otherwise a deterministic sample of the cleaned dataset is split in half
+    (it may overlap the training rows).
+    """
+    if training_report is not None:
+        return load_training_splits(input_path, scaler, eval_rows, cache_dir, training_report)
+
+    print("[WARNING] training_report.json not found: evaluating on a random sample (may include training rows)")
+    clean_path = get_clean_dataset(input_path, cache_dir)
+    features = list(scaler.feature_names_in_)
+    rng = np.random.default_rng(RANDOM_STATE)
+    xs, ys = [], []
+    for df in iter_clean_batches(clean_path, columns=features + [TARGET_COLUMN]):
+        keep = rng.random(len(df)) < 0.5
+        xs.append(df.loc[keep, features])
+        ys.append(df.loc[keep, TARGET_COLUMN].cat.codes.to_numpy())
+    X = pd.concat(xs, ignore_index=True)
+    y = np.concatenate(ys)
+    if len(y) > eval_rows:
+        idx = rng.choice(len(y), eval_rows, replace=False)
+        X, y = X.iloc[idx], y[idx]
+    X = scaler.transform(X).astype(np.float32)
+    half = len(y) // 2
+    return (X[:half], y[:half]), (X[half:], y[half:])
+
+
+def load_training_splits(input_path, scaler, eval_rows, cache_dir, training_report):
+    from train import StageReport, load_splits, scale_inplace
+
+    args = training_report["args"]
+    splits, feature_names, _ = load_splits(input_path, args["sample_frac"], args["chunk_rows"],
+                                           StageReport(), cache_dir)
+    cols = [feature_names.index(f) for f in scaler.feature_names_in_]
+    rng = np.random.default_rng(RANDOM_STATE)
+    out = []
+    for split in ("val", "test"):
+        X, y = splits[split]
+        if len(y) > eval_rows // 2:
+            idx = np.sort(rng.choice(len(y), eval_rows // 2, replace=False))
+            X, y = X[idx], y[idx]
+        out.append((scale_inplace(np.ascontiguousarray(X[:, cols]), scaler, len(y) or 1), y))
+    return tuple(out)
+
+
+# ==============================================================================
+# TRUNCATION
+# ==============================================================================
+def loss_curve(booster, X, y):
+    """Validation log loss after each boosting round."""
+    dval = xgb.DMatrix(X)
+    labels = list(range(len(TARGET_NAMES)))
+    return np.array([
+        log_loss(y, booster.predict(dval, iteration_range=(0, k)), labels=labels)
+        for k in range(1, booster.num_boosted_rounds() + 1)
+    ])
+
+
+def choose_rounds(losses, min_gain):
+    """Fewest rounds whose loss is within `min_gain` of the best: the rest add less than that."""
+    return int(np.argmax(losses <= losses.min() + min_gain)) + 1
+
+
+# ==============================================================================
+# REPORT
+# ==============================================================================
+def batch_latency_ms(model, X, batch_size, repeats=LATENCY_REPEATS):
+    batch = X[:batch_size]
+    predict_proba(model, batch)  # Warm-up
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        predict_proba(model, batch)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times) * 1000)
+
+
+def to_mb(n_bytes):
+    return n_bytes / 2**20 if n_bytes is not None else None
+
+
+def describe(name, path, model, X_test, y_test):
+    y_pred = np.argmax(predict_proba(model, X_test), axis=1)
+    f1 = f1_score(y_test, y_pred, labels=range(len(TARGET_NAMES)), average=None, zero_division=0)
+    booster = model if isinstance(model, xgb.Booster) else model.get_booster()
+    return {
+        "name": name,
+        "path": path,
+        "rounds": booster.num_boosted_rounds(),
+        "size_mb": os.path.getsize(path) / 2**20,
+        "load_rss_mb": to_mb(load_rss(path)),
+        "latency_ms": {bs: batch_latency_ms(model, X_test, bs) for bs in BATCH_SIZES},
+        "f1": dict(zip(TARGET_NAMES, map(float, f1))),
+        "f1_macro": float(f1.mean()),
+    }
+
+
+def print_report(original, compact):
+    def fmt(v, spec):
+        return format(v, spec) if v is not None else "n/a"
+
+    print("\n" + "=" * 64)
+    print(f"{'METRIC':<26} {'ORIGINAL':>16} {'COMPACT':>16}")
+    print("-" * 64)
+    print(f"{'Boosting rounds':<26} {original['rounds']:>16} {compact['rounds']:>16}")
+    print(f"{'Size on disk (MB)':<26} {original['size_mb']:>16.2f} {compact['size_mb']:>16.2f}")
+    print(f"{'Resident after load (MB)':<26} {fmt(original['load_rss_mb'], '.1f'):>16} {fmt(compact['load_rss_mb'], '.1f'):>16}")
+    for bs in BATCH_SIZES:
+        label = f"Latency batch={bs} (ms)"
+        print(f"{label:<26} {original['latency_ms'][bs]:>16.3f} {compact['latency_ms'][bs]:>16.3f}")
+    for cls in TARGET_NAMES:
+        print(f"{'F1 ' + cls:<26} {original['f1'][cls]:>16.4f} {compact['f1'][cls]:>16.4f}")
+    print(f"{'F1 macro':<26} {original['f1_macro']:>16.4f} {compact['f1_macro']:>16.4f}")
+    print("=" * 64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the served XGBoost model and report the savings")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--scaler", default=DEFAULT_SCALER)
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="Raw IDS2018 Parquet (cleaned via dataset_cache)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--output", default=None, help="Default: <model dir>/xgboost_compact.ubj")
+    parser.add_argument("--min-gain", type=float, default=MIN_GAIN,
+                        help="Truncate the tail of rounds that improves validation log loss by less than this")
+    parser.add_argument("--eval-rows", type=int, default=EVAL_ROWS)
+    args = parser.parse_args()
+    output = args.output or os.path.join(os.path.dirname(args.model), "xgboost_compact.ubj")
+
+    original = load_artifact(args.model)
+    scaler = joblib.load(args.scaler)
+    booster = original if isinstance(original, xgb.Booster) else original.get_booster()
+    report_path = os.path.join(os.path.dirname(args.model), "training_report.json")
+    training_report = None
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            training_report = json.load(f)
+    (X_val, y_val), (X_test, y_test) = load_eval_data(args.input, scaler, args.eval_rows, args.cache_dir,
+                                                      training_report)
+    print(f"[INFO] Validation rows: {len(y_val):,} | test rows: {len(y_test):,}")
+
+    losses = loss_curve(booster, X_val, y_val)
+    rounds = choose_rounds(losses, args.min_gain)
+    print(f"[INFO] Log loss: {losses[0]:.4f} (1 round) -> {losses.min():.4f} (best, round {losses.argmin() + 1}) "
+          f"-> {losses[-1]:.4f} ({len(losses)} rounds)")
+    print(f"[INFO] Keeping {rounds}/{len(losses)} rounds (tail gain < {args.min_gain})")
+
+    compact = booster[:rounds]
+    compact.save_model(output)
+    compact = load_artifact(output)
+
+    report = {
+        "min_gain": args.min_gain,
+        "original": describe("original", args.model, original, X_test, y_test),
+        "compact": describe("compact", output, compact, X_test, y_test),
+    }
+    print_report(report["original"], report["compact"])
+    print(f"[SUCCESS] Compacted model saved to: {output}")
+
+    with open(os.path.splitext(output)[0] + "_report.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Content-addressed cache of the cleaned IDS2018 dataset.
+
+The notebook cleaning stage (drop `Timestamp`, repeated header rows,
+infinities / NaN, `group_labels` remapping) is materialised once as
+partitioned Parquet with compact dtypes (float32 features, categorical
+`Label_Category`). The cache key is a hash of the input file contents and
+the cleaning configuration, so any change to either produces a new entry
+and an unchanged input is never cleaned twice.
+
+Usage (from the project root):
+    python src/models_dev/dataset_cache.py --input src/models_dev/datasets/IDS_2018_Final.parquet
+
+    from dataset_cache import get_clean_dataset, load_clean
+    path = get_clean_dataset(INPUT_FILE)
+    df = load_clean(path, columns=["Flow Duration", "Label_Category"])
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+MODELS_DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(MODELS_DEV_DIR, "datasets", "cache")
+
+LABEL_COLUMN = "Label"
+TARGET_COLUMN = "Label_Category"
+TARGET_NAMES = ["Benign", "Brute Force", "DDoS", "Other"]  # Label_Encoded order (sorted)
+
+# Everything that changes the cleaned output must be in here (it is part of the key).
+# Bump "version" when the cleaning code itself changes.
+CLEANING_CONFIG = {
+    "version": 1,
+    "drop_columns": ["Timestamp"],
+    "drop_header_rows": True,
+    "replace_inf": True,
+    "dropna": True,
+    "feature_dtype": "float32",
+    "label_groups": TARGET_NAMES,
+}
+
+PARTITION_ROWS = 1_000_000
+HASH_BLOCK = 8 * 2**20
+MANIFEST = "_manifest.json"
+
+
+def group_labels(label):
+    """Same grouping as the notebook (4 categories)."""
+    label = str(label).lower()
+    if 'benign' in label:
+        return 'Benign'
+    elif 'dos' in label or 'ddos' in label or 'hoic' in label or 'loic' in label:
+        return 'DDoS'
+    elif 'brute' in label or 'ssh' in label or 'ftp' in label or 'web' in label:
+        return 'Brute Force'
+    else:
+        return 'Other'
+
+
+# ==============================================================================
+# CACHE KEY
+# ==============================================================================
+def file_digest(path: str, memo_dir: str) -> str:
+    """
+    sha256 of a file's contents. The digest is memoised on (path, size, mtime)
+    so an unchanged multi-GB input is only read once.
+    """
+    st = os.stat(path)
+    memo_key = hashlib.sha256(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()[:16]
+    memo_path = os.path.join(memo_dir, "_digests", memo_key)
+    if os.path.exists(memo_path):
+        with open(memo_path) as f:
+            return f.read().strip()
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    os.makedirs(os.path.dirname(memo_path), exist_ok=True)
+    with open(memo_path, "w") as f:
+        f.write(digest)
+    return digest
+
+
+def cache_key(input_paths: List[str], config: Dict, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    h = hashlib.sha256()
+    for path in sorted(input_paths):
+        h.update(file_digest(path, cache_dir).encode())
+    h.update(json.dumps(config, sort_keys=True).encode())
+    return h.hexdigest()[:24]
+
+
+# ==============================================================================
+# CLEANING
+# ==============================================================================
+def clean_chunk(df: pd.DataFrame, config: Dict = CLEANING_CONFIG) -> pd.DataFrame:
+    """Notebook cleaning steps applied to one chunk. Returns float32 features + categorical Label_Category."""
+    df = df.drop(columns=[c for c in config["drop_columns"] if c in df.columns])
+    df.columns = [c.strip() for c in df.columns]
+    if config["drop_header_rows"]:
+        df = df[df[LABEL_COLUMN] != LABEL_COLUMN]
+    features = df.drop(columns=LABEL_COLUMN)
+    text_cols = [c for c in features.columns if not pd.api.types.is_numeric_dtype(features[c])]
+    if len(text_cols):
+        features[text_cols] = features[text_cols].apply(pd.to_numeric, errors="coerce")
+    values = features.to_numpy(dtype=config["feature_dtype"])
+    if config["replace_inf"]:
+        values[np.isinf(values)] = np.nan
+    keep = ~np.isnan(values).any(axis=1) if config["dropna"] else np.ones(len(values), dtype=bool)
+
+    clean = pd.DataFrame(values[keep], columns=features.columns)
+    # group_labels runs once per distinct label, not once per row
+    labels = df[LABEL_COLUMN].to_numpy()[keep]
+    uniques, codes = np.unique(labels.astype(str), return_inverse=True)
+    grouped = np.array([group_labels(u) for u in uniques], dtype=object)[codes]
+    clean[TARGET_COLUMN] = pd.Categorical(grouped, categories=config["label_groups"])
+    return clean
+
+
+def build_clean_dataset(input_path: str, out_dir: str, config: Dict = CLEANING_CONFIG,
+                        partition_rows: int = PARTITION_ROWS) -> Dict:
+    """Streams the raw Parquet through clean_chunk into part-*.parquet files (zstd)."""
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    t0 = time.perf_counter()
+    raw_rows = clean_rows = 0
+    parts = 0
+    pf = pq.ParquetFile(input_path)
+    for batch in pf.iter_batches(batch_size=partition_rows):
+        raw_rows += batch.num_rows
+        df = clean_chunk(batch.to_pandas(), config)
+        if df.empty:
+            continue
+        clean_rows += len(df)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, os.path.join(tmp_dir, f"part-{parts:05d}.parquet"), compression="zstd")
+        parts += 1
+
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "config": config,
+        "raw_rows": raw_rows,
+        "rows": clean_rows,
+        "partitions": parts,
+        "build_seconds": round(time.perf_counter() - t0, 2),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    # Publish atomically: a half-written entry is never picked up as a cache hit
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+def get_clean_dataset(input_path: str, cache_dir: str = DEFAULT_CACHE_DIR, config: Dict = CLEANING_CONFIG,
+                      rebuild: bool = False) -> str:
+    """Returns the directory of the cleaned dataset for this input + config, building it on a miss."""
+    key = cache_key([input_path], config, cache_dir)
+    out_dir = os.path.join(cache_dir, key)
+    if not rebuild and os.path.exists(os.path.join(out_dir, MANIFEST)):
+        print(f"[CACHE] Hit {key} ({out_dir})")
+        return out_dir
+
+    print(f"[CACHE] Miss {key}, cleaning {input_path}...")
+    manifest = build_clean_dataset(input_path, out_dir, config)
+    print(f"[CACHE] Built {manifest['rows']:,} rows in {manifest['partitions']} partitions "
+          f"({manifest['build_seconds']}s)")
+    return out_dir
+
+
+# ==============================================================================
+# READING
+# ==============================================================================
+def read_manifest(path: str) -> Dict:
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def feature_columns(path: str) -> List[str]:
+    schema = ds.dataset(path, format="parquet").schema
+    return [name for name in schema.names if name != TARGET_COLUMN]
+
+
+def iter_clean_batches(path: str, columns: Optional[List[str]] = None,
+                       batch_size: int = PARTITION_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields cleaned chunks as DataFrames, reading only `columns`."""
+    dataset = ds.dataset(path, format="parquet")
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        yield batch.to_pandas()
+
+
+def load_clean(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Loads the cleaned dataset (or just `columns` of it) into memory."""
+    return ds.dataset(path, format="parquet").to_table(columns=columns).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build / look up the cleaned IDS2018 dataset cache")
+    parser.add_argument("--input", required=True, help="Raw IDS2018 Parquet file")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    path = get_clean_dataset(args.input, args.cache_dir, rebuild=args.rebuild)
+    manifest = read_manifest(path)
+    print(json.dumps({k: v for k, v in manifest.items() if k != "config"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Incremental retraining from analyst feedback (run by the API as a background process).
+
+    1. Loads the base model (registry key, e.g. xgboost@v3) and its scaler
+    2. Loads the analyst-labelled flows from the feedback store (POST /feedback)
+    3. Samples replay rows from the cleaned training dataset, so the extra
+       rounds do not forget the original distribution
+    4. Continues boosting the base Booster on replay + feedback (feedback rows weighted)
+    5. Validates base vs. new on held-out replay rows (macro F1) and held-out
+       feedback rows (accuracy); publishes a new registry version only if
+       the new model does not regress
+    6. Writes a JSON result for the API, which then swaps the default model
+
+--threads caps XGBoost's thread pool; --nice / --memory-mb / --cpus lower
+the priority, cap the address space and pin the process (the API's
+launcher, src/app/retrain_job.py, passes its IDS_RETRAIN_* limits).
+
+Usage (from the project root):
+    python src/models_dev/retrain.py --base xgboost --rounds 50 --replay-rows 100000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, f1_score
+
+from dataset_cache import DEFAULT_CACHE_DIR, TARGET_COLUMN, TARGET_NAMES, get_clean_dataset, iter_clean_batches, read_manifest
+from train import StageReport, DEFAULT_INPUT, RANDOM_STATE
+
+MODELS_DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(MODELS_DEV_DIR)))
+
+from src.app.model_registry import ModelRegistry, REGISTRY_DIR, publish
+from src.app.model_loader import MODELS_DIR
+from src.app.feedback import FeedbackStore, FEEDBACK_PATH
+from src.app.type_definitions import FEATURE_NAMES
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+REPLAY_ROWS = 100_000
+ROUNDS = 50
+FEEDBACK_WEIGHT = 5.0       # Each analyst label counts as this many replay rows
+HOLDOUT_FRAC = 0.2          # Feedback rows kept aside for validation (when there are >= MIN_HOLDOUT_ROWS)
+MIN_HOLDOUT_ROWS = 5
+MAX_REGRESSION = 0.005      # Allowed drop in replay macro F1
+
+
+# ==============================================================================
+# RESOURCE LIMITS
+# ==============================================================================
+def parse_cpus(spec):
+    """'2-3,6' -> [2, 3, 6]."""
+    cpus = []
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def apply_limits(nice, memory_mb, cpus):
+    if nice:
+        os.nice(nice)
+    if memory_mb > 0:
+        try:
+            import resource
+            limit = memory_mb * 2**20
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            print(f"[WARNING] Memory limit not applied: {e}")
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, parse_cpus(cpus))
+
+
+# ==============================================================================
+# DATA
+# ==============================================================================
+def load_base(args):
+    registry = ModelRegistry(args.registry, legacy_dir=args.legacy_dir)
+    entry = registry.resolve(args.base)
+    model = xgb.Booster(model_file=entry.model_path) if entry.model_path.endswith((".ubj", ".json")) \
+        else joblib.load(entry.model_path)
+    booster = model if isinstance(model, xgb.Booster) else model.get_booster()
+    scaler = joblib.load(entry.scaler_path)
+    class_map = entry.class_map() or dict(enumerate(TARGET_NAMES))
+    return entry, booster, scaler, class_map
+
+
+def load_feedback(args, feature_names):
+    ids, X, y = FeedbackStore(args.feedback_db).load(args.max_feedback_id)
+    missing = [f for f in feature_names if f not in FEATURE_NAMES]
+    if missing:
+        raise ValueError(f"Model needs features the API does not receive: {missing[:5]}")
+    if len(ids):
+        X = X[:, [FEATURE_NAMES.index(f) for f in feature_names]]  # API order -> model order
+    else:
+        X = np.zeros((0, len(feature_names)), dtype=np.float32)
+    return ids, X, y
+
+
+def load_replay(args, feature_names, class_map, rng):
+    """Uniform sample of ~replay_rows cleaned training rows, labels mapped to the model's class ids."""
+    clean_path = get_clean_dataset(args.replay_input, args.cache_dir)
+    rate = min(1.0, args.replay_rows / max(read_manifest(clean_path)["rows"], 1))
+    to_model_id = np.array([{name: i for i, name in class_map.items()}[name] for name in TARGET_NAMES])
+    xs, ys = [], []
+    for df in iter_clean_batches(clean_path, columns=feature_names + [TARGET_COLUMN]):
+        keep = rng.random(len(df)) < rate
+        xs.append(df.loc[keep, feature_names].to_numpy(dtype=np.float32))
+        ys.append(to_model_id[df.loc[keep, TARGET_COLUMN].cat.codes.to_numpy()])
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def split(X, y, frac, rng):
+    mask = rng.random(len(y)) < frac
+    return (X[~mask], y[~mask]), (X[mask], y[mask])
+
+
+def predict(booster, X):
+    return np.argmax(booster.inplace_predict(X).reshape(len(X), -1), axis=1)
+
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+def write_result(path, result):
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp, path)
+
+
+def run(args):
+    report = StageReport()
+    rng = np.random.default_rng(RANDOM_STATE)
+
+    with report.stage("load base + feedback"):
+        entry, base, scaler, class_map = load_base(args)
+        base.set_param({"nthread": args.threads})
+        feature_names = list(scaler.feature_names_in_)
+        fb_ids, X_fb, y_fb = load_feedback(args, feature_names)
+    print(f"   Base: {entry.key} | feedback rows: {len(fb_ids)}")
+    if not len(fb_ids):
+        return {"status": "skipped", "reason": "no feedback", "base": entry.key}
+
+    if args.no_replay:
+        print("[WARNING] --no-replay: validating on held-out feedback only")
+        X_rp = np.zeros((0, len(feature_names)), dtype=np.float32)
+        y_rp = np.zeros(0, dtype=np.int64)
+    else:
+        with report.stage("replay sample"):
+            X_rp, y_rp = load_replay(args, feature_names, class_map, rng)
+        print(f"   Replay rows: {len(y_rp):,}")
+
+    # Same math as ModelLoader: (x - mean_) / scale_
+    mean, scale = scaler.mean_.astype(np.float32), scaler.scale_.astype(np.float32)
+    X_rp, X_fb = (X_rp - mean) / scale, (X_fb - mean) / scale
+    (X_rp_train, y_rp_train), (X_rp_val, y_rp_val) = split(X_rp, y_rp, 0.5, rng)
+    holdout = HOLDOUT_FRAC if len(y_fb) >= MIN_HOLDOUT_ROWS else 0.0
+    (X_fb_train, y_fb_train), (X_fb_val, y_fb_val) = split(X_fb, y_fb, holdout, rng)
+
+    with report.stage(f"continue boosting ({args.rounds} rounds)"):
+        dtrain = xgb.DMatrix(np.vstack([X_rp_train, X_fb_train]), label=np.concatenate([y_rp_train, y_fb_train]),
+                             weight=np.concatenate([np.ones(len(y_rp_train)),
+                                                    np.full(len(y_fb_train), args.feedback_weight)]),
+                             nthread=args.threads)
+        params = {"objective": "multi:softprob", "num_class": len(class_map), "tree_method": "hist",
+                  "eta": args.learning_rate, "max_depth": args.max_depth, "nthread": args.threads}
+        model = xgb.train(params, dtrain, num_boost_round=args.rounds, xgb_model=base)
+
+    with report.stage("validate"):
+        metrics = {}
+        for name, booster in (("base", base), ("new", model)):
+            m = {}
+            if len(y_rp_val):
+                pred = predict(booster, X_rp_val)
+                m["replay_f1_macro"] = float(f1_score(y_rp_val, pred, average="macro"))
+                m["replay_accuracy"] = float(accuracy_score(y_rp_val, pred))
+            if len(y_fb_val):
+                m["feedback_holdout_accuracy"] = float(accuracy_score(y_fb_val, predict(booster, X_fb_val)))
+            m["feedback_train_accuracy"] = float(accuracy_score(y_fb_train, predict(booster, X_fb_train)))
+            metrics[name] = m
+            print(f"   {name:<5} " + " | ".join(f"{k} {v:.4f}" for k, v in m.items()))
+
+    problems = []
+    if "replay_f1_macro" in metrics["base"] and \
+            metrics["new"]["replay_f1_macro"] < metrics["base"]["replay_f1_macro"] - args.max_regression:
+        problems.append("replay macro F1 regressed")
+    if "feedback_holdout_accuracy" in metrics["base"] and \
+            metrics["new"]["feedback_holdout_accuracy"] < metrics["base"]["feedback_holdout_accuracy"]:
+        problems.append("held-out feedback accuracy regressed")
+    result = {"base": entry.key, "feedback_rows": int(len(fb_ids)), "feedback_max_id": int(fb_ids[-1]),
+              "replay_rows": int(len(y_rp)), "metrics": metrics, "stages": report.stages}
+    if problems:
+        print(f"[REJECTED] {', '.join(problems)}")
+        return {"status": "rejected", "reason": ", ".join(problems), **result}
+
+    with report.stage("publish"):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = os.path.join(tmp, "model.ubj")
+            model.save_model(model_path)
+            version_dir = publish(
+                args.name or entry.name, model_path, entry.scaler_path, root=args.registry,
+                metadata={
+                    "framework": "xgboost",
+                    "feature_names": feature_names,
+                    "class_map": {str(k): v for k, v in class_map.items()},
+                    "metrics": metrics["new"],
+                    "training": {"parent": entry.key, "feedback_rows": int(len(fb_ids)),
+                                 "feedback_max_id": int(fb_ids[-1]), "replay_rows": int(len(y_rp)),
+                                 "rounds": args.rounds, "feedback_weight": args.feedback_weight},
+                })
+    key = f"{args.name or entry.name}@{os.path.basename(version_dir)}"
+    print(f"   -> Published {key}")
+    report.print_summary()
+    return {"status": "published", "key": key, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continue boosting the served model on analyst feedback")
+    parser.add_argument("--base", default=None, help="Registry model, name or name@version (default: IDS_DEFAULT_MODEL)")
+    parser.add_argument("--name", default=None, help="Registry name to publish under (default: the base name)")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--legacy-dir", default=MODELS_DIR)
+    parser.add_argument("--feedback-db", default=FEEDBACK_PATH)
+    parser.add_argument("--max-feedback-id", type=int, default=None, help="Only feedback rows up to this id")
+    parser.add_argument("--replay-input", default=DEFAULT_INPUT, help="Raw IDS2018 Parquet (cleaned via dataset_cache)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--replay-rows", type=int, default=REPLAY_ROWS)
+    parser.add_argument("--no-replay", action="store_true", help="Train/validate on feedback only (not recommended)")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--learning-rate", type=float, default=0.1)
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--feedback-weight", type=float, default=FEEDBACK_WEIGHT)
+    parser.add_argument("--max-regression", type=float, default=MAX_REGRESSION)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--nice", type=int, default=0, help="Lower the scheduling priority by this much")
+    parser.add_argument("--memory-mb", type=int, default=0, help="Address-space limit (0 = none)")
+    parser.add_argument("--cpus", default="", help="CPU affinity, e.g. '3' or '2-3'")
+    parser.add_argument("--result", default=None, help="Write the outcome as JSON here (read by the API)")
+    args = parser.parse_args()
+
+    apply_limits(args.nice, args.memory_mb, args.cpus)
+    t0 = time.perf_counter()
+    try:
+        result = run(args)
+    except Exception as e:
+        write_result(args.result, {"status": "failed", "reason": f"{type(e).__name__}: {e}"})
+        raise
+    result["wall_s"] = round(time.perf_counter() - t0, 2)
+    write_result(args.result, result)
+    sys.exit(0 if result["status"] in ("published", "skipped") else 2)
+
+
+if __name__ == "__main__":
+    main()
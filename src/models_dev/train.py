@@ -0,0 +1,377 @@
+"""
+Headless training pipeline (extracted from 36230035_KeamananData_UAS_Final.ipynb).
+
+Reproduces the scaler + model artifacts used by the API without Jupyter:
+    1. Chunked cleaning of the raw Parquet (cached, see dataset_cache.py)
+    2. Train / validation / test split (60 / 20 / 20)
+    3. Streaming StandardScaler fit, constant columns dropped
+    4. Class balancing (SMOTE like the notebook, or sample weights)
+    5. Candidate models trained in parallel (XGBoost uses `hist` + all cores)
+    6. Evaluation on the test split and artifact export
+
+Every stage reports wall time and peak memory.
+
+Usage (from the project root):
+    python src/models_dev/train.py --sample-frac 0.05
+    python src/models_dev/train.py --sample-frac 1.0 --candidates xgboost
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from joblib import Parallel, delayed
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, classification_report
+from sklearn.utils.class_weight import compute_sample_weight
+
+from dataset_cache import (
+    DEFAULT_CACHE_DIR, TARGET_COLUMN, TARGET_NAMES, get_clean_dataset, feature_columns, iter_clean_batches
+)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ==============================================================================
+# KONFIGURASI
+# ==============================================================================
+MODELS_DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT = os.path.join(MODELS_DEV_DIR, "datasets", "IDS_2018_Final.parquet")  # Same place the notebook uses
+DEFAULT_OUTPUT_DIR = os.path.join(MODELS_DEV_DIR, "models")
+
+RANDOM_STATE = 42
+CHUNK_ROWS = 500_000
+SPLIT = (0.6, 0.2, 0.2)  # Train / validation / test
+
+N_CORES = os.cpu_count() or 1
+
+
+# ==============================================================================
+# STAGE TIMER & MEMORY
+# ==============================================================================
+def current_rss():
+    """Resident memory (bytes) of this process and its children, or None if unavailable."""
+    if psutil is None:
+        return None
+    proc = psutil.Process()
+    rss = proc.memory_info().rss
+    for child in proc.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+
+def max_rss_so_far():
+    """Process lifetime peak RSS (bytes) via getrusage, for when psutil is not installed."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+
+class StageReport:
+    """Collects wall time and peak memory per pipeline stage."""
+
+    def __init__(self, sample_interval=0.1):
+        self.sample_interval = sample_interval
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        print(f"\n[STAGE] {name}...")
+        peak = [current_rss() or 0]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.sample_interval):
+                peak[0] = max(peak[0], current_rss() or 0)
+
+        sampler = threading.Thread(target=sample, daemon=True) if psutil else None
+        if sampler:
+            sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - t0
+            stop.set()
+            if sampler:
+                sampler.join()
+                peak_bytes = max(peak[0], current_rss() or 0)
+                peak_kind = "stage peak"
+            else:
+                peak_bytes = max_rss_so_far()
+                peak_kind = "process peak"
+            peak_mb = peak_bytes / 2**20 if peak_bytes else None
+            self.stages.append({"stage": name, "wall_s": round(wall, 3), "peak_rss_mb": peak_mb and round(peak_mb, 1)})
+            mem = f"{peak_mb:,.0f} MB ({peak_kind})" if peak_mb else "n/a"
+            print(f"[STAGE] {name}: {wall:.2f}s | peak memory {mem}")
+
+    def print_summary(self):
+        print("\n" + "=" * 60)
+        print(f"{'STAGE':<28} {'WALL (s)':>10} {'PEAK RSS (MB)':>15}")
+        print("-" * 60)
+        for s in self.stages:
+            peak = f"{s['peak_rss_mb']:,.0f}" if s['peak_rss_mb'] else "n/a"
+            print(f"{s['stage']:<28} {s['wall_s']:>10.2f} {peak:>15}")
+        print("=" * 60)
+
+
+# ==============================================================================
+# 1-2. CLEANING (CACHED) + CHUNKED SPLIT
+# ==============================================================================
+def load_splits(input_path, sample_frac, chunk_rows, report, cache_dir=DEFAULT_CACHE_DIR, rebuild_cache=False):
+    """
+    Streams the cleaned dataset in row batches and routes its rows straight
+    into train / val / test float32 buffers. Only one chunk is materialised
+    at a time; the scaler statistics are accumulated on the fly.
+    """
+    with report.stage("clean (cached)"):
+        clean_path = get_clean_dataset(input_path, cache_dir, rebuild=rebuild_cache)
+
+    rng = np.random.default_rng(RANDOM_STATE)
+    parts = {"train": ([], []), "val": ([], []), "test": ([], [])}
+    scaler = StandardScaler()
+    feature_names = feature_columns(clean_path)
+    rows = 0
+
+    with report.stage("split (chunked)"):
+        for df in iter_clean_batches(clean_path, batch_size=chunk_rows):
+            rows += len(df)
+            if sample_frac < 1.0:
+                df = df[rng.random(len(df)) < sample_frac]
+            if df.empty:
+                continue
+
+            X = df[feature_names].to_numpy(dtype=np.float32)
+            y = df[TARGET_COLUMN].cat.codes.to_numpy(dtype=np.int8)  # Categories are in TARGET_NAMES order
+            del df
+
+            u = rng.random(len(y))
+            masks = {"train": u < SPLIT[0], "val": (u >= SPLIT[0]) & (u < SPLIT[0] + SPLIT[1]),
+                     "test": u >= SPLIT[0] + SPLIT[1]}
+            for split, mask in masks.items():
+                parts[split][0].append(X[mask])
+                parts[split][1].append(y[mask])
+            scaler.partial_fit(pd.DataFrame(X[masks["train"]], columns=feature_names, copy=False))
+
+        if not parts["train"][0]:
+            raise ValueError(f"No rows left after cleaning {input_path}")
+
+        splits = {}
+        for split, (xs, ys) in parts.items():
+            splits[split] = (np.concatenate(xs), np.concatenate(ys))
+            xs.clear()
+            ys.clear()
+
+    print(f"   Clean rows: {rows:,} | " + " | ".join(f"{k}: {len(v[1]):,}" for k, v in splits.items()))
+    return splits, feature_names, scaler
+
+
+# ==============================================================================
+# 3. SCALING
+# ==============================================================================
+def drop_constant_columns(scaler: StandardScaler, feature_names):
+    """
+    Removes zero-variance features (as the notebook does) from an already
+    fitted scaler, so its feature_names_in_ matches what the API sends.
+    """
+    keep = scaler.var_ > 0
+    dropped = [f for f, k in zip(feature_names, keep) if not k]
+    scaler.mean_ = scaler.mean_[keep]
+    scaler.var_ = scaler.var_[keep]
+    scaler.scale_ = scaler.scale_[keep]
+    scaler.n_features_in_ = int(keep.sum())
+    scaler.feature_names_in_ = np.asarray([f for f, k in zip(feature_names, keep) if k], dtype=object)
+    if np.ndim(scaler.n_samples_seen_):
+        scaler.n_samples_seen_ = scaler.n_samples_seen_[keep]
+    return keep, dropped
+
+
+def scale_inplace(X: np.ndarray, scaler: StandardScaler, chunk_rows: int) -> np.ndarray:
+    """Applies the scaler chunk by chunk in float32 (no float64 copy of the whole split)."""
+    mean = scaler.mean_.astype(np.float32)
+    scale = scaler.scale_.astype(np.float32)
+    for start in range(0, len(X), chunk_rows):
+        block = X[start:start + chunk_rows]
+        block -= mean
+        block /= scale
+    return X
+
+
+# ==============================================================================
+# 4-5. BALANCING + PARALLEL CANDIDATES
+# ==============================================================================
+def build_candidates(names, n_jobs_each):
+    """Notebook hyperparameters; XGBoost always uses the `hist` tree method."""
+    factories = {
+        "logistic_regression": lambda: LogisticRegression(solver='lbfgs', max_iter=500),
+        "decision_tree": lambda: DecisionTreeClassifier(max_depth=20, random_state=RANDOM_STATE),
+        "random_forest": lambda: RandomForestClassifier(
+            n_estimators=100, max_depth=20, n_jobs=n_jobs_each, random_state=RANDOM_STATE),
+        "xgboost": lambda: xgb.XGBClassifier(
+            objective='multi:softprob', num_class=len(TARGET_NAMES), tree_method='hist',
+            n_jobs=n_jobs_each, learning_rate=0.1, n_estimators=200, max_depth=10,
+            reg_alpha=0.1, reg_lambda=1.0, subsample=0.8, random_state=RANDOM_STATE),
+    }
+    unknown = set(names) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown candidates: {sorted(unknown)}. Choose from {sorted(factories)}")
+    return {name: factories[name]() for name in names}
+
+
+def balance(X, y, mode):
+    """Returns (X, y, sample_weight). SMOTE reproduces the notebook; weights avoid the extra rows."""
+    if mode == "smote":
+        from imblearn.over_sampling import SMOTE
+        X_res, y_res = SMOTE(random_state=RANDOM_STATE, k_neighbors=5).fit_resample(X, y)
+        print(f"   SMOTE: {len(y):,} -> {len(y_res):,} rows")
+        return X_res.astype(np.float32, copy=False), y_res, None
+    if mode == "weights":
+        return X, y, compute_sample_weight("balanced", y).astype(np.float32)
+    return X, y, None
+
+
+def fit_candidate(name, model, X, y, sample_weight):
+    t0 = time.perf_counter()
+    model.fit(X, y, sample_weight=sample_weight)
+    return name, model, time.perf_counter() - t0
+
+
+def save_drift_reference(X_train: np.ndarray, scaler: StandardScaler, output_dir: str):
+    """Quantile bins of the scaled training split, used by the API's drift monitor (/drift)."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(MODELS_DEV_DIR)))
+    from src.app.drift_monitor import REFERENCE_FILE, build_reference, save_reference
+
+    reference = build_reference(X_train, list(scaler.feature_names_in_))
+    save_reference(reference, os.path.join(output_dir, REFERENCE_FILE))
+    print(f"   -> Saved: {REFERENCE_FILE:<30} | {reference['rows']:,} training rows")
+
+
+def register_candidates(results, metrics, scaler, args, balance_mode):
+    """Publishes each saved candidate (+ scaler) as the next version in src/models_dev/registry."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(MODELS_DEV_DIR)))
+    from src.app.model_registry import publish
+
+    scaler_path = os.path.join(args.output_dir, "scaler.joblib")
+    for name, _, _ in results:
+        version_dir = publish(
+            args.registry_prefix + name, os.path.join(args.output_dir, f"{name}.joblib"), scaler_path,
+            metadata={
+                "framework": name,
+                "feature_names": list(scaler.feature_names_in_),
+                "class_map": dict(enumerate(TARGET_NAMES)),
+                "metrics": metrics[name],
+                "training": {"sample_frac": args.sample_frac, "balance": balance_mode, "input": args.input},
+            })
+        print(f"   -> Registered: {os.path.relpath(version_dir, MODELS_DEV_DIR)}")
+
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Headless IDS training pipeline")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="Raw IDS2018 Parquet file")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--sample-frac", type=float, default=1.0, help="Notebook used 0.05")
+    parser.add_argument("--candidates", default="xgboost,decision_tree,logistic_regression",
+                        help="Comma separated: xgboost, decision_tree, logistic_regression, random_forest")
+    parser.add_argument("--balance", choices=["auto", "smote", "weights", "none"], default="auto",
+                        help="auto = SMOTE for sampled runs (notebook), sample weights for full-data runs")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Cleaned dataset cache (dataset_cache.py)")
+    parser.add_argument("--rebuild-cache", action="store_true")
+    parser.add_argument("--register", action="store_true",
+                        help="Also publish every candidate as a new version in the model registry")
+    parser.add_argument("--registry-prefix", default="",
+                        help="Registry name prefix, e.g. 'site-a-' for per-site models")
+    args = parser.parse_args()
+
+    balance_mode = args.balance
+    if balance_mode == "auto":
+        balance_mode = "smote" if args.sample_frac <= 0.1 else "weights"
+
+    report = StageReport()
+    t_start = time.perf_counter()
+    print("=" * 60)
+    print(f"   HEADLESS TRAINING | cores: {N_CORES} | sample: {args.sample_frac:.0%} | balance: {balance_mode}")
+    print("=" * 60)
+
+    splits, feature_names, scaler = load_splits(args.input, args.sample_frac, args.chunk_rows, report,
+                                                args.cache_dir, args.rebuild_cache)
+
+    with report.stage("scale"):
+        keep, dropped = drop_constant_columns(scaler, feature_names)
+        if dropped:
+            print(f"   Dropped {len(dropped)} constant columns: {dropped}")
+        for split, (X, y) in splits.items():
+            X = X[:, keep] if dropped else X
+            splits[split] = (scale_inplace(X, scaler, args.chunk_rows), y)
+
+    X_train, y_train = splits["train"]
+    with report.stage(f"balance ({balance_mode})"):
+        X_fit, y_fit, sample_weight = balance(X_train, y_train, balance_mode)
+
+    names = [n.strip() for n in args.candidates.split(",") if n.strip()]
+    # Split cores between candidates trained concurrently (threads share X_fit, no copies)
+    n_jobs_each = max(1, N_CORES // len(names))
+    models = build_candidates(names, n_jobs_each)
+    with report.stage(f"train {len(models)} candidates"):
+        results = Parallel(n_jobs=len(models), backend="threading")(
+            delayed(fit_candidate)(name, model, X_fit, y_fit, sample_weight) for name, model in models.items())
+        for name, _, seconds in results:
+            print(f"   {name:<22} trained in {seconds:.2f}s")
+    del X_fit, y_fit, sample_weight
+
+    X_test, y_test = splits["test"]
+    metrics = {}
+    with report.stage("evaluate"):
+        for name, model, _ in results:
+            y_pred = model.predict(X_test)
+            metrics[name] = {
+                "accuracy": float(accuracy_score(y_test, y_pred)),
+                "f1_macro": float(f1_score(y_test, y_pred, average="macro")),
+            }
+            print(f"\n   MODEL: {name} | accuracy {metrics[name]['accuracy']:.4f} | macro F1 {metrics[name]['f1_macro']:.4f}")
+            print(classification_report(y_test, y_pred, labels=range(len(TARGET_NAMES)),
+                                        target_names=TARGET_NAMES, digits=4, zero_division=0))
+
+    with report.stage("save artifacts"):
+        os.makedirs(args.output_dir, exist_ok=True)
+        joblib.dump(scaler, os.path.join(args.output_dir, "scaler.joblib"))
+        save_drift_reference(X_train, scaler, args.output_dir)
+        for name, model, _ in results:
+            path = os.path.join(args.output_dir, f"{name}.joblib")
+            joblib.dump(model, path)
+            print(f"   -> Saved: {name + '.joblib':<30} | Size: {os.path.getsize(path) / 2**20:.2f} MB")
+
+    if args.register:
+        register_candidates(results, metrics, scaler, args, balance_mode)
+
+    report.print_summary()
+    print(f"Total wall time: {time.perf_counter() - t_start:.2f}s")
+
+    with open(os.path.join(args.output_dir, "training_report.json"), "w") as f:
+        json.dump({"args": vars(args), "balance": balance_mode, "features": list(scaler.feature_names_in_),
+                   "dropped_constant": dropped, "stages": report.stages, "metrics": metrics}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()